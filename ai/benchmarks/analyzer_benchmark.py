@@ -0,0 +1,207 @@
+"""
+Analyzer scaling benchmark on synthetic landmark sequences.
+
+Times every analyzer served by get_analyzer_for_exercise (rep analysis and
+rep scoring), the legacy MovementAnalyzer, the rep table analytics,
+multi-camera offset estimation and the ai-analysis velocity engine on sequences of growing length, and fits the exponent of time against frames. An exponent well above 1 means
+the analyzer does more than constant work per frame, which turns into minutes
+once a long session arrives.
+
+Run from the ai/ directory:
+
+    python -m benchmarks.analyzer_benchmark
+    python -m benchmarks.analyzer_benchmark --sizes 1000 10000 100000 1000000 --max-seconds 60
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import sys
+import time
+import numpy as np
+
+from .landmark_sequences import generate_landmark_sequence
+
+# Analyzer benchmark configuration
+ANALYZER_BENCHMARK_CONFIG = {
+    'sizes': (1000, 10000, 100000),  # Frames per sequence
+    'max_seconds': 30.0,  # Skip a size when the previous one projects past this
+    'superlinear_exponent': 1.3  # Fitted exponents above this are flagged
+}
+
+# Names get_analyzer_for_exercise resolves to a built-in analyzer
+ANALYZER_EXERCISES = ('squat', 'deadlift', 'bench_press', 'overhead_press', 'pullup', 'barbell_row', 'lunge')
+LEGACY_EXERCISES = ('squat', 'deadlift', 'pushup')
+
+# velocity.py of the ai-analysis package, which is not importable as a package from ai/
+VELOCITY_MODULE_PATH = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir,
+                                    'packages', 'ai-analysis', 'src', 'utils', 'velocity.py')
+
+
+class Target:
+    """One timed analyzer entry point: builds fresh state, then runs on a sequence."""
+
+    def __init__(self, name: str, exercise: str, prepare: Callable, run: Callable):
+        self.name = name
+        self.exercise = exercise
+        self.prepare = prepare  # sequence -> (analyzer, frames, timestamps)
+        self.run = run  # (analyzer, frames, timestamps) -> result
+
+
+def _form_analyzer_targets() -> List[Target]:
+    from services.exercises.get_analyzer_for_exercise import get_analyzer_for_exercise
+
+    def prepare(exercise):
+        def _prepare(sequence):
+            analyzer = get_analyzer_for_exercise(exercise)
+            return analyzer, sequence.analyzer_frames(analyzer.required_joints or None), sequence.timestamps.tolist()
+        return _prepare
+
+    targets = []
+    for exercise in ANALYZER_EXERCISES:
+        targets.append(Target(f"{exercise}.analyze_movement_sequence", exercise, prepare(exercise),
+                              lambda analyzer, frames, times: analyzer.analyze_movement_sequence(frames, timestamps=times)))
+        targets.append(Target(f"{exercise}.scoreRep", exercise, prepare(exercise),
+                              lambda analyzer, frames, times: analyzer.scoreRep(frames)))
+    return targets
+
+
+def _legacy_targets() -> List[Target]:
+    from services.movement_analyzer import MovementAnalyzer
+
+    def _prepare(sequence):
+        return MovementAnalyzer(), sequence.mediapipe_frames(), sequence.timestamps.tolist()
+
+    return [
+        Target(f"legacy.{exercise}", exercise, _prepare,
+               lambda analyzer, frames, times, exercise=exercise: analyzer.analyze_movement(frames, exercise, timestamps=times))
+        for exercise in LEGACY_EXERCISES
+    ]
+
+
+def _rep_table_targets() -> List[Target]:
+    from services.rep_table import REP_TABLE_CONFIG, rep_analytics
+
+    def _prepare(sequence):
+        points = np.zeros((len(sequence), 33, 4), dtype=np.float32)
+        points[:, :, :2], points[:, :, 3] = sequence.points, sequence.visibility
+        return rep_analytics, points, sequence.timestamps
+
+    return [
+        Target(f"{exercise}.rep_analytics", exercise, _prepare,
+               lambda analytics, points, times, exercise=exercise: analytics(points, times, exercise))
+        for exercise in REP_TABLE_CONFIG['exercise_angles']
+    ]
+
+
+def _alignment_targets() -> List[Target]:
+    from services.view_alignment import estimate_offset
+
+    def _prepare(sequence):
+        # Motion energy of the landmarks, seen by a second camera that started 1% of the session later
+        energy = np.abs(np.diff(sequence.points, axis=0)).mean(axis=(1, 2))
+        lag = len(energy) // 100
+        return estimate_offset, energy[:len(energy) - lag], energy[lag:]
+
+    return [Target('alignment.estimate_offset', 'squat', _prepare,
+                   lambda estimate, reference, signal: estimate(reference, signal))]
+
+
+def _velocity_targets() -> List[Target]:
+    spec = importlib.util.spec_from_file_location('ai_analysis_velocity', VELOCITY_MODULE_PATH)
+    velocity = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(velocity)
+
+    def _prepare(sequence):
+        # Bar height from the wrists; calcVelocity takes the frame rate in place of timestamps
+        bar = sequence.points[:, [15, 16], 1].mean(axis=1).astype(np.float64)
+        return velocity.calcVelocity, bar, 1.0 / np.median(np.diff(sequence.timestamps))
+
+    return [Target('velocity.calcVelocity', 'squat', _prepare, lambda calc, bar, fps: calc(bar, fps))]
+
+
+def scaling_exponent(sizes: List[int], seconds: List[float]) -> Optional[float]:
+    """Slope of log(time) against log(frames), from timings long enough to trust."""
+    points = [(n, t) for n, t in zip(sizes, seconds) if t >= 1e-3]
+    if len(points) < 2:
+        return None
+    n, t = np.log(np.array(points, dtype=float)).T
+    return round(float(np.polyfit(n, t, 1)[0]), 2)
+
+
+def run_target(target: Target, sizes: List[int], max_seconds: float) -> Dict:
+    """Time one target at each size, stopping once sizes project past max_seconds."""
+    timings: List[Tuple[int, float]] = []
+    result = {'exercise': target.exercise, 'timings': {}, 'error': None, 'skipped_sizes': []}
+    for size in sizes:
+        if timings:
+            last_size, last_seconds = timings[-1]
+            if last_seconds * size / last_size > max_seconds:
+                result['skipped_sizes'].append(size)
+                continue
+        sequence = generate_landmark_sequence(target.exercise, size)
+        try:
+            analyzer, frames, times = target.prepare(sequence)
+            start = time.perf_counter()
+            target.run(analyzer, frames, times)
+            elapsed = time.perf_counter() - start
+        except Exception as e:
+            result['error'] = f"{type(e).__name__}: {e}"
+            break
+        timings.append((size, elapsed))
+        result['timings'][size] = {'seconds': round(elapsed, 4), 'us_per_frame': round(elapsed * 1e6 / size, 2)}
+
+    result['exponent'] = scaling_exponent([n for n, _ in timings], [t for _, t in timings])
+    return result
+
+
+def run_benchmarks(sizes: List[int] = ANALYZER_BENCHMARK_CONFIG['sizes'],
+                   max_seconds: float = ANALYZER_BENCHMARK_CONFIG['max_seconds'],
+                   only: Optional[str] = None) -> Dict[str, Dict]:
+    results = {}
+    for target in _form_analyzer_targets() + _legacy_targets() + _rep_table_targets() + _alignment_targets() + _velocity_targets():
+        if only and only not in target.name:
+            continue
+        results[target.name] = run_target(target, sorted(sizes), max_seconds)
+    return results
+
+
+def _print_table(results: Dict[str, Dict], sizes: List[int]):
+    threshold = ANALYZER_BENCHMARK_CONFIG['superlinear_exponent']
+    print(f"{'analyzer':<40}" + ''.join(f"{f'{n} fr (us/fr)':>18}" for n in sizes) + f"{'exponent':>10}")
+    for name, r in results.items():
+        cells = []
+        for n in sizes:
+            timing = r['timings'].get(n)
+            cells.append(f"{timing['us_per_frame']:>18.1f}" if timing else f"{'skipped' if n in r['skipped_sizes'] else '-':>18}")
+        exponent = r['exponent']
+        flag = '  SUPERLINEAR' if exponent is not None and exponent > threshold else ''
+        line = f"{name:<40}" + ''.join(cells) + f"{exponent if exponent is not None else '-':>10}{flag}"
+        if r['error']:
+            line += f"  error: {r['error'][:80]}"
+        print(line)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(ANALYZER_BENCHMARK_CONFIG['sizes']))
+    parser.add_argument('--max-seconds', type=float, default=ANALYZER_BENCHMARK_CONFIG['max_seconds'])
+    parser.add_argument('--only', help="Run targets whose name contains this, e.g. 'squat', 'legacy' or 'velocity'")
+    parser.add_argument('--output', help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    # Analyzers log per-call failures; keep the table readable
+    logging.basicConfig(level=logging.CRITICAL)
+    sizes = sorted(args.sizes)
+    results = run_benchmarks(sizes, args.max_seconds, args.only)
+    _print_table(results, sizes)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'sizes': sizes, 'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,179 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional
+import numpy as np
+
+NUM_LANDMARKS = 33
+
+# MediaPipe landmark names the analyzers look up by name
+LANDMARK_NAMES = {
+    0: 'nose',
+    11: 'left_shoulder', 12: 'right_shoulder',
+    13: 'left_elbow', 14: 'right_elbow',
+    15: 'left_wrist', 16: 'right_wrist',
+    23: 'left_hip', 24: 'right_hip',
+    25: 'left_knee', 26: 'right_knee',
+    27: 'left_ankle', 28: 'right_ankle'
+}
+
+_HEAD = list(range(0, 11))
+_SHOULDERS, _ELBOWS, _WRISTS, _HANDS = [11, 12], [13, 14], [15, 16], list(range(17, 23))
+_HIPS, _KNEES, _ANKLES, _FEET = [23, 24], [25, 26], [27, 28], list(range(29, 33))
+_ARMS = _ELBOWS + _WRISTS + _HANDS
+_UPPER_BODY = _HEAD + _SHOULDERS + _ARMS
+
+
+def _standing_pose() -> np.ndarray:
+    """Normalized (x, y) of a lifter standing side-on, arms hanging."""
+    pose = np.zeros((NUM_LANDMARKS, 2))
+    pose[_HEAD] = (0.5, 0.15)
+    pose[_SHOULDERS] = [(0.49, 0.28), (0.51, 0.28)]
+    pose[_ELBOWS] = [(0.49, 0.42), (0.51, 0.42)]
+    pose[_WRISTS] = [(0.49, 0.54), (0.51, 0.54)]
+    pose[_HANDS] = (0.5, 0.57)
+    pose[_HIPS] = [(0.49, 0.55), (0.51, 0.55)]
+    pose[_KNEES] = [(0.49, 0.72), (0.51, 0.72)]
+    pose[_ANKLES] = [(0.49, 0.9), (0.51, 0.9)]
+    pose[_FEET] = (0.52, 0.92)
+    return pose
+
+
+def _moves(*groups) -> np.ndarray:
+    """Displacement from the start to the end of the working range, by joint group."""
+    delta = np.zeros((NUM_LANDMARKS, 2))
+    for joints, offset in groups:
+        delta[joints] += offset
+    return delta
+
+
+def _lying_pose() -> np.ndarray:
+    """Side-on view of a lifter lying on a bench, arms locked out above the chest."""
+    pose = np.zeros((NUM_LANDMARKS, 2))
+    pose[_HEAD] = (0.25, 0.6)
+    pose[_SHOULDERS] = (0.32, 0.6)
+    pose[_ELBOWS] = (0.32, 0.48)
+    pose[_WRISTS + _HANDS] = (0.32, 0.36)
+    pose[_HIPS] = (0.58, 0.6)
+    pose[_KNEES] = (0.72, 0.55)
+    pose[_ANKLES + _FEET] = (0.75, 0.8)
+    return pose
+
+
+# Start pose and displacement at the far end of each rep
+EXERCISE_MOTIONS = {
+    'squat': (_standing_pose(), _moves((_UPPER_BODY, (0.03, 0.17)), (_HIPS, (-0.06, 0.15)), (_KNEES, (0.07, 0.02)))),
+    'deadlift': (_standing_pose(), _moves((_UPPER_BODY, (0.1, 0.2)), (_ARMS, (0.0, 0.08)), (_HIPS, (-0.06, 0.06)), (_KNEES, (0.03, 0.0)))),
+    'bench_press': (_lying_pose(), _moves((_ELBOWS, (0.04, 0.14)), (_WRISTS + _HANDS, (0.02, 0.2)))),
+    'overhead_press': (_standing_pose(), _moves((_ELBOWS, (0.0, -0.24)), (_WRISTS + _HANDS, (0.0, -0.46)))),
+    'pullup': (_standing_pose() + _moves((_ARMS, (0.0, -0.55))), _moves((list(range(NUM_LANDMARKS)), (0.0, -0.2)), (_WRISTS + _HANDS, (0.0, 0.2)), (_ELBOWS, (0.0, 0.08)))),
+    'barbell_row': (_standing_pose() + _moves((_UPPER_BODY, (0.12, 0.17)), (_ARMS, (0.0, 0.06))), _moves((_ELBOWS, (-0.08, -0.1)), (_WRISTS + _HANDS, (-0.05, -0.14)))),
+    'lunge': (_standing_pose(), _moves((_UPPER_BODY + _HIPS, (0.0, 0.14)), ([25], (0.1, 0.04)), ([27], (0.12, 0.0)), ([26], (-0.08, 0.14)), ([28], (-0.14, 0.0)))),
+    'pushup': (_lying_pose() + _moves((_HEAD + _SHOULDERS, (0.0, -0.12)), (_HIPS, (0.0, -0.04)), (_ELBOWS, (0.0, 0.12)), (_WRISTS + _HANDS, (0.0, 0.24))),
+               _moves((_HEAD + _SHOULDERS, (0.0, 0.1)), (_HIPS, (0.0, 0.05)), (_ELBOWS, (-0.06, -0.04))))
+}
+
+
+class LandmarkSequence(NamedTuple):
+    points: np.ndarray  # (frames, 33, 2) normalized x, y
+    visibility: np.ndarray  # (frames, 33)
+    timestamps: np.ndarray  # (frames,) seconds; dropped frames leave gaps
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def mediapipe_frames(self, joints: Optional[Iterable[int]] = None) -> List[Dict]:
+        """Frames as the video pipeline emits them: {index: {'x', 'y', 'visibility'}}."""
+        joints = list(range(NUM_LANDMARKS)) if joints is None else list(joints)
+        points = self.points[:, joints].tolist()
+        visibility = self.visibility[:, joints].tolist()
+        return [
+            {j: {'x': p[0], 'y': p[1], 'visibility': v} for j, p, v in zip(joints, frame_points, frame_vis)}
+            for frame_points, frame_vis in zip(points, visibility)
+        ]
+
+    def analyzer_frames(self, joints: Optional[Iterable[int]] = None) -> List[Dict]:
+        """
+        Frames for the form analyzers: arrays of (x, y, visibility), keyed both
+        by str(index) (landmark validation) and by name (pose normalization).
+        """
+        joints = list(range(NUM_LANDMARKS)) if joints is None else list(joints)
+        values = np.concatenate([self.points[:, joints], self.visibility[:, joints, None]], axis=2)
+        frames = []
+        for frame_values in values:
+            frame = {}
+            for j, value in zip(joints, frame_values):
+                frame[str(j)] = value
+                if j in LANDMARK_NAMES:
+                    frame[LANDMARK_NAMES[j]] = value
+            frames.append(frame)
+        return frames
+
+
+def generate_landmark_sequence(
+    exercise: str,
+    frames: int,
+    fps: float = 30.0,
+    rep_period: float = 3.0,
+    tempo_jitter: float = 0.15,
+    noise: float = 0.004,
+    dropout_rate: float = 0.002,
+    dropout_length: int = 8,
+    occlusion_rate: float = 0.01,
+    seed: int = 0
+) -> LandmarkSequence:
+    """
+    Synthetic landmark track of continuous reps of an exercise.
+
+    Each rep has its own duration (rep_period ± tempo_jitter) and range of
+    motion; on top come per-joint Gaussian jitter, a slow visibility drift,
+    short occlusions where a few joints lose confidence, and dropouts where
+    no pose was found for `dropout_length` frames. As in the video pipeline,
+    dropped frames are absent from the sequence, leaving timestamp gaps.
+    Generation is vectorized, so million-frame sequences are cheap to build.
+
+    Args:
+        exercise: Key of EXERCISE_MOTIONS
+        frames: Number of frames before dropouts are removed
+        fps: Frame rate of the timestamps
+        rep_period: Mean seconds per rep
+        tempo_jitter: Relative spread of rep durations
+        noise: Std dev of per-joint jitter, in normalized image units
+        dropout_rate: Probability per frame that a dropout starts
+        dropout_length: Frames per dropout
+        occlusion_rate: Share of frames where some joints are poorly visible
+            (0.5-0.7, usable but below the normalizer's critical threshold)
+        seed: Random seed; the same arguments always give the same sequence
+
+    Returns:
+        LandmarkSequence
+    """
+    if exercise not in EXERCISE_MOTIONS:
+        raise ValueError(f"Unknown exercise {exercise}; choose from {sorted(EXERCISE_MOTIONS)}")
+    rng = np.random.default_rng(seed)
+    start, delta = EXERCISE_MOTIONS[exercise]
+    timestamps = np.arange(frames) / fps
+
+    # Phase advances by one per rep; rep durations vary around rep_period
+    reps = int(frames / (fps * rep_period * (1 - tempo_jitter))) + 2
+    durations = rep_period * (1 + tempo_jitter * rng.uniform(-1, 1, reps))
+    rep_starts = np.concatenate([[0.0], np.cumsum(durations)])
+    rep_index = np.searchsorted(rep_starts, timestamps, side='right') - 1
+    phase = (timestamps - rep_starts[rep_index]) / durations[rep_index]
+    depth = (0.5 - 0.5 * np.cos(2 * np.pi * phase)) * rng.uniform(0.85, 1.0, reps)[rep_index]
+
+    points = (start[None] + depth[:, None, None] * delta[None]).astype(np.float32)
+    points += noise * rng.standard_normal(points.shape, dtype=np.float32)
+
+    drift_phase = rng.uniform(0, 2 * np.pi, NUM_LANDMARKS).astype(np.float32)
+    visibility = 0.9 + 0.05 * np.sin((2 * np.pi / 20.0) * timestamps.astype(np.float32)[:, None] + drift_phase)
+    visibility += 0.02 * rng.standard_normal(visibility.shape, dtype=np.float32)
+    occluded = np.flatnonzero(rng.random(frames) < occlusion_rate)
+    occluded_joints = rng.random((occluded.size, NUM_LANDMARKS)) < 0.25
+    rows, cols = np.nonzero(occluded_joints)
+    visibility[occluded[rows], cols] = rng.uniform(0.5, 0.7, rows.size)
+    np.clip(visibility, 0.0, 1.0, out=visibility)
+
+    keep = np.ones(frames, dtype=bool)
+    starts = np.flatnonzero(rng.random(frames) < dropout_rate)
+    for offset in range(dropout_length):
+        keep[np.minimum(starts + offset, frames - 1)] = False
+
+    return LandmarkSequence(points[keep], visibility[keep], timestamps[keep])
@@ -0,0 +1,272 @@
+"""
+HTTP load generator for the analysis endpoints.
+
+Uploads a real video to /analyze-pose (or any multipart endpoint given with
+--path) from many concurrent clients and reports throughput, latency
+percentiles, rejection and error rates, and the queue wait the server
+reports per request. With --rate the load is open-loop: requests are
+scheduled at a fixed rate and latency is measured from the scheduled time,
+so a slow server cannot hide its queueing by slowing the clients down.
+
+Run from the ai/ directory, either against a running server or by letting
+the tool start the stand-in server (benchmarks/standin_server.py):
+
+    python -m benchmarks.load_test --spawn --workers 2 --pool-size 2 --inference-ms 15 --concurrency 16 --duration 60
+    python -m benchmarks.load_test --url http://10.0.0.5:8000 --rate 4 --duration 120 --video clip.mp4
+"""
+from typing import Dict, List, NamedTuple, Optional
+from urllib.parse import urlencode, urlsplit
+import argparse
+import http.client
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+import numpy as np
+
+from .pipeline_benchmark import BENCHMARK_CONFIG
+from .synthetic_video import VideoSpec, cached_video
+
+# Load test configuration
+LOAD_TEST_CONFIG = {
+    'concurrency': 8,  # Client threads
+    'duration': 30.0,  # Seconds of load
+    'request_timeout': 600.0,  # Seconds before a client gives up on a response
+    'server_start_timeout': 60.0,  # Seconds to wait for a spawned server's /health
+    'video': VideoSpec(640, 480, 30, 10)  # Generated upload when --video is not given
+}
+
+REJECTED_STATUSES = {429, 503}
+
+
+class RequestResult(NamedTuple):
+    status: int  # 0 when the request failed without a response
+    latency: float  # seconds, from the scheduled start
+    queue_wait: Optional[float]  # seconds, as reported by the server
+    partial: bool
+    error: Optional[str] = None
+
+
+def multipart_body(path: str, field: str = 'file') -> tuple:
+    """Encode a file as multipart/form-data; returns (content type, body)."""
+    boundary = uuid.uuid4().hex
+    with open(path, 'rb') as f:
+        data = f.read()
+    head = (f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; '
+            f'filename="{os.path.basename(path)}"\r\nContent-Type: video/mp4\r\n\r\n').encode()
+    return f'multipart/form-data; boundary={boundary}', head + data + f'\r\n--{boundary}--\r\n'.encode()
+
+
+class LoadGenerator:
+    """
+    Fixed number of client threads, each with one keep-alive connection.
+
+    Closed-loop by default: every client sends its next request as soon as
+    the previous one completes. With `rate`, requests are taken from a shared
+    schedule instead, and a request that starts late because every client
+    was busy has that delay counted in its latency.
+    """
+
+    def __init__(self, url: str, path: str, body: bytes, content_type: str, params: Dict,
+                 concurrency: int, duration: float, rate: Optional[float] = None,
+                 headers: Optional[Dict] = None, timeout: float = LOAD_TEST_CONFIG['request_timeout']):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.target = path + ('?' + urlencode(params) if params else '')
+        self.body = body
+        self.headers = {'Content-Type': content_type, **(headers or {})}
+        self.concurrency = concurrency
+        self.duration = duration
+        self.rate = rate
+        self.timeout = timeout
+        self.results: List[RequestResult] = []
+        self._lock = threading.Lock()
+        self._schedule = itertools.count()
+
+    def run(self) -> List[RequestResult]:
+        self.start = time.perf_counter()
+        self.end = self.start + self.duration
+        threads = [threading.Thread(target=self._client, daemon=True) for _ in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.elapsed = time.perf_counter() - self.start
+        return self.results
+
+    def _client(self):
+        conn = None
+        while True:
+            if self.rate:
+                scheduled = self.start + next(self._schedule) / self.rate
+                if scheduled >= self.end:
+                    break
+                time.sleep(max(0.0, scheduled - time.perf_counter()))
+            else:
+                scheduled = time.perf_counter()
+                if scheduled >= self.end:
+                    break
+            if conn is None:
+                conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            result = self._send(conn, scheduled)
+            if result.status == 0:
+                conn.close()
+                conn = None
+            with self._lock:
+                self.results.append(result)
+        if conn is not None:
+            conn.close()
+
+    def _send(self, conn: http.client.HTTPConnection, scheduled: float) -> RequestResult:
+        try:
+            conn.request('POST', self.target, body=self.body, headers=self.headers)
+            response = conn.getresponse()
+            payload = response.read()
+        except Exception as e:
+            return RequestResult(0, time.perf_counter() - scheduled, None, False, f"{type(e).__name__}: {e}")
+        latency = time.perf_counter() - scheduled
+        queue_wait, partial = None, False
+        if response.status == 200:
+            try:
+                data = json.loads(payload)
+                queue_wait = (data.get('usage') or {}).get('stage_seconds', {}).get('queue_wait')
+                partial = bool(data.get('partial'))
+            except ValueError:
+                pass
+        return RequestResult(response.status, latency, queue_wait, partial)
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    qs = (50, 90, 95, 99)
+    return {**{f"p{q}": round(float(v), 4) for q, v in zip(qs, np.percentile(values, qs))},
+            'max': round(float(max(values)), 4)}
+
+
+def summarize(results: List[RequestResult], elapsed: float, upload_bytes: int) -> Dict:
+    """Throughput, latency percentiles, rejection/error rates and queue wait of a run."""
+    total = len(results)
+    ok = [r for r in results if 200 <= r.status < 300]
+    rejected = [r for r in results if r.status in REJECTED_STATUSES]
+    failed = [r for r in results if not 200 <= r.status < 300 and r.status not in REJECTED_STATUSES]
+    statuses: Dict[str, int] = {}
+    for r in results:
+        statuses[str(r.status)] = statuses.get(str(r.status), 0) + 1
+    errors = sorted({r.error for r in failed if r.error})
+    return {
+        'requests': total,
+        'elapsed_seconds': round(elapsed, 2),
+        'throughput_rps': round(len(ok) / elapsed, 3) if elapsed else 0.0,
+        'upload_mb_per_second': round(len(ok) * upload_bytes / 2**20 / elapsed, 2) if elapsed else 0.0,
+        'latency_seconds': _percentiles([r.latency for r in ok]),
+        'rejection_rate': round(len(rejected) / total, 4) if total else 0.0,
+        'rejected_latency_seconds': _percentiles([r.latency for r in rejected]),
+        'error_rate': round(len(failed) / total, 4) if total else 0.0,
+        'partial_rate': round(sum(r.partial for r in ok) / len(ok), 4) if ok else 0.0,
+        'queue_wait_seconds': _percentiles([r.queue_wait for r in ok if r.queue_wait is not None]),
+        'statuses': statuses,
+        'errors': errors[:10]
+    }
+
+
+def _wait_for_server(url: str, timeout: float, process: subprocess.Popen):
+    parts = urlsplit(url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Stand-in server exited with code {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=2)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Stand-in server not healthy after {timeout:.0f}s")
+
+
+def spawn_server(args) -> subprocess.Popen:
+    """Start benchmarks.standin_server with the server options of args."""
+    command = [sys.executable, '-m', 'benchmarks.standin_server', '--port', str(urlsplit(args.url).port or 80),
+               '--workers', str(args.workers), '--inference-ms', str(args.inference_ms),
+               '--latency-mode', args.latency_mode]
+    for flag, value in (('--pool-size', args.pool_size), ('--max-queue-depth', args.max_queue_depth),
+                        ('--executor-threads', args.executor_threads)):
+        if value is not None:
+            command += [flag, str(value)]
+    process = subprocess.Popen(command, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    try:
+        _wait_for_server(args.url, LOAD_TEST_CONFIG['server_start_timeout'], process)
+    except Exception:
+        process.terminate()
+        raise
+    return process
+
+
+def _print_summary(summary: Dict):
+    latency = summary['latency_seconds']
+    queue_wait = summary['queue_wait_seconds']
+    print(f"requests      {summary['requests']} in {summary['elapsed_seconds']}s, statuses {summary['statuses']}")
+    print(f"throughput    {summary['throughput_rps']} req/s ({summary['upload_mb_per_second']} MB/s uploaded)")
+    if latency:
+        print("latency       " + ' '.join(f"{k}={v:.3f}s" for k, v in latency.items()))
+    if queue_wait:
+        print("queue wait    " + ' '.join(f"{k}={v:.3f}s" for k, v in queue_wait.items()))
+    print(f"rejected      {summary['rejection_rate']:.1%}   errors {summary['error_rate']:.1%}   "
+          f"partial {summary['partial_rate']:.1%}")
+    for error in summary['errors']:
+        print(f"  {error}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--path', default='/analyze-pose', help="Multipart endpoint to drive")
+    parser.add_argument('--exercise', default='squat')
+    parser.add_argument('--video', help="File to upload; a synthetic squat video is generated otherwise")
+    parser.add_argument('--concurrency', type=int, default=LOAD_TEST_CONFIG['concurrency'])
+    parser.add_argument('--duration', type=float, default=LOAD_TEST_CONFIG['duration'])
+    parser.add_argument('--rate', type=float, help="Open-loop requests per second")
+    parser.add_argument('--deadline-ms', type=int, help="Sent as x-deadline-ms")
+    parser.add_argument('--output', help="Also write the summary to this JSON file")
+    server = parser.add_argument_group('stand-in server (with --spawn)')
+    server.add_argument('--spawn', action='store_true', help="Start benchmarks.standin_server for the run")
+    server.add_argument('--workers', type=int, default=1)
+    server.add_argument('--pool-size', type=int)
+    server.add_argument('--max-queue-depth', type=int)
+    server.add_argument('--executor-threads', type=int)
+    server.add_argument('--inference-ms', type=float, default=15.0)
+    server.add_argument('--latency-mode', choices=('sleep', 'spin'), default='sleep')
+    args = parser.parse_args(argv)
+
+    video = args.video or cached_video(BENCHMARK_CONFIG['video_dir'], LOAD_TEST_CONFIG['video'])
+    content_type, body = multipart_body(video)
+    headers = {'x-deadline-ms': str(args.deadline_ms)} if args.deadline_ms else None
+
+    process = spawn_server(args) if args.spawn else None
+    try:
+        generator = LoadGenerator(args.url, args.path, body, content_type, {'exercise_type': args.exercise},
+                                  args.concurrency, args.duration, args.rate, headers)
+        results = generator.run()
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    summary = summarize(results, generator.elapsed, os.path.getsize(video))
+    summary['config'] = {k: v for k, v in vars(args).items() if k != 'output'}
+    _print_summary(summary)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
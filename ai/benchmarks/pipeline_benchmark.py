@@ -0,0 +1,215 @@
+"""
+End-to-end pipeline benchmark on synthetic squat videos.
+
+Runs each video through the same path as /analyze-pose (detector pool,
+`process_video_frames`, movement analysis) and reports throughput per stage,
+per-frame and per-video latency percentiles and peak memory. Results can be
+compared against a baseline file to catch throughput regressions.
+
+Run from the ai/ directory:
+
+    python -m benchmarks.pipeline_benchmark                  # stub backend, quick matrix
+    python -m benchmarks.pipeline_benchmark --backend mediapipe --matrix full
+    python -m benchmarks.pipeline_benchmark --update-baseline
+"""
+from typing import Dict, List, Optional
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import numpy as np
+try:
+    import resource  # type: ignore
+except Exception:  # pragma: no cover
+    resource = None  # type: ignore
+
+from .synthetic_video import VideoSpec, cached_video
+
+# Benchmark configuration
+BENCHMARK_CONFIG = {
+    'repeats': 3,  # Measured runs per video, after one warm-up run
+    'tolerance': 0.3,  # Allowed relative slowdown against the baseline
+    'latency_slack_ms': 0.5,  # Absolute slack on p95 frame latency; sub-ms timings are noisy
+    'baseline_path': os.path.join(os.path.dirname(__file__), 'baseline.json'),
+    'video_dir': os.path.join(tempfile.gettempdir(), 'velox-bench-videos')
+}
+
+MATRICES = {
+    'quick': [
+        VideoSpec(320, 240, 30, 5),
+        VideoSpec(640, 480, 30, 10),
+        VideoSpec(640, 480, 60, 5),
+        VideoSpec(1280, 720, 30, 5)
+    ],
+    'full': [
+        VideoSpec(320, 240, 30, 5),
+        VideoSpec(640, 480, 30, 10),
+        VideoSpec(640, 480, 60, 10),
+        VideoSpec(1280, 720, 30, 10),
+        VideoSpec(1280, 720, 60, 10),
+        VideoSpec(1920, 1080, 30, 10),
+        VideoSpec(640, 480, 30, 60)
+    ]
+}
+
+
+def load_pipeline(backend: str, inference_ms: float = 0.0):
+    """
+    Import the service module with the requested pose backend.
+
+    The stub backend replaces MediaPipe in pose_detector before main builds
+    its detector pool, so every detector the service creates uses it.
+    """
+    if backend == 'stub':
+        from services import pose_detector
+        from .stub_pose import stub_mediapipe
+        pose_detector.mp = stub_mediapipe(inference_ms)
+    import main
+    logging.getLogger().setLevel(logging.WARNING)
+    return main
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {'p50': 0.0, 'p95': 0.0}
+    p50, p95 = np.percentile(values, [50, 95])
+    return {'p50': round(float(p50), 4), 'p95': round(float(p95), 4)}
+
+
+def run_case(main, video_path: str, exercise: Optional[str], repeats: int) -> Dict:
+    """Benchmark one video: one warm-up run, then `repeats` measured runs."""
+    from services import request_accounting, tracing
+    from services.deadline import Deadline
+
+    walls, frame_ms, cpu, peak_rss = [], [], [], 0
+    stage_seconds: Dict[str, float] = {}
+    frames = 0
+    for run in range(repeats + 1):
+        usage, usage_token = request_accounting.start_usage()
+        trace, trace_token = tracing.start_trace(f"bench-{run}", sampled=run > 0)
+        start = time.perf_counter()
+        try:
+            video, _ = main._run_analysis(video_path, exercise, main.VideoProcessingOptions(), Deadline())
+        finally:
+            wall = time.perf_counter() - start
+            tracing.finish_trace(trace, trace_token)
+            request_accounting.end_usage(usage_token)
+        if run == 0:
+            continue
+        summary = usage.to_dict()
+        walls.append(wall)
+        cpu.append(summary['cpu_seconds'])
+        peak_rss = max(peak_rss, summary['peak_rss_delta_bytes'])
+        frames = video.performance.get('total_frames', 0)
+        frame_ms.extend(span['duration_ms'] for span in trace.spans if span['name'] == 'detect')
+        for stage, seconds in summary['stage_seconds'].items():
+            stage_seconds[stage] = stage_seconds.get(stage, 0.0) + seconds
+
+    median_wall = float(np.median(walls))
+    return {
+        'frames': frames,
+        'fps': round(frames / median_wall, 2) if median_wall else 0.0,
+        # Frames of video per second spent in each stage, i.e. the throughput
+        # the pipeline would reach if that stage were its only cost
+        'stage_fps': {stage: round(frames * repeats / seconds, 1)
+                      for stage, seconds in sorted(stage_seconds.items()) if seconds > 0 and stage != 'queue_wait'},
+        'frame_latency_ms': _percentiles(frame_ms),
+        'video_latency_s': _percentiles(walls),
+        'cpu_seconds': round(float(np.median(cpu)), 4),
+        'peak_rss_delta_mb': round(peak_rss / 2**20, 1)
+    }
+
+
+def run_benchmarks(main, specs: List[VideoSpec], exercise: Optional[str] = 'squat',
+                   repeats: int = BENCHMARK_CONFIG['repeats'],
+                   video_dir: str = BENCHMARK_CONFIG['video_dir']) -> Dict[str, Dict]:
+    results = {}
+    for spec in specs:
+        results[spec.name] = run_case(main, cached_video(video_dir, spec), exercise, repeats)
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict],
+            tolerance: float = BENCHMARK_CONFIG['tolerance']) -> List[str]:
+    """Regressions of results against baseline cases, as readable lines."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['fps'] < base['fps'] * (1 - tolerance):
+            regressions.append(f"{name}: {result['fps']:.1f} fps vs baseline {base['fps']:.1f}")
+        base_p95 = base['frame_latency_ms']['p95']
+        if result['frame_latency_ms']['p95'] > base_p95 * (1 + tolerance) + BENCHMARK_CONFIG['latency_slack_ms']:
+            regressions.append(f"{name}: p95 frame latency {result['frame_latency_ms']['p95']:.2f} ms "
+                               f"vs baseline {base_p95:.2f} ms")
+    return regressions
+
+
+def _print_table(results: Dict[str, Dict]):
+    print(f"{'video':<24}{'frames':>7}{'fps':>9}{'p50 ms':>9}{'p95 ms':>9}{'rss MB':>8}  stage fps")
+    for name, r in results.items():
+        stages = ' '.join(f"{stage}={fps:.0f}" for stage, fps in r['stage_fps'].items())
+        print(f"{name:<24}{r['frames']:>7}{r['fps']:>9.1f}{r['frame_latency_ms']['p50']:>9.2f}"
+              f"{r['frame_latency_ms']['p95']:>9.2f}{r['peak_rss_delta_mb']:>8.1f}  {stages}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--backend', choices=('stub', 'mediapipe'), default='stub')
+    parser.add_argument('--matrix', choices=sorted(MATRICES), default='quick')
+    parser.add_argument('--exercise', default='squat', help="Analyzer to run; 'none' skips analysis")
+    parser.add_argument('--repeats', type=int, default=BENCHMARK_CONFIG['repeats'])
+    parser.add_argument('--inference-ms', type=float, default=0.0, help="Simulated inference cost of the stub backend")
+    parser.add_argument('--video-dir', default=BENCHMARK_CONFIG['video_dir'])
+    parser.add_argument('--baseline', default=BENCHMARK_CONFIG['baseline_path'])
+    parser.add_argument('--tolerance', type=float, default=BENCHMARK_CONFIG['tolerance'])
+    parser.add_argument('--update-baseline', action='store_true', help="Write the results as the new baseline")
+    parser.add_argument('--output', help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    pipeline = load_pipeline(args.backend, args.inference_ms)
+    exercise = None if args.exercise == 'none' else args.exercise
+    results = run_benchmarks(pipeline, MATRICES[args.matrix], exercise, args.repeats, args.video_dir)
+    _print_table(results)
+
+    report = {
+        'backend': args.backend,
+        'inference_ms': args.inference_ms,
+        'exercise': exercise,
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1) if resource else None,
+        'cases': results
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against; run with --update-baseline to create one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if (baseline.get('backend'), baseline.get('inference_ms'), baseline.get('exercise')) != (args.backend, args.inference_ms, exercise):
+        print("Baseline was recorded with different backend settings; not comparing")
+        return 0
+    if baseline.get('machine') != report['machine']:
+        print("Warning: baseline was recorded on a different machine; absolute numbers may not compare")
+    regressions = compare(results, baseline.get('cases', {}), args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+Run the real service with a stand-in pose backend.
+
+Everything except the MediaPipe graph is the production code path: upload,
+detector pool and admission, deadline handling, frame pipeline, analysis and
+serialization. Each detector call takes a configurable time instead of
+running a model, so capacity settings can be tried on one Linux box.
+
+Run from the ai/ directory:
+
+    python -m benchmarks.standin_server --workers 2 --pool-size 2 --inference-ms 15 --max-queue-depth 4
+"""
+from typing import List, Optional
+import argparse
+import os
+import sys
+
+import uvicorn
+
+INFERENCE_MS_ENV = 'VELOX_STANDIN_INFERENCE_MS'
+LATENCY_MODE_ENV = 'VELOX_STANDIN_LATENCY_MODE'
+
+
+def create_app():
+    """Service app with the stand-in backend; called once in every worker process."""
+    from services import pose_detector
+    from .stub_pose import stub_mediapipe
+    pose_detector.mp = stub_mediapipe(float(os.environ.get(INFERENCE_MS_ENV, '0')),
+                                      os.environ.get(LATENCY_MODE_ENV, 'sleep'))
+    import main
+    return main.app
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=1, help="Server processes")
+    parser.add_argument('--pool-size', type=int, help="Detectors per process (AI_DETECTOR_POOL_SIZE)")
+    parser.add_argument('--max-queue-depth', type=int, help="Waiting analyses before 503 (AI_MAX_QUEUE_DEPTH)")
+    parser.add_argument('--executor-threads', type=int, help="Blocking-work threads per process (AI_EXECUTOR_THREADS)")
+    parser.add_argument('--inference-ms', type=float, default=15.0, help="Time per detector call")
+    parser.add_argument('--latency-mode', choices=('sleep', 'spin'), default='sleep',
+                        help="sleep releases the GIL like a native model; spin holds it")
+    args = parser.parse_args(argv)
+
+    # Settings are read from the environment by every worker process
+    os.environ[INFERENCE_MS_ENV] = str(args.inference_ms)
+    os.environ[LATENCY_MODE_ENV] = args.latency_mode
+    for name, value in (('AI_DETECTOR_POOL_SIZE', args.pool_size),
+                        ('AI_MAX_QUEUE_DEPTH', args.max_queue_depth),
+                        ('AI_EXECUTOR_THREADS', args.executor_threads)):
+        if value is not None:
+            os.environ[name] = str(value)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    uvicorn.run('benchmarks.standin_server:create_app', factory=True, host=args.host, port=args.port,
+                workers=args.workers, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+import time
+import numpy as np
+
+from .synthetic_video import squat_depth
+
+# MediaPipe landmark indices used by the analyzers
+NOSE, LEFT_SHOULDER, RIGHT_SHOULDER = 0, 11, 12
+LEFT_HIP, RIGHT_HIP, LEFT_KNEE, RIGHT_KNEE, LEFT_ANKLE, RIGHT_ANKLE = 23, 24, 25, 26, 27, 28
+
+
+def squat_landmarks(depth: float, visibility: float = 0.95) -> list:
+    """33 MediaPipe-style landmarks of a side-on squat at the given depth (0-1)."""
+    points = np.tile([0.5, 0.5], (33, 1))
+    points[NOSE] = (0.5, 0.15 + 0.2 * depth)
+    points[[LEFT_SHOULDER, RIGHT_SHOULDER]] = (0.5, 0.25 + 0.2 * depth)
+    points[[LEFT_HIP, RIGHT_HIP]] = (0.5 - 0.05 * depth, 0.5 + 0.2 * depth)
+    points[[LEFT_KNEE, RIGHT_KNEE]] = (0.5 + 0.15 * depth, 0.7 + 0.05 * depth)
+    points[[LEFT_ANKLE, RIGHT_ANKLE]] = (0.5, 0.9)
+    return [SimpleNamespace(x=float(x), y=float(y), z=0.0, visibility=visibility) for x, y in points]
+
+
+class StubPose:
+    """
+    Deterministic stand-in for mp.solutions.pose.Pose.
+
+    Returns the landmarks of a squat advancing one model-rate frame per call,
+    optionally taking `inference_ms` per call to model inference cost: spun
+    on the CPU holding the GIL, or slept, like a native model that releases
+    it. The same video and options always produce the same landmarks, so
+    runs compare pipeline overhead without MediaPipe installed. Each call's
+    (start, end) perf_counter times are kept in `call_spans`.
+    """
+
+    inference_ms = 0.0
+    latency_mode = 'spin'  # 'spin' or 'sleep'
+    fps = 30.0  # Call rate the squat phase is advanced at
+
+    def __init__(self, **kwargs):
+        self.calls = 0
+        self.call_spans = []
+
+    def process(self, image):
+        self.calls += 1
+        started = time.perf_counter()
+        if self.inference_ms and self.latency_mode == 'sleep':
+            time.sleep(self.inference_ms / 1000)
+        elif self.inference_ms:
+            end = time.perf_counter() + self.inference_ms / 1000
+            while time.perf_counter() < end:
+                pass
+        landmarks = squat_landmarks(squat_depth(self.calls / self.fps))
+        self.call_spans.append((started, time.perf_counter()))
+        return SimpleNamespace(pose_landmarks=SimpleNamespace(landmark=landmarks))
+
+    def close(self):
+        pass
+
+
+def stub_mediapipe(inference_ms: float = 0.0, latency_mode: str = 'spin'):
+    """Module object to put in place of `mediapipe` for PoseDetector."""
+    if latency_mode not in ('spin', 'sleep'):
+        raise ValueError("latency_mode must be 'spin' or 'sleep'")
+    pose_class = type('StubPose', (StubPose,), {'inference_ms': inference_ms, 'latency_mode': latency_mode})
+    return SimpleNamespace(solutions=SimpleNamespace(pose=SimpleNamespace(Pose=pose_class)))
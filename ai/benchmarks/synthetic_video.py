@@ -0,0 +1,78 @@
+from typing import NamedTuple
+import os
+import numpy as np
+import cv2
+
+
+class VideoSpec(NamedTuple):
+    width: int
+    height: int
+    fps: int
+    duration: float  # seconds
+
+    @property
+    def name(self) -> str:
+        return f"{self.width}x{self.height}@{self.fps}fps-{self.duration:g}s"
+
+    @property
+    def frame_count(self) -> int:
+        return int(round(self.fps * self.duration))
+
+
+REP_PERIOD = 2.0  # Seconds per squat rep in generated videos
+
+
+def squat_depth(t: float) -> float:
+    """Squat depth (0 standing, 1 bottom) at time t of a generated video."""
+    return 0.5 - 0.5 * np.cos(2 * np.pi * t / REP_PERIOD)
+
+
+def _background(width: int, height: int) -> np.ndarray:
+    # Textured mid-grey backdrop, so frames pass the quality gate the way
+    # real gym footage does (a flat black frame would be gated as underexposed)
+    rng = np.random.default_rng(0)
+    noise = rng.integers(-40, 40, (height // 8 + 1, width // 8 + 1, 1), dtype=np.int16)
+    tiles = np.repeat(np.repeat(noise, 8, axis=0), 8, axis=1)[:height, :width]
+    return np.clip(110 + tiles, 0, 255).astype(np.uint8).repeat(3, axis=2)
+
+
+def generate_squat_video(path: str, spec: VideoSpec) -> str:
+    """
+    Write a stick-figure squat video (same drawing as ai/test_pose_analysis.py).
+
+    Output is deterministic for a given spec.
+    """
+    width, height = spec.width, spec.height
+    scale = height / 480
+    background = _background(width, height)
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), spec.fps, (width, height))
+    if not out.isOpened():
+        raise RuntimeError(f"Cannot write video {path}")
+    try:
+        for frame in range(spec.frame_count):
+            img = background.copy()
+            depth = squat_depth(frame / spec.fps)
+            head_pos = (width // 2, int(height * 0.2 + depth * 100 * scale))
+            hip_pos = (width // 2, int(height * 0.4 + depth * 100 * scale))
+            knee_pos = (int(width // 2 + depth * 60 * scale), int(height * 0.6 + depth * 50 * scale))
+            ankle_pos = (width // 2, int(height * 0.8))
+            thickness = max(2, int(4 * scale))
+            cv2.line(img, head_pos, hip_pos, (255, 255, 255), thickness)
+            cv2.line(img, hip_pos, knee_pos, (255, 255, 255), thickness)
+            cv2.line(img, knee_pos, ankle_pos, (255, 255, 255), thickness)
+            for pos in (head_pos, hip_pos, knee_pos, ankle_pos):
+                cv2.circle(img, pos, max(5, int(8 * scale)), (0, 255, 0), -1)
+            out.write(img)
+    finally:
+        out.release()
+    return path
+
+
+def cached_video(directory: str, spec: VideoSpec) -> str:
+    """Path of the video for spec in directory, generating it on first use."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"squat-{spec.name}.mp4")
+    if not os.path.exists(path):
+        generate_squat_video(path + '.tmp.mp4', spec)
+        os.replace(path + '.tmp.mp4', path)
+    return path
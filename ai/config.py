@@ -1,4 +1,8 @@
-from pydantic import BaseSettings, AnyHttpUrl, validator
+try:
+    # pydantic 2 (see requirements.txt) keeps BaseSettings in its v1 namespace
+    from pydantic.v1 import BaseSettings, AnyHttpUrl, validator
+except ImportError:
+    from pydantic import BaseSettings, AnyHttpUrl, validator
 from typing import List, Optional
 import os
 
@@ -10,8 +14,37 @@ class Settings(BaseSettings):
     ai_allow_methods: List[str] = ["GET", "POST", "OPTIONS"]
     ai_allow_headers: List[str] = ["*"]
     port: int = int(os.getenv("PORT", "8000"))
+    # Upper bound on a single analysis; clients may ask for less via x-deadline-ms
+    ai_request_timeout_seconds: float = 300.0
+    # Pose detectors shared by concurrent analyses (one MediaPipe graph each)
+    ai_detector_pool_size: int = 1
+    # Analyses allowed to wait for a detector; more are rejected with 503.
+    # Unset lets requests queue until their deadline
+    ai_max_queue_depth: Optional[int] = None
+    # Threads running blocking request work (anyio default: 40)
+    ai_executor_threads: Optional[int] = None
+    # Shared directory (ideally tmpfs) where each worker publishes its metrics so
+    # the endpoints report host-wide numbers; clear it when the service starts
+    ai_metrics_dir: Optional[str] = None
+    # Request tracing: Server-Timing on every response, full span trees for a sample
+    ai_tracing_enabled: bool = True
+    ai_trace_sample_rate: float = 0.01
+    ai_trace_export_dir: Optional[str] = None
+    # On-demand profiling: requests sending this token in x-profile-token are
+    # profiled; unset disables the feature. The same token is required to force
+    # a sampled trace (x-trace-sample: 1) and to read /traces
+    ai_profiler_token: Optional[str] = None
+    ai_profile_dir: Optional[str] = None
+    # Batch analysis (/analyze-batch): clips per request, upper bound on the
+    # whole batch, and detectors one batch may hold (unset: half the pool)
+    ai_batch_max_clips: int = 30
+    ai_batch_timeout_seconds: float = 1800.0
+    ai_batch_max_parallel: Optional[int] = None
+    # Storage hosts stored-upload URLs may point at; empty disables URL references
+    ai_batch_url_hosts: List[str] = []
+    ai_batch_max_download_mb: float = 500.0
 
-    @validator("ai_allowed_origins", pre=True)
+    @validator("ai_allowed_origins", "ai_batch_url_hosts", pre=True)
     def split_origins(cls, v):
         if v is None or v == "":
             return []
@@ -23,6 +56,13 @@ class Settings(BaseSettings):
         env_prefix = ""
         case_sensitive = False
 
+        @classmethod
+        def parse_env_var(cls, field_name: str, raw_val: str):
+            # Host lists are comma-separated in the environment, not JSON
+            if field_name == "ai_batch_url_hosts":
+                return raw_val
+            return cls.json_loads(raw_val)
+
 
 def get_settings() -> Settings:
     try:
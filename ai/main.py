@@ -1,9 +1,9 @@
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Request
+from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 import uvicorn
-from datetime import datetime
+from datetime import datetime, timezone
 import os
 from dotenv import load_dotenv
 import uuid
@@ -11,14 +11,41 @@ import tempfile
 import shutil
 import cv2
 import numpy as np
-from collections import defaultdict
+from collections import defaultdict, Counter
+from dataclasses import dataclass, field
 import logging
 import time
-from fastapi.responses import JSONResponse
+import asyncio
+import anyio
+import hmac
+import json
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from fastapi.exception_handlers import http_exception_handler
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 
-from services.pose_detector import PoseDetector
+from services.pose_detector import PoseDetector, DetectionStatus
+from services.landmark_buffer import LANDMARK_COUNT, LandmarkBuffer
+from services.calibration import Calibration, CalibrationCache, CalibrationError, bar_path_metrics
+from services.rep_segmentation import RepBounds
+from services.rep_table import rep_analytics
 from services.movement_analyzer import MovementAnalyzer, ExerciseType
+from services.video_io import iter_sampled_frames, estimate_sampled_frames
+from services.frame_quality import FrameQualityGate
+from services.inference_budget import InferenceBudget
+from services.deadline import Deadline, CLIENT_DISCONNECTED
+from services.metrics import ExerciseStats, FixedHistogram, PipelineMetrics, render_prometheus
+from services.detector_pool import Admission, DetectorPool
+from services.batch_scheduler import (BatchClip, BatchQueue, batch_parallelism, fetch_reference,
+                                      save_upload, upload_path)
+from services.shared_metrics import WorkerMetricsFile, read_fleet, exercise_slot
+from services import tracing
+from services.tracing import traced, add_timing
+from services.profiler import SamplingProfiler
+from services import request_accounting
+from services.structured_logging import configure_logging
+from services.request_accounting import record_stage, track_cpu
 from config import get_settings
 
 # Load environment variables and validated settings (fail fast on error)
@@ -44,53 +71,43 @@ app.add_middleware(
     allow_headers=settings.ai_allow_headers,
 )
 
-# Configure structured logging
-logging.basicConfig(level=logging.INFO, format='%(message)s')
+# Configure structured logging: one JSON writer thread, rate-limited warnings
+configure_logging(logging.INFO)
 logger = logging.getLogger("velox-ai")
 
-PII_KEYS = {"email", "e_mail", "password", "token", "authorization", "cookie", "ssn", "phone", "phoneNumber", "userEmail"}
-
-def mask_value(value):
-    if value is None:
-        return None
-    if isinstance(value, str):
-        if len(value) <= 4:
-            return "***"
-        return value[:2] + "***" + value[-2:]
-    if isinstance(value, (int, float, bool)):
-        return value
-    if isinstance(value, list):
-        return [mask_value(v) for v in value]
-    if isinstance(value, dict):
-        return {k: (mask_value(v) if (k.lower() in PII_KEYS or 'email' in k.lower() or 'token' in k.lower()) else mask_value(v) if isinstance(v, (dict, list)) else v) for k, v in value.items()}
-    return "***"
+_LOG_LEVELS = {"debug": logging.DEBUG, "info": logging.INFO, "warning": logging.WARNING, "error": logging.ERROR}
 
 def log_json(level: str, message: str, **ctx):
-    try:
-        import json
-        line = json.dumps({
-            "level": level,
-            "time": datetime.utcnow().isoformat(),
-            "message": message,
-            **mask_value(ctx),
-        })
-    except Exception:
-        line = f"{level.upper()} {message}"
-    getattr(logger, level if level in ("info", "warning", "error", "debug") else "info")(line)
+    """Log an event with context; masking and serialization happen on the writer thread."""
+    logger.log(_LOG_LEVELS.get(level, logging.INFO), message, extra=ctx)
+
+# Request tracing; operators (with the profiler token) may force a sampled trace with x-trace-sample: 1
+tracing.TRACING_CONFIG['sample_rate'] = settings.ai_trace_sample_rate
+tracing.TRACING_CONFIG['export_dir'] = settings.ai_trace_export_dir
+TRACE_SAMPLE_HEADER = "x-trace-sample"
 
 @app.middleware("http")
 async def add_request_id_and_logging(request: Request, call_next):
     start = time.perf_counter()
     request_id = request.headers.get("x-request-id") or request.headers.get("x-trace-id") or str(uuid.uuid4())
+    trace = token = None
+    if settings.ai_tracing_enabled:
+        forced = request.headers.get(TRACE_SAMPLE_HEADER) == "1" and _operator_token_valid(request)
+        trace, token = tracing.start_trace(request_id, sampled=True if forced else None)
     try:
         response = await call_next(request)
     except Exception as exc:
         duration = int((time.perf_counter() - start) * 1000)
         log_json("error", "unhandled_server_error", requestId=request_id, path=str(request.url.path), method=request.method, durationMs=duration, error=str(exc))
         raise
+    finally:
+        if trace is not None:
+            tracing.finish_trace(trace, token)
     duration = int((time.perf_counter() - start) * 1000)
     response.headers["x-request-id"] = request_id
     response.headers["x-trace-id"] = request_id
+    if trace is not None and trace.totals:
+        response.headers["server-timing"] = trace.server_timing()
     try:
         client_ip = request.client.host if request.client else None
     except Exception:
@@ -105,165 +122,691 @@ async def global_exception_handler(request: Request, exc: Exception):
     return JSONResponse(status_code=500, content={"detail": "internal_error", "request_id": request_id})
 
 # Initialize services with optimized settings
-pose_detector = PoseDetector(
-    model_complexity=1,
-    min_detection_confidence=0.7,
-    min_tracking_confidence=0.7,
-    enable_frame_skipping=True
-)
+def create_pose_detector() -> PoseDetector:
+    return PoseDetector(
+        model_complexity=1,
+        min_detection_confidence=0.7,
+        min_tracking_confidence=0.7,
+        enable_frame_skipping=True
+    )
+
+# Detectors keep per-video tracking state; each analysis checks one out
+detector_pool = DetectorPool(create_pose_detector, size=settings.ai_detector_pool_size,
+                             max_waiting=settings.ai_max_queue_depth)
 movement_analyzer = MovementAnalyzer()
+calibration_cache = CalibrationCache()
+
+DEADLINE_HEADER = "x-deadline-ms"
+# Sending the configured profiler token in this header profiles the request
+PROFILE_TOKEN_HEADER = "x-profile-token"
+PROFILE_DIR = settings.ai_profile_dir or os.path.join(tempfile.gettempdir(), "velox-profiles")
+DISCONNECT_POLL_INTERVAL = 0.5  # seconds
 
 # Performance tracking
-performance_stats = defaultdict(lambda: {
-    'total_videos': 0,
-    'total_frames': 0,
-    'processing_times': [],
-    'confidence_scores': [],
-    'success_rate': 0,
-    'failure_rate': 0
-})
+performance_stats = defaultdict(ExerciseStats)  # Keyed by exercise_slot()
+pipeline_metrics = PipelineMetrics()
+# With several workers on a host each publishes here and endpoints sum all files.
+# The file is opened by each worker's first publish, so creating it before a fork is safe.
+metrics_file = WorkerMetricsFile(settings.ai_metrics_dir) if settings.ai_metrics_dir else None
+
+@app.on_event("startup")
+async def configure_executor():
+    # Blocking analysis work runs on anyio's worker threads
+    if settings.ai_executor_threads:
+        anyio.to_thread.current_default_thread_limiter().total_tokens = settings.ai_executor_threads
+
+@app.get("/health")
+async def health_check():
+    return {"status": "healthy", "timestamp": datetime.now(timezone.utc), "detector_pool": detector_pool.stats()}
+
+# Detection statuses counted as failed frames in /metrics
+FAILED_STATUSES = {DetectionStatus.NO_POSE, DetectionStatus.LOW_CONFIDENCE, DetectionStatus.INVALID_FRAME, DetectionStatus.ERROR}
 
 class VideoProcessingOptions(BaseModel):
     target_fps: Optional[int] = 30
+    # Deprecated: frames are resized once, directly to the detector input size
     target_resolution: Optional[tuple] = (720, 480)
     enable_frame_skipping: Optional[bool] = True
     min_confidence: Optional[float] = 0.7
+    enable_quality_gate: Optional[bool] = True
+    deadline_seconds: Optional[float] = None  # Overridden by the x-deadline-ms header
 
-async def process_video_frames(video_path: str, options: VideoProcessingOptions) -> tuple:
-    """Process video frames with optimized settings."""
-    cap = cv2.VideoCapture(video_path)
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    original_fps = int(cap.get(cv2.CAP_PROP_FPS))
-    
-    # Calculate frame skip rate
-    skip_rate = max(1, original_fps // options.target_fps) if options.enable_frame_skipping else 1
-    
-    frames = []
-    landmarks = []
-    frame_number = 0
-    
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
+@dataclass
+class ProcessedVideo:
+    landmarks: np.ndarray = field(default_factory=lambda: np.empty((0, LANDMARK_COUNT, 4), np.float32))  # (T, 33, 4)
+    timestamps: List[float] = field(default_factory=list)  # seconds
+    frame_quality: Optional[Dict] = None
+    detection: Dict = field(default_factory=dict)
+    confidence: FixedHistogram = field(default_factory=FixedHistogram.confidence)  # Accepted frames
+    performance: Dict = field(default_factory=dict)  # Detection metrics of this video only
+    partial_reason: Optional[str] = None  # Set when the deadline or inference budget stopped processing early
+    processed_until: Optional[float] = None  # Timestamp of the last frame looked at
+    frame_size: Optional[tuple] = None  # (width, height) of the decoded frames
+    metric_results: Optional[Dict] = None  # Bar speed and path in m/s and cm, when calibrated
+    rep_analytics: Optional[Dict] = None  # Per-rep columns and set fatigue summary
+
+def publish_metrics():
+    """Publish this worker's aggregates for host-wide readers."""
+    if metrics_file is not None:
+        metrics_file.publish(performance_stats, pipeline_metrics, detector_pool.stats())
+
+def current_metrics() -> tuple:
+    """
+    Aggregates for the metrics endpoints: summed over every worker on the
+    host when a shared metrics dir is configured, else this process's own.
+
+    Returns:
+        Tuple of (exercise stats by slot, pipeline metrics, pool stats)
+    """
+    if metrics_file is None:
+        return performance_stats, pipeline_metrics, detector_pool.stats()
+    publish_metrics()
+    fleet = read_fleet(settings.ai_metrics_dir)
+    return fleet.exercise_stats, fleet.pipeline, fleet.pool
+
+def observe_stage(stage: str, seconds: float):
+    """Record a stage duration in the metrics, the request's trace and its usage."""
+    pipeline_metrics.observe(stage, seconds)
+    add_timing(stage, seconds)
+    record_stage(stage, seconds)
+
+@traced()
+def process_video_frames(
+    video_path: str,
+    options: VideoProcessingOptions,
+    detector: PoseDetector,
+    deadline: Optional[Deadline] = None
+) -> ProcessedVideo:
+    """
+    Process video frames with optimized settings.
+
+    Frames are sampled on the presentation-timestamp grid so decimation and
+    variable-frame-rate sources keep correct timing. Frames failing the
+    quality gate are recorded as gaps and never inferred. Inference runs
+    within a per-video budget; once it is spent, or the deadline passes, the
+    rest of the video is not decoded and the frames so far are returned.
+
+    Decoded frames are not kept: each is dropped once detected, so memory
+    per video is bounded by the landmark rows and counters alone.
+    """
+    deadline = deadline or Deadline()
+    target_fps = options.target_fps if options.enable_frame_skipping else None
+    gate = FrameQualityGate() if options.enable_quality_gate else None
+    budget = InferenceBudget(deadline=deadline)
+    statuses = Counter()
+    stage_times = defaultdict(list)
+    inferred = 0
+    result = ProcessedVideo()
+    landmarks = LandmarkBuffer(estimate_sampled_frames(video_path, target_fps))
+    detector.reset_tracking()
+    usage = request_accounting.current_usage()
+    rss_interval = request_accounting.REQUEST_ACCOUNTING_CONFIG['rss_sample_interval']
+
+    decode_start = time.perf_counter()
+    for frame_number, timestamp, frame in iter_sampled_frames(video_path, target_fps):
+        stage_times['decode'].append(time.perf_counter() - decode_start)
+        if usage is not None and len(stage_times['decode']) % rss_interval == 0:
+            usage.sample_rss()
+        if deadline.expired:
+            result.partial_reason = deadline.reason
             break
-            
-        # Skip frames based on target FPS
-        if frame_number % skip_rate != 0:
-            frame_number += 1
-            continue
-            
-        # Resize frame if needed
-        if options.target_resolution:
-            frame = cv2.resize(frame, options.target_resolution)
-            
-        # Detect pose
-        pose_landmarks, confidence = pose_detector.detect_pose(frame, frame_number)
-        
-        if pose_landmarks and confidence >= options.min_confidence:
-            frames.append(frame)
-            landmarks.append(pose_landmarks)
-            
-        frame_number += 1
-        
-    cap.release()
-    return frames, landmarks
+        result.processed_until = timestamp
+        if result.frame_size is None:
+            result.frame_size = (frame.shape[1], frame.shape[0])
+
+        # Detect pose (the detector resizes straight to its input size)
+        detection = detector.detect(frame, frame_number, gate=gate, timestamp=timestamp, budget=budget)
+        statuses[detection.status] += 1
+        stage_times['preprocess'].append(detection.preprocess_time)
+        if detection.attempts:
+            inferred += 1
+            stage_times['inference'].append(detection.inference_time)
+        if detection.attempts > 1:
+            stage_times['fallback'].append(detection.fallback_time)
+
+        if detection.points is not None and detection.confidence >= options.min_confidence:
+            normalize_start = time.perf_counter()
+            landmarks.append(detection.points)
+            result.timestamps.append(timestamp)
+            result.confidence.add(detection.confidence)
+            stage_times['normalization'].append(time.perf_counter() - normalize_start)
+
+        if budget.exhausted and not deadline.expired:
+            logger.warning("Inference budget exhausted after frame %d; stopping early", frame_number)
+            result.partial_reason = "inference_budget_exhausted"
+            break
+        decode_start = time.perf_counter()
+
+    # One metrics update per video rather than per frame; inference and
+    # fallback reach the trace through the detector's own spans
+    for stage, seconds in stage_times.items():
+        pipeline_metrics.observe_many(stage, seconds)
+        record_stage(stage, sum(seconds))
+        if stage not in ('inference', 'fallback'):
+            add_timing(stage, sum(seconds))
+    frame_counts = {
+        'decoded': len(stage_times['decode']),
+        'gated': statuses[DetectionStatus.GATED],
+        'skipped': statuses[DetectionStatus.SKIPPED],
+        'inferred': inferred,
+        'failed': sum(statuses[status] for status in FAILED_STATUSES)
+    }
+    pipeline_metrics.count_frames(frame_counts)
+    if usage is not None:
+        usage.frames.update(frame_counts)
+        usage.inference_attempts += budget.inferences
+        usage.retries += budget.fallback_attempts
+
+    decoded = frame_counts['decoded']
+    result.performance = {
+        'avg_processing_time': budget.inference_seconds * 1000 / budget.inferences if budget.inferences else 0,  # ms per inference
+        'avg_confidence': result.confidence.mean,
+        'frame_processing_rate': statuses[DetectionStatus.OK] / decoded if decoded else 0,
+        'failure_rate': frame_counts['failed'] / decoded if decoded else 0,
+        'total_frames': decoded,
+        'processed_frames': statuses[DetectionStatus.OK],
+        'skipped_frames': frame_counts['skipped'],
+        'gated_frames': frame_counts['gated'],
+        'failures': frame_counts['failed']
+    }
+
+    result.landmarks = landmarks.array
+    result.frame_quality = gate.summary() if gate else None
+    result.detection = {'statuses': {status.value: count for status, count in statuses.items()}, 'budget': budget.summary()}
+    return result
+
+def _request_deadline(request: Request, options: VideoProcessingOptions, limit: Optional[float] = None) -> Deadline:
+    """Deadline from the x-deadline-ms header or options, capped by settings (or `limit`)."""
+    timeout = limit or settings.ai_request_timeout_seconds
+    header = request.headers.get(DEADLINE_HEADER)
+    requested = options.deadline_seconds
+    if header:
+        try:
+            requested = float(header) / 1000.0
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid {DEADLINE_HEADER} header")
+    if requested is not None and requested > 0:
+        timeout = min(timeout, requested)
+    return Deadline(timeout)
+
+async def _cancel_on_disconnect(request: Request, deadline: Deadline):
+    """Cancel the deadline as soon as the client goes away."""
+    while not deadline.expired:
+        if await request.is_disconnected():
+            deadline.cancel(CLIENT_DISCONNECTED)
+            return
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+def _operator_token_valid(request: Request) -> bool:
+    """True if the request carries the configured profiler token."""
+    token = request.headers.get(PROFILE_TOKEN_HEADER)
+    return bool(token and settings.ai_profiler_token and hmac.compare_digest(token, settings.ai_profiler_token))
+
+def _profiling_requested(request: Request) -> bool:
+    """True if the request carries a valid profiler token; 403 for a wrong one."""
+    if request.headers.get(PROFILE_TOKEN_HEADER) is None:
+        return False
+    if not _operator_token_valid(request):
+        raise HTTPException(status_code=403, detail="invalid_profile_token")
+    return True
+
+def _profile_path(analysis_id: str) -> str:
+    # Only ids we generated (UUIDs) ever reach the filesystem
+    return os.path.join(PROFILE_DIR, f"{uuid.UUID(analysis_id)}.collapsed")
+
+def _run_profiled(profile_path: str, func, *args) -> tuple:
+    """
+    Run func on this worker thread under the sampling profiler.
+
+    Returns:
+        Tuple of (func result, profile summary or None if the profiler was busy)
+    """
+    profiler = SamplingProfiler()
+    if not profiler.start():
+        return func(*args), None
+    try:
+        result = func(*args)
+    finally:
+        profiler.stop()
+        profiler.write(profile_path)
+    return result, profiler.summary()
+
+def _analyze_landmarks(video: ProcessedVideo, exercise_type: Optional[str], deadline: Deadline) -> Optional[Dict]:
+    """
+    Analyze movement if exercise type provided; a deadline still gets an
+    analysis of the frames processed so far, a gone client does not.
+    """
+    if not exercise_type or not len(video.landmarks) or deadline.reason == CLIENT_DISCONNECTED:
+        return None
+    analysis_start = time.perf_counter()
+    analysis_results = movement_analyzer.analyze_movement(video.landmarks, exercise_type, timestamps=video.timestamps)
+    observe_stage('analysis', time.perf_counter() - analysis_start)
+    return analysis_results
+
+def _session_calibration(calibration: Optional[str], session_id: Optional[str],
+                         device_id: Optional[str]) -> Optional[Calibration]:
+    """
+    The request's calibration form field (JSON; kept for its session) or the
+    session's cached one; 400 if malformed.
+    """
+    try:
+        values = json.loads(calibration) if calibration else None
+        return calibration_cache.resolve(device_id, session_id, values)
+    except (ValueError, CalibrationError) as e:
+        raise HTTPException(status_code=400, detail=f"invalid_calibration: {e}")
+
+def _metric_results(video: ProcessedVideo, calibration: Optional[Calibration]) -> Optional[Dict]:
+    """Bar speed and path in metric units, for calibrated sessions only."""
+    if calibration is None or video.frame_size is None or not len(video.landmarks):
+        return None
+    return bar_path_metrics(video.landmarks, video.timestamps, calibration, video.frame_size)
+
+def _rep_analytics(video: ProcessedVideo, exercise_type: Optional[str], calibration: Optional[Calibration],
+                   analysis_results: Optional[tuple] = None) -> Optional[Dict]:
+    """Rep table and set velocity-loss summary, over the reps the movement analysis found."""
+    if not exercise_type or not len(video.landmarks):
+        return None
+    metrics = analysis_results[0] if analysis_results else None
+    bounds = RepBounds.from_rows(metrics.rep_boundaries) if metrics is not None and not metrics.error_message else None
+    result = rep_analytics(video.landmarks, video.timestamps, exercise_type, calibration, video.frame_size, bounds)
+    if result is None:
+        return None
+    table, sets = result
+    return {"reps": table.to_dict(), "sets": sets.to_dict()}
+
+def _run_analysis(video_path: str, exercise_type: Optional[str], options: VideoProcessingOptions, deadline: Deadline,
+                  calibration: Optional[Calibration] = None, admission: Optional[Admission] = None) -> tuple:
+    """Blocking part of /analyze-pose, run off the event loop."""
+    with track_cpu():
+        queue_start = time.perf_counter()
+        with detector_pool.acquire(timeout=deadline.remaining(), admission=admission) as detector:
+            record_stage('queue_wait', time.perf_counter() - queue_start)
+            if detector is None:
+                return ProcessedVideo(partial_reason=deadline.reason), None
+            publish_metrics()
+            video = process_video_frames(video_path, options, detector, deadline)
+        video.metric_results = _metric_results(video, calibration)
+        analysis_results = _analyze_landmarks(video, exercise_type, deadline)
+        video.rep_analytics = _rep_analytics(video, exercise_type, calibration, analysis_results)
+        return video, analysis_results
+
+def _analysis_payload(analysis_id: str, exercise_type: Optional[str], video: ProcessedVideo,
+                      analysis_results: Optional[Dict], processing_time: float, usage: Dict) -> Dict:
+    """Response body of one analyzed video."""
+    return {
+        "analysis_id": analysis_id,
+        "timestamp": datetime.now().isoformat(),
+        "exercise_type": exercise_type,
+        "frames_processed": len(video.landmarks),
+        "processing_time_seconds": processing_time,
+        "partial": video.partial_reason is not None,
+        "partial_reason": video.partial_reason,
+        "processed_until_seconds": video.processed_until,
+        "performance_metrics": video.performance,
+        "usage": usage,
+        "frame_quality": video.frame_quality,
+        "detection": video.detection,
+        "analysis_results": analysis_results,
+        "metric_results": video.metric_results,
+        "rep_analytics": video.rep_analytics
+    }
 
 @app.post("/analyze-pose")
 async def analyze_pose(
+    request: Request,
     file: UploadFile = File(...),
     exercise_type: str = None,
+    session_id: str = None,
+    device_id: str = None,
+    # {'pixelsPerMeter', 'homography', 'tiltDeg'}, {'pixelsPerCm'} or {'sweep': [[x, y], ...]} as JSON;
+    # kept for the session when a session_id is given
+    calibration: Optional[str] = Form(default=None),
     options: VideoProcessingOptions = VideoProcessingOptions()
 ):
+    deadline = _request_deadline(request, options)
+    session_calibration = _session_calibration(calibration, session_id, device_id)
+    profiling = _profiling_requested(request)
+    admission = detector_pool.admit()
+    if admission is None:
+        log_json("warning", "analysis_rejected", reason="queue_full", queueDepth=detector_pool.queue_depth)
+        raise HTTPException(status_code=503, detail="overloaded", headers={"Retry-After": "1"})
+    analysis_id = str(uuid.uuid4())
+    usage, usage_token = request_accounting.start_usage()
+    temp_dir = tempfile.mkdtemp()
+    watcher = asyncio.create_task(_cancel_on_disconnect(request, deadline))
     try:
         # Save uploaded file temporarily
-        temp_dir = tempfile.mkdtemp()
         temp_path = os.path.join(temp_dir, file.filename)
         
-        with open(temp_path, "wb") as buffer:
+        upload_start = time.perf_counter()
+        with track_cpu(), open(temp_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
+            usage.bytes_read = buffer.tell()
+        observe_stage('upload', time.perf_counter() - upload_start)
             
-        # Process video
+        # Process video off the event loop so disconnects are noticed
         start_time = datetime.now()
-        frames, landmarks = await process_video_frames(temp_path, options)
+        profile = None
+        if profiling:
+            (video, analysis_results), profile = await run_in_threadpool(
+                _run_profiled, _profile_path(analysis_id), _run_analysis, temp_path, exercise_type, options, deadline,
+                session_calibration, admission)
+            if profile is not None:
+                profile["url"] = f"/profiles/{analysis_id}"
+        else:
+            video, analysis_results = await run_in_threadpool(_run_analysis, temp_path, exercise_type, options, deadline,
+                                                              session_calibration, admission)
         processing_time = (datetime.now() - start_time).total_seconds()
         
-        # Update performance stats
-        performance_stats[exercise_type]['total_videos'] += 1
-        performance_stats[exercise_type]['total_frames'] += len(frames)
-        performance_stats[exercise_type]['processing_times'].append(processing_time)
-        
-        metrics = pose_detector.get_performance_metrics()
-        performance_stats[exercise_type]['confidence_scores'].extend(metrics.get('confidence_scores', []))
+        if video.partial_reason:
+            log_json("warning", "analysis_stopped_early", reason=video.partial_reason, exerciseType=exercise_type,
+                     processedUntil=video.processed_until, framesProcessed=len(video.landmarks))
         
-        # Analyze movement if exercise type provided
-        analysis_results = None
-        if exercise_type and landmarks:
-            analysis_results = movement_analyzer.analyze_movement(landmarks, exercise_type)
-            
-        # Cleanup
-        shutil.rmtree(temp_dir)
+        # Update performance stats
+        performance_stats[exercise_slot(exercise_type)].record_video(processing_time, len(video.landmarks), video.confidence)
         
-        return {
-            "analysis_id": str(uuid.uuid4()),
-            "timestamp": datetime.now().isoformat(),
-            "exercise_type": exercise_type,
-            "frames_processed": len(frames),
-            "processing_time_seconds": processing_time,
-            "performance_metrics": metrics,
-            "analysis_results": analysis_results
-        }
+        serialize_start = time.perf_counter()
+        usage_summary = usage.to_dict()
+        with track_cpu():
+            response = JSONResponse(jsonable_encoder({
+                **_analysis_payload(analysis_id, exercise_type, video, analysis_results, processing_time, usage_summary),
+                "profile": profile
+            }))
+        observe_stage('serialization', time.perf_counter() - serialize_start)
+        log_json("info", "analysis_usage", analysisId=analysis_id, exerciseType=exercise_type, **usage.to_dict())
+        return response
         
     except Exception as e:
         if exercise_type:
-            performance_stats[exercise_type]['failure_rate'] += 1
+            performance_stats[exercise_slot(exercise_type)].record_failure()
         log_json("error", "analyze_pose_error", error=str(e), exerciseType=exercise_type)
         raise HTTPException(status_code=500, detail="internal_error")
+    finally:
+        admission.release()
+        watcher.cancel()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        request_accounting.end_usage(usage_token)
+        publish_metrics()
+
+def _analyze_batch_clip(clip: BatchClip, detector: PoseDetector, exercise_type: Optional[str],
+                        options: VideoProcessingOptions, deadline: Deadline, queue_wait: float,
+                        calibration: Optional[Calibration] = None) -> Dict:
+    """Analyze one clip of a batch on a detector the worker already holds."""
+    usage, usage_token = request_accounting.start_usage()
+    analysis_id = str(uuid.uuid4())
+    line = {"type": "clip", "index": clip.index, "source": clip.source}
+    try:
+        record_stage('queue_wait', queue_wait)
+        usage.bytes_read = os.path.getsize(clip.path)
+        start_time = time.perf_counter()
+        with track_cpu():
+            video = process_video_frames(clip.path, options, detector, deadline)
+            video.metric_results = _metric_results(video, calibration)
+            analysis_results = _analyze_landmarks(video, exercise_type, deadline)
+            video.rep_analytics = _rep_analytics(video, exercise_type, calibration, analysis_results)
+        processing_time = time.perf_counter() - start_time
+        performance_stats[exercise_slot(exercise_type)].record_video(processing_time, len(video.landmarks), video.confidence)
+        with track_cpu():
+            line.update(jsonable_encoder(_analysis_payload(
+                analysis_id, exercise_type, video, analysis_results, processing_time, usage.to_dict())))
+        line["status"] = "partial" if video.partial_reason else "ok"
+        log_json("info", "analysis_usage", analysisId=analysis_id, exerciseType=exercise_type, batchIndex=clip.index,
+                 **usage.to_dict())
+    except Exception as e:
+        if exercise_type:
+            performance_stats[exercise_slot(exercise_type)].record_failure()
+        log_json("error", "analyze_batch_clip_error", error=str(e), exerciseType=exercise_type, batchIndex=clip.index)
+        line.update(status="error", error="internal_error")
+    finally:
+        request_accounting.end_usage(usage_token)
+    return line
+
+def _run_batch_worker(clips: BatchQueue, exercise_type: Optional[str], options: VideoProcessingOptions,
+                      deadline: Deadline, emit, calibration: Optional[Calibration] = None,
+                      admission: Optional[Admission] = None) -> None:
+    """
+    Blocking part of /analyze-batch: hold one detector and analyze the
+    cheapest remaining clip until none are left or the deadline passes.
+    """
+    queue_start = time.perf_counter()
+    with detector_pool.acquire(timeout=deadline.remaining(), admission=admission) as detector:
+        queue_wait = time.perf_counter() - queue_start
+        if detector is None:
+            return
+        publish_metrics()
+        while not deadline.expired:
+            clip = clips.next()
+            if clip is None:
+                return
+            emit(_analyze_batch_clip(clip, detector, exercise_type, options, deadline, queue_wait, calibration))
+            queue_wait = 0.0
+
+def _receive_reference(clip: BatchClip, temp_dir: str) -> BatchClip:
+    """Fetch a stored-upload URL into temp_dir and estimate its cost."""
+    path = upload_path(temp_dir, clip.index, None)
+    try:
+        fetch_reference(clip.source, path, settings.ai_batch_url_hosts, int(settings.ai_batch_max_download_mb * 2**20))
+        clip.path = path
+    except ValueError as e:
+        clip.error = str(e)
+    except Exception as e:
+        log_json("warning", "batch_fetch_failed", error=str(e), batchIndex=clip.index)
+        clip.error = "video_fetch_failed"
+    return clip
+
+def _ndjson(line: Dict) -> bytes:
+    return (json.dumps(line, default=str) + "\n").encode()
+
+async def _stream_batch(request: Request, batch_id: str, clips: List[BatchClip], exercise_type: Optional[str],
+                        options: VideoProcessingOptions, deadline: Deadline, temp_dir: str,
+                        calibration: Optional[Calibration] = None, admission: Optional[Admission] = None):
+    """
+    Analyze a batch and yield one NDJSON line per clip as it finishes,
+    followed by a summary line. The first worker takes over the batch's
+    admission.
+    """
+    loop = asyncio.get_running_loop()
+    finished: asyncio.Queue = asyncio.Queue()
+    statuses = Counter()
+    start = time.perf_counter()
+    watcher = asyncio.create_task(_cancel_on_disconnect(request, deadline))
+    try:
+        # Stored uploads are fetched concurrently; clips that cannot be read are reported first
+        await asyncio.gather(*(run_in_threadpool(_receive_reference, clip, temp_dir)
+                               for clip in clips if clip.path is None and clip.error is None))
+        for clip in clips:
+            if clip.path is not None:
+                target_fps = options.target_fps if options.enable_frame_skipping else None
+                clip.estimated_frames = await run_in_threadpool(estimate_sampled_frames, clip.path, target_fps)
+            else:
+                statuses["error"] += 1
+                yield _ndjson({"type": "clip", "index": clip.index, "source": clip.source,
+                               "status": "error", "error": clip.error})
+
+        pending = BatchQueue(clip for clip in clips if clip.path is not None)
+        emit = lambda line: loop.call_soon_threadsafe(finished.put_nowait, line)
+        workers = [asyncio.ensure_future(run_in_threadpool(_run_batch_worker, pending, exercise_type, options, deadline, emit,
+                                                           calibration, admission if i == 0 else None))
+                   for i in range(batch_parallelism(len(pending), detector_pool.size, settings.ai_batch_max_parallel))]
+        done = asyncio.ensure_future(asyncio.gather(*workers, return_exceptions=True))
+        done.add_done_callback(lambda _: finished.put_nowait(None))
+        while True:
+            line = await finished.get()
+            if line is None:
+                break
+            statuses[line["status"]] += 1
+            yield _ndjson(line)
+
+        # Clips no detector got to before the deadline
+        for clip in pending.drain():
+            statuses["skipped"] += 1
+            yield _ndjson({"type": "clip", "index": clip.index, "source": clip.source,
+                           "status": "skipped", "partial_reason": deadline.reason or "deadline_exceeded"})
+        yield _ndjson({"type": "summary", "batch_id": batch_id, "clips": len(clips), "statuses": dict(statuses),
+                       "processing_time_seconds": time.perf_counter() - start})
+    finally:
+        # Workers stop at their next frame if the stream ends early
+        if admission is not None:
+            admission.release()
+        deadline.cancel(CLIENT_DISCONNECTED)
+        watcher.cancel()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        publish_metrics()
+
+def _cleanup_batch(admission: Admission, temp_dir: str):
+    """Free a batch's admission and uploads, whether or not its stream ever started."""
+    admission.release()
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+@app.post("/analyze-batch")
+async def analyze_batch(
+    request: Request,
+    files: List[UploadFile] = File(default=[]),
+    video_urls: List[str] = Form(default=[]),
+    exercise_type: str = None,
+    session_id: str = None,
+    device_id: str = None,
+    # {'pixelsPerMeter', 'homography', 'tiltDeg'}, {'pixelsPerCm'} or {'sweep': [[x, y], ...]} as JSON;
+    # kept for the session when a session_id is given
+    calibration: Optional[str] = Form(default=None),
+    options: VideoProcessingOptions = VideoProcessingOptions()
+):
+    """
+    Analyze a session of clips, given as uploads and/or stored-upload URLs.
+
+    Clips are run shortest-first on detectors held for the whole batch and
+    each result is streamed back as an NDJSON line as soon as it is ready.
+    """
+    if not files and not video_urls:
+        raise HTTPException(status_code=400, detail="no_videos")
+    if len(files) + len(video_urls) > settings.ai_batch_max_clips:
+        raise HTTPException(status_code=413, detail="too_many_videos")
+    if video_urls and not settings.ai_batch_url_hosts:
+        raise HTTPException(status_code=400, detail="video_urls_disabled")
+    deadline = _request_deadline(request, options, settings.ai_batch_timeout_seconds)
+    session_calibration = _session_calibration(calibration, session_id, device_id)
+    admission = detector_pool.admit()
+    if admission is None:
+        log_json("warning", "analysis_rejected", reason="queue_full", queueDepth=detector_pool.queue_depth)
+        raise HTTPException(status_code=503, detail="overloaded", headers={"Retry-After": "1"})
+
+    batch_id = str(uuid.uuid4())
+    temp_dir = tempfile.mkdtemp()
+    clips = []
+    try:
+        upload_start = time.perf_counter()
+        for index, file in enumerate(files):
+            path = upload_path(temp_dir, index, file.filename)
+            await run_in_threadpool(save_upload, file.file, path)
+            clips.append(BatchClip(index, file.filename or "", path))
+        observe_stage('upload', time.perf_counter() - upload_start)
+    except Exception as e:
+        admission.release()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        log_json("error", "analyze_batch_error", error=str(e), exerciseType=exercise_type)
+        raise HTTPException(status_code=500, detail="internal_error")
+    clips.extend(BatchClip(len(files) + i, url) for i, url in enumerate(video_urls))
+    log_json("info", "batch_started", batchId=batch_id, clips=len(clips), exerciseType=exercise_type)
+    return StreamingResponse(_stream_batch(request, batch_id, clips, exercise_type, options, deadline, temp_dir,
+                                           session_calibration, admission),
+                             media_type="application/x-ndjson", headers={"x-batch-id": batch_id},
+                             background=BackgroundTask(_cleanup_batch, admission, temp_dir))  # Also when the stream never started
 
 @app.get("/performance/metrics")
 async def get_performance_metrics(exercise_type: Optional[str] = None):
     """Get performance metrics for all or specific exercise type."""
-    if exercise_type and exercise_type not in performance_stats:
+    exercise_stats, _, _ = current_metrics()
+    # Unlisted names share the 'other' slot; only report slots by their own name
+    if exercise_type and (exercise_slot(exercise_type) != exercise_type or exercise_type not in exercise_stats):
         raise HTTPException(status_code=404, detail=f"No data for exercise type: {exercise_type}")
         
     if exercise_type:
-        stats = performance_stats[exercise_type]
+        stats = exercise_stats[exercise_type]
         return {
             "exercise_type": exercise_type,
-            "total_videos_processed": stats['total_videos'],
-            "total_frames_processed": stats['total_frames'],
-            "average_processing_time": np.mean(stats['processing_times']) if stats['processing_times'] else 0,
-            "average_confidence": np.mean(stats['confidence_scores']) if stats['confidence_scores'] else 0,
-            "success_rate": 1 - (stats['failure_rate'] / stats['total_videos'] if stats['total_videos'] > 0 else 0),
+            "total_videos_processed": stats.total_videos,
+            "total_frames_processed": stats.total_frames,
+            "average_processing_time": stats.processing_time.mean,
+            "processing_time_quantiles": stats.processing_time_quantiles.quantiles(),
+            "average_confidence": stats.confidence.mean,
+            "success_rate": stats.success_rate,
+            "requests_per_second": stats.request_rate.rate(),
             "metrics_history": {
-                "processing_times": stats['processing_times'][-10:],  # Last 10 videos
-                "confidence_distribution": np.histogram(stats['confidence_scores'], bins=10).tolist() if stats['confidence_scores'] else None
+                "processing_times": list(stats.recent_processing_times),  # Last 10 videos
+                "confidence_distribution": stats.confidence.to_dict() if stats.confidence.count else None
             }
         }
     else:
         return {
             exercise: {
-                "total_videos_processed": stats['total_videos'],
-                "average_processing_time": np.mean(stats['processing_times']) if stats['processing_times'] else 0,
-                "success_rate": 1 - (stats['failure_rate'] / stats['total_videos'] if stats['total_videos'] > 0 else 0)
+                "total_videos_processed": stats.total_videos,
+                "average_processing_time": stats.processing_time.mean,
+                "success_rate": stats.success_rate
             }
-            for exercise, stats in performance_stats.items()
+            for exercise, stats in exercise_stats.items()
         }
 
 @app.get("/performance/exercise-comparison")
 async def compare_exercise_performance():
     """Compare performance metrics across different exercises."""
     comparison = {}
+    exercise_stats, _, _ = current_metrics()
     
-    for exercise, stats in performance_stats.items():
-        if stats['total_videos'] > 0:
+    for exercise, stats in exercise_stats.items():
+        if stats.total_videos > 0:
             comparison[exercise] = {
-                "avg_processing_time": np.mean(stats['processing_times']) if stats['processing_times'] else 0,
-                "avg_confidence": np.mean(stats['confidence_scores']) if stats['confidence_scores'] else 0,
-                "success_rate": 1 - (stats['failure_rate'] / stats['total_videos']),
-                "total_samples": stats['total_videos']
+                "avg_processing_time": stats.processing_time.mean,
+                "p95_processing_time": stats.processing_time_quantiles.quantile(0.95),
+                "avg_confidence": stats.confidence.mean,
+                "success_rate": stats.success_rate,
+                "total_samples": stats.total_videos
             }
             
     return comparison
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Per-stage latency histograms, frame counters and pool gauges in Prometheus text format."""
+    exercise_stats, pipeline, pool = current_metrics()
+    body = render_prometheus(pipeline, exercise_stats, gauges={
+        "velox_analysis_queue_depth": lambda: pool['queue_depth'],
+        "velox_detector_pool_size": lambda: pool['size'],
+        "velox_detector_pool_utilization": lambda: pool['busy'] / pool['size'] if pool['size'] else 0.0
+    }, counters={
+        "velox_analysis_rejected_total": lambda: pool['rejected']
+    })
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+@app.get("/traces")
+async def list_traces(request: Request):
+    """Ids of recently sampled request traces (profiler token required)."""
+    if not _operator_token_valid(request):
+        raise HTTPException(status_code=403, detail="invalid_profile_token")
+    return {"trace_ids": tracing.recent_trace_ids()}
+
+@app.get("/traces/{trace_id}")
+async def get_trace(trace_id: str, request: Request):
+    """A recently sampled request trace as JSON (profiler token required)."""
+    if not _operator_token_valid(request):
+        raise HTTPException(status_code=403, detail="invalid_profile_token")
+    trace = tracing.get_trace(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail=f"No sampled trace: {trace_id}")
+    return trace
+
+@app.get("/profiles/{analysis_id}", response_class=PlainTextResponse)
+async def get_profile(analysis_id: str, request: Request):
+    """Collapsed-stack profile of a profiled analysis (same token as the request)."""
+    if not _profiling_requested(request):
+        raise HTTPException(status_code=403, detail="invalid_profile_token")
+    try:
+        path = _profile_path(analysis_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="profile_not_found")
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="profile_not_found")
+    with open(path) as f:
+        return PlainTextResponse(f.read())
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
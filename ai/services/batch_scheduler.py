@@ -0,0 +1,128 @@
+from typing import Iterable, List, Optional, Sequence
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+import os
+import shutil
+import threading
+import urllib.request
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Batch analysis configuration
+BATCH_CONFIG = {
+    'download_timeout': 30.0,  # Seconds per socket operation when fetching a stored upload
+    'download_chunk_size': 1 << 20,  # Bytes copied per read
+    'allowed_schemes': ('https',)  # Stored uploads are only fetched over TLS
+}
+
+
+@dataclass
+class BatchClip:
+    """One video of a batch analysis."""
+    index: int  # Position in the request; results stream back tagged with it
+    source: str  # Upload filename or stored-upload URL
+    path: Optional[str] = None  # Local file once received or fetched
+    estimated_frames: int = 0  # Frames the pipeline is expected to sample
+    error: Optional[str] = None  # Set when the clip could not be received
+
+
+class BatchQueue:
+    """
+    Shortest-first line of clips shared by the workers of one batch.
+
+    Each worker holds a detector for the whole batch and takes the cheapest
+    clip left whenever it finishes one, so short clips are packed back to
+    back on whichever detector frees up first and their results come out
+    early, while the long clips overlap at the end.
+    """
+
+    def __init__(self, clips: Iterable[BatchClip]):
+        self._clips = sorted(clips, key=lambda clip: (clip.estimated_frames, clip.index))
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._clips)
+
+    def next(self) -> Optional[BatchClip]:
+        """The cheapest remaining clip, or None when the line is empty."""
+        with self._lock:
+            return self._clips.pop(0) if self._clips else None
+
+    def drain(self) -> List[BatchClip]:
+        """Remove and return the clips no worker got to."""
+        with self._lock:
+            clips, self._clips = self._clips, []
+            return clips
+
+
+def batch_parallelism(clip_count: int, pool_size: int, max_parallel: Optional[int] = None) -> int:
+    """
+    Detectors a batch may hold at once.
+
+    Defaults to half the pool so single-video requests are never shut out
+    by a batch, and never more than there are clips.
+    """
+    limit = max_parallel if max_parallel else max(pool_size // 2, 1)
+    return max(min(clip_count, limit, pool_size), 1)
+
+
+def is_allowed_reference(url: str, allowed_hosts: Sequence[str]) -> bool:
+    """True for an https URL on one of the configured storage hosts."""
+    parts = urlsplit(url)
+    return parts.scheme in BATCH_CONFIG['allowed_schemes'] and (parts.hostname or '').lower() in {
+        host.lower() for host in allowed_hosts}
+
+
+class _AllowedRedirectHandler(urllib.request.HTTPRedirectHandler):
+    """Follows redirects only to URLs that pass is_allowed_reference."""
+
+    def __init__(self, allowed_hosts: Sequence[str]):
+        self.allowed_hosts = allowed_hosts
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        if not is_allowed_reference(newurl, self.allowed_hosts):
+            raise ValueError("video_url_not_allowed")
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+def fetch_reference(url: str, dest_path: str, allowed_hosts: Sequence[str], max_bytes: int) -> int:
+    """
+    Download a stored upload (e.g. a signed storage URL) to dest_path.
+
+    Only hosts in allowed_hosts are contacted, redirects included, so
+    clients cannot make the service fetch arbitrary addresses.
+
+    Returns:
+        Bytes written
+
+    Raises:
+        ValueError: If the URL is not allowed or the file exceeds max_bytes
+    """
+    if not is_allowed_reference(url, allowed_hosts):
+        raise ValueError("video_url_not_allowed")
+    written = 0
+    opener = urllib.request.build_opener(_AllowedRedirectHandler(allowed_hosts))
+    with opener.open(url, timeout=BATCH_CONFIG['download_timeout']) as response, \
+            open(dest_path, 'wb') as out:
+        while True:
+            chunk = response.read(BATCH_CONFIG['download_chunk_size'])
+            if not chunk:
+                break
+            written += len(chunk)
+            if written > max_bytes:
+                raise ValueError("video_too_large")
+            out.write(chunk)
+    return written
+
+
+def upload_path(temp_dir: str, index: int, filename: Optional[str]) -> str:
+    """Where to store a batch upload; the client's filename never leaves temp_dir."""
+    return os.path.join(temp_dir, f"{index}-{os.path.basename(filename or '') or 'upload'}")
+
+
+def save_upload(source, dest_path: str) -> int:
+    """Copy an uploaded file object to dest_path; returns bytes written."""
+    with open(dest_path, 'wb') as out:
+        shutil.copyfileobj(source, out)
+        return out.tell()
@@ -0,0 +1,230 @@
+"""
+Per-session camera calibration and metric-space conversion.
+
+A calibration maps image pixels to meters on the plane of the lift,
+either by a pixels-per-meter scale (optionally corrected for camera tilt)
+or by a 3x3 homography. It is worked out once per recording session
+(from explicit values or a reference sweep, as cameraCalibrate.ts does on
+the device), cached by device and session id, and applied to whole
+(T, 33, 4) landmark arrays in one batched transform.
+"""
+from typing import Callable, Dict, Hashable, Optional, Sequence, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
+import threading
+import time
+import logging
+import numpy as np
+
+from .landmark_buffer import X, Y
+
+logger = logging.getLogger(__name__)
+
+# Calibration configuration (sweep values match cameraCalibrate.ts)
+CALIBRATION_CONFIG = {
+    'reference_object_cm': 20.0,  # Length of the reference swept during calibration
+    'min_sweep_points': 10,  # Tracked points needed for a sweep calibration
+    'min_sweep_distance_px': 100.0,  # Sweep path shorter than this is rejected
+    'max_tilt_deg': 60.0,  # Tilt corrections beyond this are not trusted
+    'cache_size': 1024,  # Sessions kept per worker
+    'cache_ttl_seconds': 4 * 3600,  # A session's calibration expires after this long unused
+    'bar_joints': [15, 16]  # Wrists; their midpoint tracks the bar
+}
+
+
+class CalibrationError(Exception):
+    """Raised when calibration values are malformed or out of range."""
+    pass
+
+
+@dataclass(frozen=True)
+class Calibration:
+    pixels_per_meter: Optional[float] = None  # Scale on the lifting plane
+    homography: Optional[np.ndarray] = None  # 3x3, image pixels -> plane meters; takes precedence
+    tilt_deg: float = 0.0  # Camera pitch; vertical distances are foreshortened by cos(tilt)
+    confidence: float = 1.0
+
+    @classmethod
+    def from_dict(cls, values: Dict) -> 'Calibration':
+        """
+        Parse the client form: {'pixelsPerMeter', 'homography', 'tiltDeg'},
+        'pixelsPerCm' for device calibrations, or 'sweep' (tracked [x, y]
+        pixel points of the reference) to calibrate here.
+        """
+        if not isinstance(values, dict):
+            raise CalibrationError("calibration must be an object")
+        if 'sweep' in values:
+            try:
+                calibration = calibrate_from_sweep(values['sweep'])
+            except (TypeError, ValueError) as e:
+                raise CalibrationError(f"sweep must be a list of [x, y] points: {e}")
+            if calibration is None:
+                raise CalibrationError("calibration sweep too short")
+            return calibration
+        try:
+            scale = values.get('pixelsPerMeter')
+            if scale is None and values.get('pixelsPerCm') is not None:
+                scale = float(values['pixelsPerCm']) * 100.0
+            scale = float(scale) if scale is not None else None
+            homography = values.get('homography')
+            if homography is not None:
+                homography = np.asarray(homography, dtype=np.float64).reshape(-1)
+            tilt = float(values.get('tiltDeg') or 0.0)
+            confidence = float(values.get('confidence', 1.0))
+        except (TypeError, ValueError) as e:
+            raise CalibrationError(f"calibration values must be numbers: {e}")
+        if scale is not None and not (np.isfinite(scale) and scale > 0):
+            raise CalibrationError("pixelsPerMeter must be positive")
+        if homography is not None:
+            if homography.size != 9 or not np.isfinite(homography).all():
+                raise CalibrationError("homography must be 9 finite numbers")
+            homography = homography.reshape(3, 3)
+        if scale is None and homography is None:
+            raise CalibrationError("calibration needs pixelsPerMeter, pixelsPerCm, homography or sweep")
+        if not np.isfinite(tilt) or abs(tilt) > CALIBRATION_CONFIG['max_tilt_deg']:
+            raise CalibrationError(f"tiltDeg beyond {CALIBRATION_CONFIG['max_tilt_deg']} degrees")
+        return cls(scale, homography, tilt, confidence)
+
+    def to_metric(self, pixels: np.ndarray) -> np.ndarray:
+        """
+        Convert (..., 2) pixel coordinates to meters on the lifting plane in
+        one batched transform. Metric y points the same way as image y.
+        """
+        pixels = np.asarray(pixels, dtype=np.float64)
+        if self.homography is not None:
+            mapped = pixels @ self.homography[:, :2].T + self.homography[:, 2]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return mapped[..., :2] / mapped[..., 2:]
+        meters = pixels / self.pixels_per_meter
+        if self.tilt_deg:
+            meters[..., 1] /= np.cos(np.radians(self.tilt_deg))
+        return meters
+
+    def landmarks_to_metric(self, points: np.ndarray, frame_size: Tuple[int, int]) -> np.ndarray:
+        """(..., 33, 4) normalized landmark rows -> (..., 33, 2) meters, for frames of (width, height)."""
+        points = np.asarray(points)
+        return self.to_metric(points[..., [X, Y]] * np.asarray(frame_size, dtype=np.float64))
+
+    def summary(self) -> Dict:
+        return {
+            'method': 'homography' if self.homography is not None else 'scale',
+            'pixelsPerMeter': self.pixels_per_meter,
+            'tiltDeg': self.tilt_deg,
+            'confidence': self.confidence
+        }
+
+
+def calibrate_from_sweep(points: Sequence[Sequence[float]], reference_cm: Optional[float] = None) -> Optional[Calibration]:
+    """
+    Scale from the tracked path of a reference object of known length, as
+    CameraCalibrator.calculateCalibration does: path length over the
+    reference length, with confidence growing with points and coverage.
+
+    Returns:
+        The calibration, or None when there are too few points or the
+        sweep is too short
+    """
+    reference_cm = reference_cm or CALIBRATION_CONFIG['reference_object_cm']
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if len(points) < CALIBRATION_CONFIG['min_sweep_points']:
+        return None
+    distance = float(np.hypot(*np.diff(points, axis=0).T).sum())
+    if distance < CALIBRATION_CONFIG['min_sweep_distance_px']:
+        return None
+    confidence = min(1.0, len(points) / CALIBRATION_CONFIG['min_sweep_points']
+                     * distance / CALIBRATION_CONFIG['min_sweep_distance_px'])
+    return Calibration(pixels_per_meter=distance / reference_cm * 100.0, confidence=confidence)
+
+
+class CalibrationCache:
+    """
+    Calibrations by (device id, session id), least recently used first out.
+
+    Entries expire `ttl` seconds after their last use, so a session id
+    reused much later is calibrated afresh.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries or CALIBRATION_CONFIG['cache_size']
+        self.ttl = ttl if ttl is not None else CALIBRATION_CONFIG['cache_ttl_seconds']
+        self._clock = clock
+        self._entries: 'OrderedDict[Hashable, Tuple[float, Calibration]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, device_id: Optional[str], session_id: str) -> Optional[Calibration]:
+        key = (device_id or '', session_id)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if now - entry[0] > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries[key] = (now, entry[1])
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, device_id: Optional[str], session_id: str, calibration: Calibration):
+        key = (device_id or '', session_id)
+        with self._lock:
+            self._entries[key] = (self._clock(), calibration)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def resolve(self, device_id: Optional[str], session_id: Optional[str],
+                values: Optional[Dict] = None) -> Optional[Calibration]:
+        """
+        The calibration for a request: parsed from `values` when given (and
+        stored for the session), else the session's cached one. Requests
+        without a session id are never cached.
+
+        Raises:
+            CalibrationError: If `values` are malformed
+        """
+        if values:
+            calibration = Calibration.from_dict(values)
+            if session_id:
+                self.put(device_id, session_id, calibration)
+            return calibration
+        return self.get(device_id, session_id) if session_id else None
+
+
+def bar_path_metrics(
+    points: np.ndarray,
+    timestamps: Sequence[float],
+    calibration: Calibration,
+    frame_size: Tuple[int, int]
+) -> Optional[Dict]:
+    """
+    Bar speed and path in metric units from a (T, 33, 4) landmark array.
+
+    The bar is tracked by the wrist midpoint. Velocities are central
+    differences over the frame timestamps; path deviation is measured
+    from the vertical line through the median bar position.
+
+    Returns:
+        Dict of velocities in m/s and distances in cm, or None with fewer
+        than two frames where the bar is visible
+    """
+    bar = calibration.landmarks_to_metric(points[:, CALIBRATION_CONFIG['bar_joints']], frame_size).mean(axis=1)
+    times = np.asarray(timestamps, dtype=np.float64)
+    visible = np.isfinite(bar).all(axis=1)
+    bar, times = bar[visible], times[visible]
+    if len(bar) < 2 or np.ptp(times) <= 0:
+        return None
+    vertical = np.gradient(bar[:, 1], times)
+    deviation = np.abs(bar[:, 0] - np.median(bar[:, 0]))
+    return {
+        'peak_velocity_mps': float(np.abs(vertical).max()),
+        'mean_velocity_mps': float(np.abs(vertical).mean()),
+        'range_of_motion_cm': float(np.ptp(bar[:, 1]) * 100.0),
+        'bar_path_deviation_cm': float(deviation.max() * 100.0),
+        'bar_path_deviation_rms_cm': float(np.sqrt(np.mean(deviation ** 2)) * 100.0),
+        'calibration': calibration.summary()
+    }
@@ -0,0 +1,47 @@
+from typing import Optional
+import math
+import time
+
+# Reasons a deadline stops work early
+DEADLINE_EXCEEDED = 'deadline_exceeded'
+CLIENT_DISCONNECTED = 'client_disconnected'
+
+
+class Deadline:
+    """
+    Request deadline on the monotonic clock, with cooperative cancellation.
+
+    Long-running loops poll `expired` between units of work and stop with
+    whatever they have so far. `cancel` may be called from another thread or
+    from the event loop (e.g. when the client disconnects).
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.expires_at = None if timeout is None else time.monotonic() + max(timeout, 0.0)
+        self._cancel_reason: Optional[str] = None
+
+    def cancel(self, reason: str = CLIENT_DISCONNECTED):
+        """Stop work at the next check; the first reason given wins."""
+        if self._cancel_reason is None:
+            self._cancel_reason = reason
+
+    def remaining(self) -> float:
+        """Seconds left, 0 once expired or cancelled, inf without a deadline."""
+        if self._cancel_reason is not None:
+            return 0.0
+        if self.expires_at is None:
+            return math.inf
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.reason is not None
+
+    @property
+    def reason(self) -> Optional[str]:
+        """Why work should stop, or None while it may continue."""
+        if self._cancel_reason is not None:
+            return self._cancel_reason
+        if self.expires_at is not None and time.monotonic() >= self.expires_at:
+            return DEADLINE_EXCEEDED
+        return None
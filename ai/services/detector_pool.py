@@ -0,0 +1,126 @@
+from typing import Callable, Dict, Iterator, Optional
+from contextlib import contextmanager
+import math
+import queue
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Admission:
+    """
+    A request's place in line, reserved on arrival. It is given up when the
+    request checks out a detector, or by release() if it ends before that.
+    """
+
+    def __init__(self, pool: 'DetectorPool'):
+        self._pool = pool
+        self.held = True
+
+    def release(self):
+        self._pool._release(self)
+
+
+class DetectorPool:
+    """
+    Fixed set of pose detectors shared by request worker threads.
+
+    A detector keeps tracking state for the video it is working on, so each
+    analysis checks one out for its whole duration. Requests that find none
+    idle wait in line; the line length and the share of busy detectors are
+    exported as gauges. With `max_waiting` set, requests arriving to a full
+    line are turned away up front rather than queueing toward a timeout;
+    admission reserves the place at once, so a burst of arrivals still
+    being uploaded counts against the limit.
+    """
+
+    def __init__(self, factory: Callable[[], object], size: int = 1, max_waiting: Optional[int] = None):
+        if size < 1:
+            raise ValueError("pool size must be at least 1")
+        self.size = size
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        for _ in range(size):
+            self._idle.put(factory())
+        self._lock = threading.Lock()
+        self.max_waiting = max_waiting
+        self.waiting = 0  # Callers blocked in acquire()
+        self.reserved = 0  # Admitted requests without a detector yet
+        self.busy = 0
+        self.rejected = 0
+
+    def admit(self) -> Optional[Admission]:
+        """
+        Reserve a place for an arriving request.
+
+        Returns:
+            The reservation, to pass to acquire() (and release() if the
+            request ends first), or None, counted as a rejection, when
+            every detector and every place in line is taken
+        """
+        with self._lock:
+            if self.max_waiting is not None and self.reserved + self.busy >= self.size + self.max_waiting:
+                self.rejected += 1
+                return None
+            self.reserved += 1
+            return Admission(self)
+
+    def _release(self, admission: Admission):
+        with self._lock:
+            self._release_locked(admission)
+
+    def _release_locked(self, admission: Optional[Admission]):
+        if admission is not None and admission.held:
+            admission.held = False
+            self.reserved -= 1
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None,
+                admission: Optional[Admission] = None) -> Iterator[Optional[object]]:
+        """
+        Check out a detector, waiting at most `timeout` seconds.
+
+        Args:
+            timeout: Seconds to wait; None waits indefinitely
+            admission: The caller's reservation, given up once waiting ends
+
+        Yields:
+            The detector, or None if none became idle in time
+        """
+        with self._lock:
+            self.waiting += 1
+        detector = None
+        try:
+            wait = None if timeout is None or math.isinf(timeout) else max(timeout, 0.0)
+            detector = self._idle.get(timeout=wait)
+        except queue.Empty:
+            pass
+        finally:
+            with self._lock:
+                self.waiting -= 1
+                self._release_locked(admission)
+                if detector is not None:
+                    self.busy += 1
+
+        if detector is None:
+            yield None
+            return
+
+        try:
+            yield detector
+        finally:
+            with self._lock:
+                self.busy -= 1
+            self._idle.put(detector)
+
+    @property
+    def queue_depth(self) -> int:
+        """Requests waiting for a detector, including admitted ones not yet in acquire()."""
+        return max(self.waiting, self.reserved + self.busy - self.size)
+
+    @property
+    def utilization(self) -> float:
+        return self.busy / self.size
+
+    def stats(self) -> Dict:
+        return {'size': self.size, 'busy': self.busy, 'queue_depth': self.queue_depth, 'rejected': self.rejected}
@@ -2,12 +2,8 @@ import logging
 import time
 from functools import wraps
 from typing import Callable, TypeVar, Any
+from .tracing import traced
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 # Type variable for generic function return type
@@ -58,15 +54,15 @@ def exponential_backoff(
                 except exceptions as e:
                     retries += 1
                     if retries > max_retries:
-                        logger.error(f"Max retries ({max_retries}) exceeded. Error: {str(e)}")
+                        logger.error("Max retries (%d) exceeded. Error: %s", max_retries, e)
                         raise
                         
                     # Calculate delay with exponential backoff
                     delay = min(base_delay * (2 ** (retries - 1)), max_delay)
                     
                     logger.warning(
-                        f"Attempt {retries}/{max_retries} failed. "
-                        f"Retrying in {delay:.2f}s. Error: {str(e)}"
+                        "Attempt %d/%d failed. Retrying in %.2fs. Error: %s",
+                        retries, max_retries, delay, e
                     )
                     
                     time.sleep(delay)
@@ -86,26 +82,11 @@ def fallback_enabled(fallback_func: Callable[..., T]) -> Callable[..., T]:
             try:
                 return func(*args, **kwargs)
             except Exception as e:
-                logger.warning(f"Main function failed, attempting fallback. Error: {str(e)}")
+                logger.warning("Main function failed, attempting fallback. Error: %s", e)
                 return fallback_func(*args, **kwargs)
         return wrapper
     return decorator
 
 def log_execution_time(func: Callable[..., T]) -> Callable[..., T]:
-    """Decorator that logs function execution time."""
-    @wraps(func)
-    def wrapper(*args: Any, **kwargs: Any) -> T:
-        start_time = time.time()
-        try:
-            result = func(*args, **kwargs)
-            execution_time = time.time() - start_time
-            logger.debug(f"{func.__name__} executed in {execution_time:.2f}s")
-            return result
-        except Exception as e:
-            execution_time = time.time() - start_time
-            logger.error(
-                f"{func.__name__} failed after {execution_time:.2f}s. "
-                f"Error: {str(e)}"
-            )
-            raise
-    return wrapper 
\ No newline at end of file
+    """Deprecated alias of `traced()`; times the call as a span of the current trace."""
+    return traced()(func)
@@ -2,7 +2,7 @@ from typing import List, Dict, Optional, Tuple
 import numpy as np
 from ..pose_utils import (
     PoseNormalizer, NormalizedPose, PoseConfidence,
-    calculate_angle, smooth_angles, validate_landmarks
+    calculate_angle, smooth_angles, calculate_stability, validate_landmarks
 )
 from .movement_analyzer import MovementAnalyzer, RepCount, MovementPhase
 import json
@@ -12,7 +12,7 @@ from abc import ABC, abstractmethod
 class BaseFormAnalyzer(ABC):
     def __init__(self):
         self.thresholds = self._load_thresholds()
-        self.required_joints = []  # To be defined by subclasses
+        self.required_joints = getattr(self, "required_joints", [])  # Set by subclasses before calling super().__init__()
         self.pose_normalizer = PoseNormalizer()
         self.movement_analyzer = MovementAnalyzer()
         
@@ -64,7 +64,8 @@ class BaseFormAnalyzer(ABC):
     def analyze_movement_sequence(
         self,
         landmarks: List[Dict],
-        beat_timestamps: List[float] = None
+        beat_timestamps: List[float] = None,
+        timestamps: Optional[List[float]] = None
     ) -> RepCount:
         """
         Analyze a sequence of poses to count reps and detect phases.
@@ -72,6 +73,7 @@ class BaseFormAnalyzer(ABC):
         Args:
             landmarks: List of pose landmarks
             beat_timestamps: Optional list of music beat timestamps
+            timestamps: Optional presentation timestamp (seconds) of each frame
             
         Returns:
             RepCount with count, confidence and phase information
@@ -93,17 +95,18 @@ class BaseFormAnalyzer(ABC):
             normalized_frames,
             joint_triplets,
             target_angles,
-            beat_timestamps
+            beat_timestamps,
+            timestamps
         )
         
     def normalize_pose_sequence(self, pose_frames: List[Dict], image_size: Tuple[int, int]) -> List[NormalizedPose]:
-        """Normalize a sequence of pose frames."""
+        """Normalize a sequence of pose frames and smooth it as a whole."""
         normalized_frames = []
         for frame in pose_frames:
             if validate_landmarks(frame, self.required_joints):
                 normalized = self.pose_normalizer.normalize_pose(frame, image_size)
                 normalized_frames.append(normalized)
-        return normalized_frames
+        return self.pose_normalizer.smooth_sequence(normalized_frames)
         
     def calculate_joint_angles(self, normalized_pose: NormalizedPose, joint_triplets: List[Tuple[str, str, str]]) -> Dict[str, float]:
         """Calculate angles between specified joint triplets."""
@@ -6,6 +6,12 @@ from ..pose_utils import (
     NormalizedPose, PoseConfidence, calculate_angle,
     smooth_angles, calculate_stability
 )
+from ..video_io import DEFAULT_FPS, frame_times
+
+# Velocity thresholds in form_thresholds.json were tuned as degrees per frame
+# at 30fps; velocities are computed in degrees per second and rescaled by this
+# rate before thresholding so decimated or VFR input classifies identically.
+REFERENCE_FPS = DEFAULT_FPS
 
 @dataclass
 class MovementPhase:
@@ -13,8 +19,10 @@ class MovementPhase:
     confidence: float
     start_frame: int
     end_frame: int
-    peak_velocity: float
-    avg_velocity: float
+    peak_velocity: float  # degrees per second
+    avg_velocity: float  # degrees per second
+    start_time: float = 0.0  # seconds
+    end_time: float = 0.0  # seconds
 
 @dataclass
 class RepCount:
@@ -35,7 +43,8 @@ class MovementAnalyzer:
         normalized_frames: List[NormalizedPose],
         joint_triplets: List[Tuple[str, str, str]],
         target_angles: Dict[str, Tuple[float, float]] = None,  # (min, max) angles
-        beat_timestamps: List[float] = None
+        beat_timestamps: List[float] = None,
+        timestamps: Optional[List[float]] = None
     ) -> RepCount:
         """
         Analyze movement patterns to count reps and detect phases.
@@ -45,6 +54,8 @@ class MovementAnalyzer:
             joint_triplets: List of (start, mid, end) joint names for angle calculation
             target_angles: Dict of joint names to target angle ranges
             beat_timestamps: Optional list of music beat timestamps
+            timestamps: Optional presentation timestamp (seconds) of each frame;
+                a constant 30fps is assumed when omitted
             
         Returns:
             RepCount with count, confidence and phase information
@@ -53,7 +64,10 @@ class MovementAnalyzer:
             return RepCount(count=0, confidence=0.0, phases=[])
             
         # Calculate joint angles for each frame
-        angles_by_joint = self._calculate_angle_sequences(normalized_frames, joint_triplets)
+        times = frame_times(timestamps, len(normalized_frames))
+        angles_by_joint, times_by_joint = self._calculate_angle_sequences(
+            normalized_frames, joint_triplets, times
+        )
         
         # Apply Savitzky-Golay filter for smooth derivatives
         filtered_angles = {}
@@ -66,12 +80,18 @@ class MovementAnalyzer:
                 filtered = savgol_filter(angles, self.window_size, 2)
                 filtered_angles[joint] = filtered
                 
-                # Calculate velocities (1st derivative)
-                velocity = savgol_filter(angles, self.window_size, 2, deriv=1)
+                # Savitzky-Golay derivatives are per sample; divide by the local
+                # sample interval (chain rule) to get per-second rates that stay
+                # correct for uneven sample spacing.
+                dt = np.gradient(times_by_joint[joint])
+                dt[dt <= 0] = 1.0 / REFERENCE_FPS
+                
+                # Calculate velocities (1st derivative, degrees/s)
+                velocity = savgol_filter(angles, self.window_size, 2, deriv=1) / dt
                 velocities[joint] = velocity
                 
-                # Calculate accelerations (2nd derivative)
-                acceleration = savgol_filter(angles, self.window_size, 2, deriv=2)
+                # Calculate accelerations (2nd derivative, degrees/s^2)
+                acceleration = savgol_filter(angles, self.window_size, 2, deriv=2) / (dt * dt)
                 accelerations[joint] = acceleration
                 
         # Detect movement phases
@@ -80,9 +100,14 @@ class MovementAnalyzer:
             if joint not in filtered_angles:
                 continue
                 
+            # Thresholds are expressed per reference frame
+            ref_velocity = velocity / REFERENCE_FPS
+            ref_acceleration = accelerations[joint] / (REFERENCE_FPS * REFERENCE_FPS) if joint in accelerations else None
+            joint_times = times_by_joint[joint]
+                
             # Find velocity peaks for phase detection
-            pos_peaks, _ = find_peaks(velocity, prominence=self.peak_prominence)
-            neg_peaks, _ = find_peaks(-velocity, prominence=self.peak_prominence)
+            pos_peaks, _ = find_peaks(ref_velocity, prominence=self.peak_prominence)
+            neg_peaks, _ = find_peaks(-ref_velocity, prominence=self.peak_prominence)
             
             # Combine and sort all peaks
             all_peaks = np.sort(np.concatenate([pos_peaks, neg_peaks]))
@@ -96,7 +121,7 @@ class MovementAnalyzer:
                     continue
                     
                 # Calculate phase metrics
-                phase_velocity = velocity[start_idx:end_idx]
+                phase_velocity = ref_velocity[start_idx:end_idx]
                 phase_angles = filtered_angles[joint][start_idx:end_idx]
                 
                 # Determine phase type based on velocity
@@ -121,8 +146,8 @@ class MovementAnalyzer:
                     angle_confidence = min(1.0, angle_coverage)
                 
                 # 3. Acceleration smoothness
-                if joint in accelerations:
-                    phase_acceleration = accelerations[joint][start_idx:end_idx]
+                if ref_acceleration is not None:
+                    phase_acceleration = ref_acceleration[start_idx:end_idx]
                     smoothness = 1.0 / (1.0 + np.std(phase_acceleration))
                 else:
                     smoothness = 1.0
@@ -135,8 +160,10 @@ class MovementAnalyzer:
                     confidence=float(phase_confidence),
                     start_frame=int(start_idx),
                     end_frame=int(end_idx),
-                    peak_velocity=float(np.max(np.abs(phase_velocity))),
-                    avg_velocity=float(avg_velocity)
+                    peak_velocity=float(np.max(np.abs(velocity[start_idx:end_idx]))),
+                    avg_velocity=float(np.mean(velocity[start_idx:end_idx])),
+                    start_time=float(joint_times[start_idx]),
+                    end_time=float(joint_times[end_idx])
                 ))
                 
         # Count reps based on phase transitions
@@ -170,14 +197,22 @@ class MovementAnalyzer:
     def _calculate_angle_sequences(
         self,
         normalized_frames: List[NormalizedPose],
-        joint_triplets: List[Tuple[str, str, str]]
-    ) -> Dict[str, List[float]]:
-        """Calculate angle sequences for each joint triplet."""
+        joint_triplets: List[Tuple[str, str, str]],
+        times: np.ndarray
+    ) -> Tuple[Dict[str, List[float]], Dict[str, np.ndarray]]:
+        """
+        Calculate angle sequences for each joint triplet.
+        
+        Returns the angles per joint together with the time (seconds) of each
+        angle sample, since frames missing a joint are left out.
+        """
         angles_by_joint = {}
+        times_by_joint = {}
         
         for start_joint, mid_joint, end_joint in joint_triplets:
             angles = []
-            for frame in normalized_frames:
+            sample_times = []
+            for frame, t in zip(normalized_frames, times):
                 landmarks = frame.landmarks
                 if all(j in landmarks for j in [start_joint, mid_joint, end_joint]):
                     angle = calculate_angle(
@@ -186,10 +221,12 @@ class MovementAnalyzer:
                         landmarks[end_joint][:2]
                     )
                     angles.append(angle)
+                    sample_times.append(t)
             if angles:
                 angles_by_joint[mid_joint] = angles
+                times_by_joint[mid_joint] = np.asarray(sample_times, dtype=float)
                 
-        return angles_by_joint
+        return angles_by_joint, times_by_joint
         
     def _calculate_rhythm_score(
         self,
@@ -200,13 +237,8 @@ class MovementAnalyzer:
         if not phases or not beat_timestamps:
             return 0.0
             
-        # Convert frame indices to timestamps (assuming 30fps)
-        fps = 30.0
-        phase_timestamps = []
-        for phase in phases:
-            start_time = phase.start_frame / fps
-            end_time = phase.end_frame / fps
-            phase_timestamps.append((start_time, end_time))
+        # Phase boundaries carry the presentation time of their frames
+        phase_timestamps = [(phase.start_time, phase.end_time) for phase in phases]
             
         # Calculate minimum time difference between phase transitions and beats
         min_time_diffs = []
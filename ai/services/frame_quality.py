@@ -0,0 +1,145 @@
+from typing import Dict, List, Optional, Tuple
+from collections import Counter
+import numpy as np
+try:
+    import cv2  # type: ignore
+except Exception:  # pragma: no cover
+    cv2 = None  # type: ignore
+
+# Pre-inference quality gate configuration. All measures are taken on the
+# detector's downsampled luma plane (see IMAGE_PROCESSING_CONFIG['luma_size']).
+FRAME_QUALITY_CONFIG = {
+    'min_sharpness': 0.35,  # Laplacian variance / luma variance; lower = blurred
+    'min_brightness': 0.05,  # Mean luma (0-1) below which CLAHE cannot recover the frame
+    'max_brightness': 0.95,  # Mean luma (0-1) above which the frame is blown out
+    'min_contrast': 2.0,  # Luma std dev (0-255); flat frames (covered lens, blank wall)
+    'scene_change_threshold': 0.25,  # Mean abs luma diff (0-1) treated as a cut
+    'static_threshold': 0.02,  # Max per-tile abs luma diff (0-1) treated as "unchanged"
+    'motion_tiles': (8, 8),  # Tile grid for localized change detection
+    'empty_after_misses': 2,  # Consecutive no-person inferences before gating a static scene
+    'empty_probe_interval': 15  # Still infer every Nth static frame while gating
+}
+
+# Gate reasons
+BLUR = 'blur'
+UNDEREXPOSED = 'underexposed'
+OVEREXPOSED = 'overexposed'
+NO_CONTENT = 'no_content'
+EMPTY_SCENE = 'empty_scene'
+
+
+class FrameQualityGate:
+    """
+    Cheap per-video check run before pose inference.
+
+    Rejects frames that inference would fail on anyway (blurred, badly
+    exposed, featureless), and frames of a static scene in which recent
+    inferences found nobody, such as lead-in or rest footage of an empty
+    rack. Rejected frames are recorded as gaps. One gate is used per video
+    because it keeps state between frames.
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = {**FRAME_QUALITY_CONFIG, **(config or {})}
+        self.counts: Counter = Counter()
+        self.inspected_frames = 0
+        self.scene_changes = 0
+        self.gaps: List[Tuple[float, float]] = []
+        self._previous_luma: Optional[np.ndarray] = None
+        self._reference_luma: Optional[np.ndarray] = None  # luma at the last inference
+        self._consecutive_misses = 0
+        self._static_gated = 0
+        self._gap_open = False
+
+    @property
+    def gated_frames(self) -> int:
+        return sum(self.counts.values())
+
+    def check(self, luma: np.ndarray, timestamp: Optional[float] = None) -> Optional[str]:
+        """
+        Inspect a frame's luma plane.
+
+        Args:
+            luma: Downsampled uint8 grayscale plane of the frame
+            timestamp: Presentation time in seconds, used to record gaps
+
+        Returns:
+            None if the frame should be inferred, otherwise the gate reason
+        """
+        self.inspected_frames += 1
+        reason = self._classify(luma)
+        self._previous_luma = luma.copy()
+
+        if reason is None:
+            self._gap_open = False
+            return None
+
+        self.counts[reason] += 1
+        if timestamp is not None:
+            if self._gap_open:
+                self.gaps[-1] = (self.gaps[-1][0], timestamp)
+            else:
+                self.gaps.append((timestamp, timestamp))
+                self._gap_open = True
+        return reason
+
+    def record_detection(self, person_found: bool):
+        """Feed back the outcome of inference on the last frame that passed."""
+        if person_found:
+            self._consecutive_misses = 0
+        else:
+            self._consecutive_misses += 1
+        self._static_gated = 0
+        self._reference_luma = self._previous_luma
+
+    def summary(self) -> Dict:
+        """Per-video gate counters for the analysis response."""
+        return {
+            'inspected_frames': self.inspected_frames,
+            'gated_frames': self.gated_frames,
+            'gated_by_reason': dict(self.counts),
+            'scene_changes': self.scene_changes,
+            'gaps': [[round(start, 3), round(end, 3)] for start, end in self.gaps]
+        }
+
+    def _classify(self, luma: np.ndarray) -> Optional[str]:
+        cfg = self.config
+        mean, std = cv2.meanStdDev(luma)
+        brightness = float(mean[0][0]) / 255.0
+        contrast = float(std[0][0])
+
+        if brightness < cfg['min_brightness']:
+            return UNDEREXPOSED
+        if brightness > cfg['max_brightness']:
+            return OVEREXPOSED
+        if contrast < cfg['min_contrast']:
+            return NO_CONTENT
+
+        # Laplacian variance normalised by luma variance so the measure does
+        # not depend on how much texture the scene has
+        _, lap_std = cv2.meanStdDev(cv2.Laplacian(luma, cv2.CV_32F))
+        sharpness = float(lap_std[0][0]) ** 2 / max(contrast * contrast, 1.0)
+        if sharpness < cfg['min_sharpness']:
+            return BLUR
+
+        # A cut invalidates everything learned about the previous scene
+        if self._previous_luma is not None:
+            if cv2.mean(cv2.absdiff(luma, self._previous_luma))[0] / 255.0 > cfg['scene_change_threshold']:
+                self.scene_changes += 1
+                self._consecutive_misses = 0
+                self._reference_luma = None
+                return None
+
+        if self._is_static_empty_scene(luma):
+            self._static_gated += 1
+            if self._static_gated % cfg['empty_probe_interval'] != 0:
+                return EMPTY_SCENE
+        return None
+
+    def _is_static_empty_scene(self, luma: np.ndarray) -> bool:
+        """True if nobody was found recently and nothing has moved since."""
+        if self._reference_luma is None or self._consecutive_misses < self.config['empty_after_misses']:
+            return False
+        diff = cv2.absdiff(luma, self._reference_luma)
+        tiles = cv2.resize(diff, self.config['motion_tiles'], interpolation=cv2.INTER_AREA)
+        return float(tiles.max()) / 255.0 < self.config['static_threshold']
@@ -0,0 +1,115 @@
+from typing import Dict, Optional
+from .deadline import Deadline
+
+# Per-video inference budget configuration
+INFERENCE_BUDGET_CONFIG = {
+    'max_attempts_per_frame': 2,  # Primary inference plus one enhanced fallback
+    'max_frame_seconds': 5.0,  # No fallback once a frame has used this much inference time
+    'max_inferences': None,  # Total pose.process calls per video (None = unlimited)
+    'max_inference_seconds': 300.0,  # Total inference time per video
+    'failure_threshold': 5,  # Consecutive failed frames that open the circuit
+    'probe_interval': 10  # While open, infer only every Nth frame
+}
+
+# Circuit states
+CLOSED = 'closed'
+OPEN = 'open'
+
+
+class InferenceBudget:
+    """
+    Caps how much inference a single video may consume.
+
+    Each frame gets a bounded number of attempts. Once
+    `failure_threshold` frames in a row fail, the circuit opens and only every
+    `probe_interval`-th frame is inferred, with a single attempt, until a
+    probe finds a person again. Nothing sleeps or retries the same input.
+    An optional request deadline ends the budget when it expires.
+    """
+
+    def __init__(self, config: Optional[Dict] = None, deadline: Optional[Deadline] = None):
+        self.config = {**INFERENCE_BUDGET_CONFIG, **(config or {})}
+        self.deadline = deadline
+        self.state = CLOSED
+        self.inferences = 0
+        self.inference_seconds = 0.0
+        self.fallback_attempts = 0
+        self.consecutive_failures = 0
+        self.circuit_opened = 0
+        self.probes = 0
+        self._frames_since_open = 0
+        self._frame_attempts = 0
+        self._frame_seconds = 0.0
+
+    @property
+    def exhausted(self) -> bool:
+        """True once the per-video inference allowance or the deadline is used up."""
+        if self.deadline is not None and self.deadline.expired:
+            return True
+        max_inferences = self.config['max_inferences']
+        if max_inferences is not None and self.inferences >= max_inferences:
+            return True
+        return self.inference_seconds >= self.config['max_inference_seconds']
+
+    def begin_frame(self) -> bool:
+        """
+        Start a new frame. Returns False if the open circuit says to skip
+        inference for it.
+        """
+        self._frame_attempts = 0
+        self._frame_seconds = 0.0
+        if self.state == CLOSED:
+            return True
+        self._frames_since_open += 1
+        if self._frames_since_open % self.config['probe_interval'] == 0:
+            self.probes += 1
+            return True
+        return False
+
+    def allow_attempt(self) -> bool:
+        """Whether another inference may run on the current frame."""
+        if self.exhausted:
+            return False
+        if self._frame_attempts >= self._max_attempts():
+            return False
+        if self._frame_attempts > 0 and self._frame_seconds >= self.config['max_frame_seconds']:
+            return False
+        return True
+
+    def record_inference(self, seconds: float):
+        """Account for one pose.process call on the current frame."""
+        if self._frame_attempts > 0:
+            self.fallback_attempts += 1
+        self._frame_attempts += 1
+        self._frame_seconds += seconds
+        self.inferences += 1
+        self.inference_seconds += seconds
+
+    def end_frame(self, success: bool):
+        """Record whether the current frame produced a usable pose."""
+        if success:
+            self.consecutive_failures = 0
+            if self.state == OPEN:
+                self.state = CLOSED
+            return
+        self.consecutive_failures += 1
+        if self.state == CLOSED and self.consecutive_failures >= self.config['failure_threshold']:
+            self.state = OPEN
+            self.circuit_opened += 1
+            self._frames_since_open = 0
+
+    def summary(self) -> Dict:
+        return {
+            'state': self.state,
+            'inferences': self.inferences,
+            'inference_seconds': round(self.inference_seconds, 4),
+            'fallback_attempts': self.fallback_attempts,
+            'circuit_opened': self.circuit_opened,
+            'probes': self.probes,
+            'exhausted': self.exhausted
+        }
+
+    def _max_attempts(self) -> int:
+        # Probes in an open circuit get exactly one attempt
+        return 1 if self.state == OPEN else self.config['max_attempts_per_frame']
+
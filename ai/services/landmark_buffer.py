@@ -0,0 +1,122 @@
+"""
+Pose landmarks as float32 arrays.
+
+A detection is converted once, straight from the MediaPipe result, into a
+(33, 4) row of x, y, z and visibility; a video's poses are rows of one
+(T, 33, 4) buffer. Confidence, normalization, blending and the movement
+analysis all read these arrays, so no per-joint Python objects are built
+after inference. Dict landmarks remain accepted at the API edges.
+"""
+from itertools import chain
+from typing import Dict, List, Optional, Sequence, Union
+import numpy as np
+
+LANDMARK_COUNT = 33  # MediaPipe Pose
+X, Y, Z, VISIBILITY = range(4)  # Columns of a landmark row
+
+LandmarkInput = Union[np.ndarray, Dict, object]
+
+
+def landmarks_to_array(landmarks: LandmarkInput, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Convert one pose to a (33, 4) float32 row of x, y, z, visibility.
+
+    Accepts a MediaPipe landmark list (anything with `.landmark`), a
+    sequence of landmark objects, a dict keyed by landmark index with x/y
+    (and visibility) dicts or [x, y, visibility] arrays, or an existing
+    row. Joints a dict does not contain are NaN.
+
+    Args:
+        landmarks: Pose in any of the forms above
+        out: Optional preallocated row to write into
+    """
+    if out is None:
+        out = np.empty((LANDMARK_COUNT, 4), dtype=np.float32)
+    if isinstance(landmarks, np.ndarray):
+        out[:] = landmarks
+        return out
+    if isinstance(landmarks, dict):
+        out.fill(np.nan)
+        for key, value in landmarks.items():
+            index = key if isinstance(key, int) else int(key) if isinstance(key, str) and key.isdigit() else None
+            if index is None or not 0 <= index < LANDMARK_COUNT:
+                continue
+            if isinstance(value, dict):
+                out[index] = (value.get('x', 0.0), value.get('y', 0.0), value.get('z', 0.0),
+                              value.get('visibility', value.get('confidence', 1.0)))
+            else:
+                arr = np.asarray(value, dtype=np.float32)
+                out[index, :2] = arr[:2]
+                out[index, Z] = 0.0
+                out[index, VISIBILITY] = arr[2] if arr.size > 2 else 1.0
+        return out
+    items = getattr(landmarks, 'landmark', landmarks)
+    out.reshape(-1)[:] = np.fromiter(
+        chain.from_iterable((lm.x, lm.y, lm.z, lm.visibility) for lm in items),
+        dtype=np.float32, count=LANDMARK_COUNT * 4)
+    return out
+
+
+def array_to_landmarks_dict(row: np.ndarray) -> Dict:
+    """The landmarks dict form ({index: {'x', 'y', 'visibility'}}) of a row; NaN joints are left out."""
+    return {i: {'x': float(x), 'y': float(y), 'visibility': float(v)}
+            for i, (x, y, _, v) in enumerate(row.tolist()) if x == x and y == y}
+
+
+def as_landmark_array(sequence: Union[np.ndarray, Sequence[LandmarkInput]]) -> np.ndarray:
+    """A (T, 33, 4) float32 array of a pose sequence given as an array or as per-frame poses."""
+    if isinstance(sequence, np.ndarray):
+        return sequence.astype(np.float32, copy=False)
+    out = np.empty((len(sequence), LANDMARK_COUNT, 4), dtype=np.float32)
+    for row, landmarks in zip(out, sequence):
+        landmarks_to_array(landmarks, out=row)
+    return out
+
+
+class LandmarkBuffer:
+    """
+    Growable (T, 33, 4) float32 buffer of a video's poses.
+
+    Sized up front from the expected frame count and doubled when full,
+    so appending a pose is a single row copy.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self._data = np.empty((max(capacity, 1), LANDMARK_COUNT, 4), dtype=np.float32)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def next_row(self) -> np.ndarray:
+        """Reserve and return the next row for the caller to fill."""
+        if self._size == len(self._data):
+            grown = np.empty((2 * len(self._data), LANDMARK_COUNT, 4), dtype=np.float32)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._size += 1
+        return self._data[self._size - 1]
+
+    def append(self, landmarks: LandmarkInput):
+        landmarks_to_array(landmarks, out=self.next_row())
+
+    @property
+    def array(self) -> np.ndarray:
+        """The filled rows (a view)."""
+        return self._data[:self._size]
+
+
+def joint_angle_series(points: np.ndarray, a: int, b: int, c: int) -> np.ndarray:
+    """Angle at joint b in degrees for every frame of a (T, 33, 4) array; NaN where a joint is missing."""
+    xy = points[:, [a, b, c]][..., [X, Y]].astype(np.float64)
+    ba, bc = xy[:, 0] - xy[:, 1], xy[:, 2] - xy[:, 1]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cosine = np.einsum('ij,ij->i', ba, bc) / (np.linalg.norm(ba, axis=1) * np.linalg.norm(bc, axis=1))
+    return np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0)))
+
+
+def mean_visibility(row: np.ndarray, joints: Optional[List[int]] = None) -> float:
+    """Mean visibility of a row, over `joints` if given; 0 when none are present."""
+    visibility = row[:, VISIBILITY] if joints is None else row[joints, VISIBILITY]
+    visibility = visibility[~np.isnan(visibility)]
+    return float(visibility.mean()) if visibility.size else 0.0
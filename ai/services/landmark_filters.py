@@ -0,0 +1,288 @@
+"""
+Vectorized smoothing of pose landmark arrays.
+
+Every joint of a pose is filtered at once on (joints, dims) arrays, so a
+frame costs a handful of numpy operations whatever the joint count. Two
+filters are provided, each with a streaming mode (`update`, one frame at a
+time, state kept on the instance) and a batch mode (`smooth`, a whole
+sequence, stateless):
+
+- KalmanLandmarkFilter: constant-velocity Kalman filter; batch mode adds a
+  Rauch-Tung-Striebel backward pass, so every frame is estimated from the
+  frames after it as well and the result has no lag.
+- OneEuroLandmarkFilter: adaptive low-pass filter that smooths slow motion
+  hard and fast motion lightly; batch mode averages a forward and a
+  backward pass to cancel the lag.
+
+Joints that are missing (NaN) or barely visible in a frame are predicted
+rather than measured, and a filter instance belongs to one session.
+"""
+from typing import Dict, Optional, Union
+from abc import ABC, abstractmethod
+import numpy as np
+
+# Landmark filter configuration
+LANDMARK_FILTER_CONFIG = {
+    'method': 'kalman',  # 'kalman' or 'one_euro'
+    'nominal_fps': 30.0,  # Frame rate assumed without timestamps; Kalman noise is per nominal frame
+    'min_visibility': 0.3,  # Joints seen less than this are predicted, not measured
+    # Constant-velocity Kalman: only the ratio of the two matters, not the units of the data
+    'process_noise': 0.05,  # Acceleration noise variance per nominal frame
+    'measurement_noise': 1.0,  # Measurement variance at full visibility; divided by visibility
+    'initial_velocity_variance': 1.0,
+    # One-Euro (Casiez et al., 2012); beta suits coordinates normalized to the image
+    'min_cutoff': 1.0,  # Hz; smoothing of slow motion
+    'beta': 10.0,  # Hz per (image height per second) of speed
+    'd_cutoff': 1.0  # Hz; smoothing of the speed estimate
+}
+
+
+def _frame_steps(timestamps: Optional[np.ndarray], count: int, fps: float) -> np.ndarray:
+    """Seconds between consecutive frames (the first entry is unused)."""
+    if timestamps is None or len(timestamps) != count:
+        return np.full(count, 1.0 / fps)
+    steps = np.diff(np.asarray(timestamps, dtype=np.float64), prepend=timestamps[0])
+    return np.where(steps > 0, steps, 1.0 / fps)
+
+
+class _LandmarkFilter(ABC):
+    """Shared input handling for the filter banks."""
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = {**LANDMARK_FILTER_CONFIG, **(config or {})}
+        self.reset()
+
+    @abstractmethod
+    def reset(self):
+        """Forget the session; the next frame starts a new track."""
+        pass
+
+    def _observed(self, points: np.ndarray, visibility: Optional[np.ndarray]) -> np.ndarray:
+        """(joints,) mask of joints measured in this frame."""
+        observed = np.isfinite(points).all(axis=-1)
+        if visibility is not None:
+            observed &= np.nan_to_num(visibility, nan=0.0) >= self.config['min_visibility']
+        return observed
+
+    @abstractmethod
+    def smooth(self, points: np.ndarray, visibility: Optional[np.ndarray] = None,
+               timestamps: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Smooth a whole sequence.
+
+        Args:
+            points: (frames, joints, dims) positions; NaN where missing
+            visibility: Optional (frames, joints) scores in 0-1
+            timestamps: Optional (frames,) presentation times in seconds
+
+        Returns:
+            (frames, joints, dims) smoothed positions; joints never
+            observed stay NaN
+        """
+        pass
+
+
+class KalmanLandmarkFilter(_LandmarkFilter):
+    """
+    Constant-velocity Kalman filter over every joint and coordinate at once.
+
+    State per joint and coordinate is (position, velocity). The dynamics
+    and the visibility-weighted measurement noise are the same for every
+    coordinate of a joint, so the covariance is kept once per joint as a
+    (joints, 2, 2) array and shared by x and y.
+    """
+
+    def reset(self):
+        self.state: Optional[np.ndarray] = None  # (joints, dims, 2): position, velocity
+        self.covariance: Optional[np.ndarray] = None  # (joints, 2, 2)
+        self.initialized: Optional[np.ndarray] = None  # (joints,)
+        self.last_timestamp: Optional[float] = None
+
+    def _process_noise(self, step: float) -> np.ndarray:
+        # Discrete white-noise acceleration model, time in nominal frames
+        dt = step * self.config['nominal_fps']
+        return self.config['process_noise'] * np.array([[dt ** 3 / 3, dt ** 2 / 2], [dt ** 2 / 2, dt]])
+
+    def _predict(self, state: np.ndarray, covariance: np.ndarray, step: float) -> tuple:
+        dt = step * self.config['nominal_fps']
+        state = state.copy()
+        state[..., 0] += dt * state[..., 1]
+        transition = np.array([[1.0, dt], [0.0, 1.0]])
+        covariance = transition @ covariance @ transition.T + self._process_noise(step)
+        return state, covariance
+
+    def _correct(self, state: np.ndarray, covariance: np.ndarray, points: np.ndarray,
+                 visibility: Optional[np.ndarray], observed: np.ndarray) -> tuple:
+        vis = np.ones(len(points)) if visibility is None else np.clip(np.nan_to_num(visibility), 0.05, 1.0)
+        noise = self.config['measurement_noise'] / vis
+        gain = covariance[:, :, 0] / (covariance[:, 0, 0] + noise)[:, None]  # (joints, 2)
+        gain[~observed] = 0.0
+        innovation = np.where(observed[:, None], points - state[..., 0], 0.0)  # (joints, dims)
+        state = state + gain[:, None, :] * innovation[..., None]
+        covariance = covariance - gain[:, :, None] * covariance[:, None, 0, :]
+        return state, covariance
+
+    def _start(self, state: np.ndarray, covariance: np.ndarray, initialized: np.ndarray,
+               points: np.ndarray, observed: np.ndarray):
+        """Start the track of joints seen for the first time at their measurement."""
+        new = observed & ~initialized
+        state[new, :, 0] = points[new]
+        state[new, :, 1] = 0.0
+        covariance[new] = np.diag([self.config['measurement_noise'], self.config['initial_velocity_variance']])
+        initialized |= new
+        return new
+
+    def update(self, points: np.ndarray, visibility: Optional[np.ndarray] = None,
+               timestamp: Optional[float] = None) -> np.ndarray:
+        """
+        Filter one frame of the session.
+
+        Args:
+            points: (joints, dims) positions; NaN where missing
+            visibility: Optional (joints,) scores in 0-1
+            timestamp: Presentation time in seconds
+
+        Returns:
+            (joints, dims) filtered positions; NaN for joints not seen yet
+        """
+        points = np.asarray(points, dtype=np.float64)
+        if self.state is None:
+            joints, dims = points.shape
+            self.state = np.zeros((joints, dims, 2))
+            self.covariance = np.zeros((joints, 2, 2))
+            self.initialized = np.zeros(joints, dtype=bool)
+        step = 1.0 / self.config['nominal_fps']
+        if timestamp is not None and self.last_timestamp is not None and timestamp > self.last_timestamp:
+            step = timestamp - self.last_timestamp
+        self.last_timestamp = timestamp if timestamp is not None else self.last_timestamp
+
+        observed = self._observed(points, visibility)
+        self.state, self.covariance = self._predict(self.state, self.covariance, step)
+        new = self._start(self.state, self.covariance, self.initialized, points, observed)
+        self.state, self.covariance = self._correct(self.state, self.covariance, points, visibility, observed & ~new)
+        return np.where(self.initialized[:, None], self.state[..., 0], np.nan)
+
+    def smooth(self, points: np.ndarray, visibility: Optional[np.ndarray] = None,
+               timestamps: Optional[np.ndarray] = None) -> np.ndarray:
+        points = np.asarray(points, dtype=np.float64)
+        frames, joints, dims = points.shape
+        if frames == 0:
+            return points.copy()
+        steps = _frame_steps(timestamps, frames, self.config['nominal_fps'])
+        filtered = np.zeros((frames, joints, dims, 2))
+        filtered_cov = np.zeros((frames, joints, 2, 2))
+        predicted_cov = np.zeros((frames, joints, 2, 2))
+        state = np.zeros((joints, dims, 2))
+        covariance = np.zeros((joints, 2, 2))
+        initialized = np.zeros(joints, dtype=bool)
+        started = np.full(joints, frames)  # First frame of each joint's track
+
+        # Forward pass
+        for t in range(frames):
+            frame_visibility = None if visibility is None else visibility[t]
+            observed = self._observed(points[t], frame_visibility)
+            if t:
+                state, covariance = self._predict(state, covariance, steps[t])
+            predicted_cov[t] = covariance
+            new = self._start(state, covariance, initialized, points[t], observed)
+            started[new] = t
+            state, covariance = self._correct(state, covariance, points[t], frame_visibility, observed & ~new)
+            filtered[t], filtered_cov[t] = state, covariance
+
+        # Rauch-Tung-Striebel backward pass
+        smoothed = filtered.copy()
+        for t in range(frames - 2, -1, -1):
+            dt = steps[t + 1] * self.config['nominal_fps']
+            transition = np.array([[1.0, dt], [0.0, 1.0]])
+            ahead = predicted_cov[t + 1]
+            det = ahead[:, 0, 0] * ahead[:, 1, 1] - ahead[:, 0, 1] * ahead[:, 1, 0]
+            tracked = (started <= t) & (np.abs(det) > 1e-12)
+            inverse = np.empty_like(ahead)
+            inverse[:, 0, 0], inverse[:, 1, 1] = ahead[:, 1, 1], ahead[:, 0, 0]
+            inverse[:, 0, 1], inverse[:, 1, 0] = -ahead[:, 0, 1], -ahead[:, 1, 0]
+            inverse /= np.where(tracked, det, 1.0)[:, None, None]
+            gain = filtered_cov[t] @ transition.T @ inverse  # (joints, 2, 2)
+            gain[~tracked] = 0.0
+            prediction = filtered[t] @ transition.T  # (joints, dims, 2)
+            smoothed[t] = filtered[t] + np.einsum('jab,jdb->jda', gain, smoothed[t + 1] - prediction)
+
+        result = smoothed[..., 0]
+        result[np.arange(frames)[:, None] < started[None, :]] = np.nan
+        return result
+
+
+class OneEuroLandmarkFilter(_LandmarkFilter):
+    """One-Euro filter over every joint and coordinate at once."""
+
+    def reset(self):
+        self.value: Optional[np.ndarray] = None  # (joints, dims)
+        self.speed: Optional[np.ndarray] = None  # (joints, dims)
+        self.last_timestamp: Optional[float] = None
+
+    @staticmethod
+    def _alpha(cutoff: Union[float, np.ndarray], step: float) -> Union[float, np.ndarray]:
+        tau = 1.0 / (2 * np.pi * cutoff)
+        return 1.0 / (1.0 + tau / step)
+
+    def _step(self, value: np.ndarray, speed: np.ndarray, points: np.ndarray,
+              observed: np.ndarray, step: float) -> tuple:
+        """Advance (value, speed) by one frame; joints not observed hold."""
+        fresh = observed & np.isnan(value).any(axis=-1)
+        raw_speed = (points - value) / step
+        speed_alpha = self._alpha(self.config['d_cutoff'], step)
+        new_speed = speed + speed_alpha * (raw_speed - speed)
+        cutoff = self.config['min_cutoff'] + self.config['beta'] * np.abs(new_speed)
+        new_value = value + self._alpha(cutoff, step) * (points - value)
+        keep = ~observed[:, None]
+        value = np.where(keep, value, new_value)
+        speed = np.where(keep, speed, new_speed)
+        value[fresh] = points[fresh]
+        speed[fresh] = 0.0
+        return value, speed
+
+    def update(self, points: np.ndarray, visibility: Optional[np.ndarray] = None,
+               timestamp: Optional[float] = None) -> np.ndarray:
+        """Filter one frame of the session; see KalmanLandmarkFilter.update."""
+        points = np.asarray(points, dtype=np.float64)
+        if self.value is None:
+            self.value = np.full(points.shape, np.nan)
+            self.speed = np.zeros(points.shape)
+        step = 1.0 / self.config['nominal_fps']
+        if timestamp is not None and self.last_timestamp is not None and timestamp > self.last_timestamp:
+            step = timestamp - self.last_timestamp
+        self.last_timestamp = timestamp if timestamp is not None else self.last_timestamp
+        self.value, self.speed = self._step(self.value, self.speed, points, self._observed(points, visibility), step)
+        return self.value.copy()
+
+    def _pass(self, points: np.ndarray, observed: np.ndarray, steps: np.ndarray) -> np.ndarray:
+        value = np.full(points.shape[1:], np.nan)
+        speed = np.zeros(points.shape[1:])
+        out = np.empty_like(points)
+        for t in range(len(points)):
+            value, speed = self._step(value, speed, points[t], observed[t], steps[t])
+            out[t] = value
+        return out
+
+    def smooth(self, points: np.ndarray, visibility: Optional[np.ndarray] = None,
+               timestamps: Optional[np.ndarray] = None) -> np.ndarray:
+        points = np.asarray(points, dtype=np.float64)
+        if len(points) == 0:
+            return points.copy()
+        observed = np.stack([self._observed(points[t], None if visibility is None else visibility[t])
+                             for t in range(len(points))])
+        steps = _frame_steps(timestamps, len(points), self.config['nominal_fps'])
+        forward = self._pass(points, observed, steps)
+        # Step t of the reversed pass spans frames t and t + 1
+        backward = self._pass(points[::-1], observed[::-1], np.roll(steps, -1)[::-1])[::-1]
+        return np.where(np.isnan(forward), backward, np.where(np.isnan(backward), forward, (forward + backward) / 2))
+
+
+FILTERS = {'kalman': KalmanLandmarkFilter, 'one_euro': OneEuroLandmarkFilter}
+
+
+def create_landmark_filter(method: Optional[str] = None, config: Optional[Dict] = None) -> _LandmarkFilter:
+    """A new filter for one session; method defaults to LANDMARK_FILTER_CONFIG['method']."""
+    method = method or (config or {}).get('method') or LANDMARK_FILTER_CONFIG['method']
+    if method not in FILTERS:
+        raise ValueError(f"Unknown landmark filter {method!r}; expected one of {sorted(FILTERS)}")
+    return FILTERS[method](config)
@@ -0,0 +1,442 @@
+from typing import Callable, Dict, Iterable, List, Optional
+from collections import deque
+import math
+import threading
+import time
+import numpy as np
+
+# Streaming aggregate configuration. Every structure below has a fixed memory
+# footprint regardless of traffic and can be merged with another instance of
+# the same shape.
+METRICS_CONFIG = {
+    'relative_accuracy': 0.01,  # Quantile sketch error relative to the value
+    'sketch_min_value': 1e-4,  # Smallest value the sketch resolves (smaller values share bucket 0)
+    'sketch_max_value': 1e5,  # Largest value the sketch resolves
+    'confidence_bins': 10,  # Equal-width bins over [0, 1]
+    'rate_window_seconds': 60,  # Window for request rates
+    'recent_history': 10,  # Most recent processing times kept verbatim
+    # Upper bounds (seconds) of the stage latency histogram buckets
+    'latency_buckets': (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+}
+
+# Pipeline stages timed for /metrics
+PIPELINE_STAGES = (
+    'upload', 'decode', 'preprocess', 'inference', 'fallback',
+    'normalization', 'analysis', 'serialization'
+)
+
+# Frame outcomes counted for /metrics
+FRAME_OUTCOMES = ('decoded', 'gated', 'skipped', 'inferred', 'failed')
+
+
+class RunningStats:
+    """Count, mean, variance, min and max in constant memory (Welford/Chan)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def add_many(self, values: Iterable[float]):
+        values = np.asarray(values, dtype=float)
+        if values.size == 0:
+            return
+        batch = RunningStats()
+        batch.count = int(values.size)
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        self.merge(batch)
+
+    def merge(self, other: 'RunningStats'):
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def pack(self) -> np.ndarray:
+        """Flat float64 state, the inverse of `unpack`."""
+        return np.array([self.count, self.mean, self.m2, self.min, self.max], dtype=np.float64)
+
+    def unpack(self, state: np.ndarray):
+        count, self.mean, self.m2, self.min, self.max = (float(v) for v in state[:5])
+        self.count = int(count)
+
+    def to_dict(self) -> Dict:
+        if self.count == 0:
+            return {'count': 0, 'mean': 0.0, 'std': 0.0, 'min': 0.0, 'max': 0.0}
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'std': math.sqrt(self.variance),
+            'min': self.min,
+            'max': self.max
+        }
+
+
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch with bounded relative error.
+
+    Values are counted in buckets whose bounds grow geometrically, so any
+    quantile is returned within `relative_accuracy` of the true value. The
+    bucket array is fixed at construction and sketches with the same
+    parameters merge by adding counts.
+    """
+
+    def __init__(self, relative_accuracy: float = METRICS_CONFIG['relative_accuracy'],
+                 min_value: float = METRICS_CONFIG['sketch_min_value'],
+                 max_value: float = METRICS_CONFIG['sketch_max_value']):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.max_value = max_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        size = int(math.ceil(math.log(max_value / min_value) / self._log_gamma)) + 1
+        self.counts = np.zeros(size, dtype=np.int64)
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+    def add(self, value: float):
+        self.counts[self._bucket(value)] += 1
+
+    def add_many(self, values: Iterable[float]):
+        values = np.asarray(values, dtype=float)
+        if values.size == 0:
+            return
+        clipped = np.clip(values, self.min_value, self.max_value)
+        indices = np.ceil(np.log(clipped / self.min_value) / self._log_gamma).astype(np.int64)
+        self.counts += np.bincount(indices, minlength=self.counts.size)[:self.counts.size]
+
+    def merge(self, other: 'QuantileSketch'):
+        if other.counts.shape != self.counts.shape or other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different parameters")
+        self.counts += other.counts
+
+    def quantile(self, q: float) -> float:
+        """Value at quantile q (0-1), or 0.0 for an empty sketch."""
+        total = self.counts.sum()
+        if total == 0:
+            return 0.0
+        rank = q * (total - 1)
+        index = int(np.searchsorted(np.cumsum(self.counts), rank, side='right'))
+        if index == 0:
+            return self.min_value
+        # Midpoint of the bucket (gamma^(i-1), gamma^i] in relative terms
+        return self.min_value * self.gamma ** index * 2 / (1 + self.gamma)
+
+    def quantiles(self, qs: Iterable[float] = (0.5, 0.95, 0.99)) -> Dict[str, float]:
+        return {f"p{int(round(q * 100))}": self.quantile(q) for q in qs}
+
+    def pack(self) -> np.ndarray:
+        return self.counts.astype(np.float64)
+
+    def unpack(self, state: np.ndarray):
+        self.counts[:] = state[:self.counts.size]
+
+    def _bucket(self, value: float) -> int:
+        value = min(max(value, self.min_value), self.max_value)
+        return int(math.ceil(math.log(value / self.min_value) / self._log_gamma))
+
+
+class FixedHistogram:
+    """Counts over fixed bin edges, plus the running sum for a mean."""
+
+    def __init__(self, edges: Iterable[float]):
+        self.edges = np.asarray(edges, dtype=float)
+        self.counts = np.zeros(self.edges.size - 1, dtype=np.int64)
+        self.total = 0.0
+
+    @classmethod
+    def confidence(cls) -> 'FixedHistogram':
+        """Histogram of 0-1 confidence scores."""
+        return cls(np.linspace(0.0, 1.0, METRICS_CONFIG['confidence_bins'] + 1))
+
+    @classmethod
+    def latency(cls) -> 'FixedHistogram':
+        """Histogram of durations in seconds with an open-ended last bin."""
+        return cls([0.0, *METRICS_CONFIG['latency_buckets'], math.inf])
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+    @property
+    def mean(self) -> float:
+        count = self.count
+        return self.total / count if count else 0.0
+
+    def add(self, value: float):
+        self.counts[self._bin(value)] += 1
+        self.total += value
+
+    def add_many(self, values: Iterable[float]):
+        values = np.asarray(values, dtype=float)
+        if values.size == 0:
+            return
+        bins = np.clip(np.searchsorted(self.edges, values, side='left') - 1, 0, self.counts.size - 1)
+        self.counts += np.bincount(bins, minlength=self.counts.size)
+        self.total += float(values.sum())
+
+    def merge(self, other: 'FixedHistogram'):
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Cannot merge histograms with different edges")
+        self.counts += other.counts
+        self.total += other.total
+
+    def to_dict(self) -> Dict:
+        return {'counts': self.counts.tolist(), 'bin_edges': self.edges.tolist()}
+
+    def pack(self) -> np.ndarray:
+        return np.append(self.counts.astype(np.float64), self.total)
+
+    def unpack(self, state: np.ndarray):
+        self.counts[:] = state[:self.counts.size]
+        self.total = float(state[self.counts.size])
+
+    def _bin(self, value: float) -> int:
+        # Values outside the edges land in the first or last bin; bins are
+        # closed on the right, as Prometheus `le` buckets are
+        index = int(np.searchsorted(self.edges, value, side='left')) - 1
+        return min(max(index, 0), self.counts.size - 1)
+
+
+class WindowedRate:
+    """Events per second over a sliding window, kept in a ring of 1s slots."""
+
+    def __init__(self, window_seconds: int = METRICS_CONFIG['rate_window_seconds']):
+        self.window_seconds = window_seconds
+        self.counts = np.zeros(window_seconds, dtype=np.int64)
+        self.slots = np.full(window_seconds, -1, dtype=np.int64)  # Epoch second each slot holds
+
+    def add(self, count: int = 1, now: Optional[float] = None):
+        second = int(time.time() if now is None else now)
+        index = second % self.window_seconds
+        if self.slots[index] != second:
+            self.slots[index] = second
+            self.counts[index] = 0
+        self.counts[index] += count
+
+    def merge(self, other: 'WindowedRate'):
+        if other.window_seconds != self.window_seconds:
+            raise ValueError("Cannot merge rates with different windows")
+        newer = other.slots > self.slots
+        self.slots[newer] = other.slots[newer]
+        self.counts[newer] = other.counts[newer]
+        same = (other.slots == self.slots) & ~newer & (other.slots >= 0)
+        self.counts[same] += other.counts[same]
+
+    def pack(self) -> np.ndarray:
+        return np.concatenate([self.counts, self.slots]).astype(np.float64)
+
+    def unpack(self, state: np.ndarray):
+        self.counts[:] = state[:self.window_seconds]
+        self.slots[:] = state[self.window_seconds:2 * self.window_seconds]
+
+    def rate(self, now: Optional[float] = None) -> float:
+        second = int(time.time() if now is None else now)
+        live = self.slots > second - self.window_seconds
+        return float(self.counts[live].sum()) / self.window_seconds
+
+
+class ExerciseStats:
+    """Fixed-size performance aggregate for one exercise type."""
+
+    def __init__(self):
+        self.total_videos = 0
+        self.total_frames = 0
+        self.failures = 0
+        self.processing_time = RunningStats()  # seconds per video
+        self.processing_time_quantiles = QuantileSketch()
+        self.confidence = FixedHistogram.confidence()
+        self.recent_processing_times = deque(maxlen=METRICS_CONFIG['recent_history'])
+        self.request_rate = WindowedRate()
+
+    def record_video(self, processing_time: float, frames: int, confidence: Optional[FixedHistogram] = None):
+        self.total_videos += 1
+        self.total_frames += frames
+        self.processing_time.add(processing_time)
+        self.processing_time_quantiles.add(processing_time)
+        self.recent_processing_times.append(processing_time)
+        self.request_rate.add()
+        if confidence is not None:
+            self.confidence.merge(confidence)
+
+    def record_failure(self):
+        self.failures += 1
+        self.request_rate.add()
+
+    def merge(self, other: 'ExerciseStats'):
+        self.total_videos += other.total_videos
+        self.total_frames += other.total_frames
+        self.failures += other.failures
+        self.processing_time.merge(other.processing_time)
+        self.processing_time_quantiles.merge(other.processing_time_quantiles)
+        self.confidence.merge(other.confidence)
+        self.recent_processing_times.extend(other.recent_processing_times)
+        self.request_rate.merge(other.request_rate)
+
+    @property
+    def success_rate(self) -> float:
+        return 1 - (self.failures / self.total_videos if self.total_videos > 0 else 0)
+
+    def _parts(self) -> list:
+        return [self.processing_time, self.processing_time_quantiles, self.confidence, self.request_rate]
+
+    def pack(self) -> np.ndarray:
+        recent = np.full(self.recent_processing_times.maxlen, np.nan)
+        recent[:len(self.recent_processing_times)] = list(self.recent_processing_times)
+        counters = np.array([self.total_videos, self.total_frames, self.failures], dtype=np.float64)
+        return np.concatenate([counters, recent, *(part.pack() for part in self._parts())])
+
+    def unpack(self, state: np.ndarray):
+        self.total_videos, self.total_frames, self.failures = (int(v) for v in state[:3])
+        offset = 3
+        recent = state[offset:offset + self.recent_processing_times.maxlen]
+        self.recent_processing_times.clear()
+        self.recent_processing_times.extend(float(v) for v in recent if not np.isnan(v))
+        offset += self.recent_processing_times.maxlen
+        for part in self._parts():
+            size = part.pack().size
+            part.unpack(state[offset:offset + size])
+            offset += size
+
+
+class PipelineMetrics:
+    """
+    Per-stage latency histograms and frame counters for the whole service.
+
+    Observations come from request worker threads, so updates take a lock;
+    each is a handful of array increments.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {stage: FixedHistogram.latency() for stage in PIPELINE_STAGES}
+        self.frames = {outcome: 0 for outcome in FRAME_OUTCOMES}
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            self.stages[stage].add(seconds)
+
+    def observe_many(self, stage: str, seconds: Iterable[float]):
+        with self._lock:
+            self.stages[stage].add_many(seconds)
+
+    def count_frames(self, counts: Dict[str, int]):
+        with self._lock:
+            for outcome, count in counts.items():
+                self.frames[outcome] += count
+
+    def merge(self, other: 'PipelineMetrics'):
+        with self._lock:
+            for stage, histogram in other.stages.items():
+                self.stages[stage].merge(histogram)
+            for outcome, count in other.frames.items():
+                self.frames[outcome] += count
+
+    def pack(self) -> np.ndarray:
+        with self._lock:
+            frames = np.array([self.frames[outcome] for outcome in FRAME_OUTCOMES], dtype=np.float64)
+            return np.concatenate([frames, *(self.stages[stage].pack() for stage in PIPELINE_STAGES)])
+
+    def unpack(self, state: np.ndarray):
+        with self._lock:
+            for outcome, count in zip(FRAME_OUTCOMES, state[:len(FRAME_OUTCOMES)]):
+                self.frames[outcome] = int(count)
+            offset = len(FRAME_OUTCOMES)
+            for stage in PIPELINE_STAGES:
+                size = self.stages[stage].counts.size + 1
+                self.stages[stage].unpack(state[offset:offset + size])
+                offset += size
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels.items()) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def render_prometheus(
+    pipeline: PipelineMetrics,
+    exercise_stats: Dict[str, ExerciseStats],
+    gauges: Optional[Dict[str, Callable[[], float]]] = None,
+    counters: Optional[Dict[str, Callable[[], float]]] = None
+) -> str:
+    """
+    Render metrics in the Prometheus text exposition format (version 0.0.4).
+
+    Args:
+        pipeline: Stage histograms and frame counters
+        exercise_stats: Per-exercise aggregates keyed by exercise type
+        gauges: Extra gauges as name -> callable returning the current value
+        counters: Extra counters (names ending in _total) as name -> callable
+            returning the running count
+
+    Returns:
+        Exposition text
+    """
+    lines: List[str] = []
+
+    lines.append('# HELP velox_stage_duration_seconds Time spent in each pipeline stage.')
+    lines.append('# TYPE velox_stage_duration_seconds histogram')
+    for stage, histogram in pipeline.stages.items():
+        cumulative = np.cumsum(histogram.counts)
+        for upper, count in zip(histogram.edges[1:], cumulative):
+            labels = _format_labels({'stage': stage, 'le': _format_value(upper)})
+            lines.append(f'velox_stage_duration_seconds_bucket{labels} {int(count)}')
+        labels = _format_labels({'stage': stage})
+        lines.append(f'velox_stage_duration_seconds_sum{labels} {_format_value(histogram.total)}')
+        lines.append(f'velox_stage_duration_seconds_count{labels} {histogram.count}')
+
+    lines.append('# HELP velox_frames_total Sampled frames by outcome.')
+    lines.append('# TYPE velox_frames_total counter')
+    for outcome, count in pipeline.frames.items():
+        lines.append(f'velox_frames_total{_format_labels({"outcome": outcome})} {count}')
+
+    # Each family's samples directly follow its own HELP/TYPE lines
+    for name, help_text, attribute in (('velox_videos_total', 'Analyzed videos by exercise type.', 'total_videos'),
+                                       ('velox_video_failures_total', 'Failed analyses by exercise type.', 'failures')):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for exercise, stats in exercise_stats.items():
+            labels = _format_labels({'exercise': exercise or 'unspecified'})
+            lines.append(f'{name}{labels} {getattr(stats, attribute)}')
+
+    for name, read in (gauges or {}).items():
+        lines.append(f'# TYPE {name} gauge')
+        lines.append(f'{name} {_format_value(read())}')
+
+    for name, read in (counters or {}).items():
+        lines.append(f'# TYPE {name} counter')
+        lines.append(f'{name} {_format_value(read())}')
+
+    return '\n'.join(lines) + '\n'
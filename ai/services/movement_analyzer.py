@@ -1,13 +1,19 @@
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Union
 import numpy as np
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
+import json
 import logging
+import os
 from .error_handling import (
     PoseDetectionError, LowConfidenceError, InvalidFrameError,
     NoLandmarksDetectedError, ProcessingTimeoutError,
-    exponential_backoff, fallback_enabled, log_execution_time
+    exponential_backoff, fallback_enabled
 )
+from .tracing import traced
+from .video_io import frame_times
+from .landmark_buffer import as_landmark_array, joint_angle_series
+from .rep_segmentation import REP_SEGMENTATION_CONFIG, RepBounds, find_reps
 
 logger = logging.getLogger(__name__)
 
@@ -21,10 +27,11 @@ class ExerciseMetrics:
     depth: float
     form_score: float
     rep_count: int
-    tempo: float
+    tempo: float  # seconds per rep
     stability: float
     confidence: float = 0.0
     error_message: Optional[str] = None
+    rep_boundaries: List[List[int]] = field(default_factory=list)  # [start, bottom, end] frame of each rep
 
 class MovementAnalyzer:
     def __init__(self):
@@ -48,6 +55,28 @@ class MovementAnalyzer:
                 'required_joints': [11, 12, 13, 14, 23, 24]  # shoulders, elbows, hips
             }
         }
+        self.rep_thresholds = self._load_rep_thresholds()
+
+    def _load_rep_thresholds(self) -> Dict[ExerciseType, Dict]:
+        """Rep segmentation settings per exercise from movement_thresholds in form_thresholds.json."""
+        defaults = {'prominence': REP_SEGMENTATION_CONFIG['prominence'], 'min_frames': REP_SEGMENTATION_CONFIG['min_frames']}
+        config_path = os.path.join(os.path.dirname(__file__), '../config/form_thresholds.json')
+        try:
+            with open(config_path, 'r') as f:
+                config = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Using default rep thresholds: {str(e)}")
+            return {exercise: dict(defaults) for exercise in ExerciseType}
+        min_rep_frames = config.get('common', {}).get('min_rep_frames', defaults['min_frames'])
+        thresholds = {}
+        for exercise in ExerciseType:
+            movement = config.get(exercise.value, {}).get('movement_thresholds', {})
+            thresholds[exercise] = {
+                'prominence': movement.get('peak_prominence', defaults['prominence']),
+                # A rep is a descent and an ascent, each at least min_phase_frames long
+                'min_frames': max(min_rep_frames, 2 * movement.get('min_phase_frames', 0))
+            }
+        return thresholds
         
     def validate_exercise_type(self, exercise_type: str) -> None:
         """Validate that the exercise type is supported."""
@@ -56,27 +85,36 @@ class MovementAnalyzer:
         except ValueError:
             raise ValueError(f"Unsupported exercise type: {exercise_type}. Supported types: {[e.value for e in ExerciseType]}")
             
-    def validate_landmarks_sequence(self, landmarks_sequence: List[Dict], required_joints: List[int]) -> None:
-        """Validate that the landmarks sequence contains required joints."""
-        if not landmarks_sequence:
+    def validate_landmarks_sequence(self, landmarks_sequence: np.ndarray, required_joints: List[int]) -> None:
+        """Validate that the (T, 33, 4) landmarks sequence contains required joints."""
+        if len(landmarks_sequence) == 0:
             raise InvalidFrameError("Empty landmarks sequence")
             
-        for i, landmarks in enumerate(landmarks_sequence):
-            missing_joints = [j for j in required_joints if j not in landmarks]
-            if missing_joints:
-                raise NoLandmarksDetectedError(
-                    f"Frame {i} missing required joints: {missing_joints}"
-                )
+        missing = np.isnan(landmarks_sequence[:, required_joints, :2]).any(axis=2)
+        if missing.any():
+            i = int(np.argmax(missing.any(axis=1)))
+            missing_joints = [j for j, m in zip(required_joints, missing[i]) if m]
+            raise NoLandmarksDetectedError(
+                f"Frame {i} missing required joints: {missing_joints}"
+            )
                 
     @exponential_backoff(max_retries=3, base_delay=0.1, max_delay=2.0)
-    @log_execution_time
-    def analyze_movement(self, landmarks_sequence: List[Dict], exercise_type: str) -> Tuple[ExerciseMetrics, List[str]]:
+    @traced()
+    def analyze_movement(
+        self,
+        landmarks_sequence: Union[np.ndarray, List[Dict]],
+        exercise_type: str,
+        timestamps: Optional[List[float]] = None
+    ) -> Tuple[ExerciseMetrics, List[str]]:
         """
         Analyze a sequence of pose landmarks for a specific exercise.
         
         Args:
-            landmarks_sequence: List of pose landmarks for each frame
+            landmarks_sequence: (T, 33, 4) landmark array, or one landmarks
+                dict per frame
             exercise_type: Type of exercise being performed
+            timestamps: Optional presentation timestamp (seconds) of each frame;
+                a constant 30fps is assumed when omitted
             
         Returns:
             Tuple of (metrics, feedback)
@@ -88,10 +126,11 @@ class MovementAnalyzer:
             rules = self.exercise_rules[exercise]
             
             # Validate landmarks
+            landmarks_sequence = as_landmark_array(landmarks_sequence)
             self.validate_landmarks_sequence(landmarks_sequence, rules['required_joints'])
             
             # Calculate metrics
-            metrics = self._calculate_metrics(landmarks_sequence, exercise)
+            metrics = self._calculate_metrics(landmarks_sequence, exercise, timestamps)
             
             # Generate feedback
             feedback = self._generate_feedback(metrics, rules, exercise)
@@ -112,15 +151,20 @@ class MovementAnalyzer:
             )
             return metrics, [f"Analysis failed: {str(e)}"]
             
-    def _calculate_metrics(self, landmarks_sequence: List[Dict], exercise: ExerciseType) -> ExerciseMetrics:
+    def _calculate_metrics(
+        self,
+        landmarks_sequence: np.ndarray,
+        exercise: ExerciseType,
+        timestamps: Optional[List[float]] = None
+    ) -> ExerciseMetrics:
         """Calculate exercise-specific metrics from pose landmarks."""
         try:
             if exercise == ExerciseType.SQUAT:
-                return self._calculate_squat_metrics(landmarks_sequence)
+                return self._calculate_squat_metrics(landmarks_sequence, timestamps)
             elif exercise == ExerciseType.DEADLIFT:
-                return self._calculate_deadlift_metrics(landmarks_sequence)
+                return self._calculate_deadlift_metrics(landmarks_sequence, timestamps)
             elif exercise == ExerciseType.PUSHUP:
-                return self._calculate_pushup_metrics(landmarks_sequence)
+                return self._calculate_pushup_metrics(landmarks_sequence, timestamps)
             else:
                 raise ValueError(f"Metrics calculation not implemented for {exercise.value}")
                 
@@ -128,30 +172,12 @@ class MovementAnalyzer:
             logger.error(f"Metrics calculation failed for {exercise.value}: {str(e)}")
             raise
             
-    @log_execution_time
-    def _calculate_squat_metrics(self, landmarks_sequence: List[Dict]) -> ExerciseMetrics:
+    @traced()
+    def _calculate_squat_metrics(self, landmarks_sequence: np.ndarray, timestamps: Optional[List[float]] = None) -> ExerciseMetrics:
         """Calculate metrics specific to squat exercise."""
         try:
-            depths = []
-            knee_angles = []
-            back_angles = []
-            
-            for landmarks in landmarks_sequence:
-                # Calculate knee angles
-                if all(k in landmarks for k in [23, 25, 27]):  # Left knee
-                    hip = np.array([landmarks[23]['x'], landmarks[23]['y']])
-                    knee = np.array([landmarks[25]['x'], landmarks[25]['y']])
-                    ankle = np.array([landmarks[27]['x'], landmarks[27]['y']])
-                    knee_angle = self._calculate_angle(hip, knee, ankle)
-                    knee_angles.append(knee_angle)
-                    
-                # Calculate back angle
-                if all(k in landmarks for k in [11, 23, 25]):  # Using left side
-                    shoulder = np.array([landmarks[11]['x'], landmarks[11]['y']])
-                    hip = np.array([landmarks[23]['x'], landmarks[23]['y']])
-                    knee = np.array([landmarks[25]['x'], landmarks[25]['y']])
-                    back_angle = self._calculate_angle(shoulder, hip, knee)
-                    back_angles.append(back_angle)
+            knee_angles = self._angle_series(landmarks_sequence, 23, 25, 27)  # Left knee
+            back_angles = self._angle_series(landmarks_sequence, 11, 23, 25)  # Using left side
                     
             # Calculate metrics
             max_depth = max(knee_angles) if knee_angles else 0
@@ -161,11 +187,12 @@ class MovementAnalyzer:
             # Calculate stability (standard deviation of back angle)
             stability = np.std(back_angles) if back_angles else 0
             
-            # Estimate rep count (number of complete depth cycles)
-            rep_count = self._estimate_rep_count(knee_angles)
+            # Reps from the knee angle, one bottom between two lockouts each
+            reps = self._find_reps(landmarks_sequence, ExerciseType.SQUAT, 23, 25, 27)
+            rep_count = len(reps)
             
-            # Calculate tempo (time per rep)
-            tempo = len(landmarks_sequence) / rep_count if rep_count > 0 else 0
+            # Calculate tempo (seconds per rep)
+            tempo = self._calculate_tempo(timestamps, len(landmarks_sequence), rep_count)
             
             # Calculate form score (0-100)
             form_score = self._calculate_form_score(
@@ -184,36 +211,27 @@ class MovementAnalyzer:
                 rep_count=rep_count,
                 tempo=tempo,
                 stability=stability,
-                confidence=confidence
+                confidence=confidence,
+                rep_boundaries=reps.rows()
             )
             
         except Exception as e:
             logger.error(f"Squat metrics calculation failed: {str(e)}")
             raise
             
-    @log_execution_time
-    def _calculate_deadlift_metrics(self, landmarks_sequence: List[Dict]) -> ExerciseMetrics:
+    @traced()
+    def _calculate_deadlift_metrics(self, landmarks_sequence: np.ndarray, timestamps: Optional[List[float]] = None) -> ExerciseMetrics:
         """Calculate metrics specific to deadlift exercise."""
         try:
             # Similar structure to squat metrics, but with deadlift-specific angles
             # TODO: Implement complete deadlift metrics
-            hip_angles = []
-            back_angles = []
-            knee_angles = []
-            
-            for landmarks in landmarks_sequence:
-                # Calculate relevant angles for deadlift
-                if all(k in landmarks for k in [11, 23, 25]):  # Back angle
-                    shoulder = np.array([landmarks[11]['x'], landmarks[11]['y']])
-                    hip = np.array([landmarks[23]['x'], landmarks[23]['y']])
-                    knee = np.array([landmarks[25]['x'], landmarks[25]['y']])
-                    back_angle = self._calculate_angle(shoulder, hip, knee)
-                    back_angles.append(back_angle)
+            back_angles = self._angle_series(landmarks_sequence, 11, 23, 25)
                     
             # Basic metrics for now
             stability = np.std(back_angles) if back_angles else 0
-            rep_count = self._estimate_rep_count(back_angles)
-            tempo = len(landmarks_sequence) / rep_count if rep_count > 0 else 0
+            reps = self._find_reps(landmarks_sequence, ExerciseType.DEADLIFT, 11, 23, 25)
+            rep_count = len(reps)
+            tempo = self._calculate_tempo(timestamps, len(landmarks_sequence), rep_count)
             form_score = 70.0  # Default score until fully implemented
             
             return ExerciseMetrics(
@@ -222,42 +240,27 @@ class MovementAnalyzer:
                 rep_count=rep_count,
                 tempo=tempo,
                 stability=stability,
-                confidence=0.7  # Conservative estimate
+                confidence=0.7,  # Conservative estimate
+                rep_boundaries=reps.rows()
             )
             
         except Exception as e:
             logger.error(f"Deadlift metrics calculation failed: {str(e)}")
             raise
             
-    @log_execution_time
-    def _calculate_pushup_metrics(self, landmarks_sequence: List[Dict]) -> ExerciseMetrics:
+    @traced()
+    def _calculate_pushup_metrics(self, landmarks_sequence: np.ndarray, timestamps: Optional[List[float]] = None) -> ExerciseMetrics:
         """Calculate metrics specific to push-up exercise."""
         try:
-            elbow_angles = []
-            body_angles = []
-            
-            for landmarks in landmarks_sequence:
-                # Calculate elbow angle
-                if all(k in landmarks for k in [11, 13, 15]):  # Left arm
-                    shoulder = np.array([landmarks[11]['x'], landmarks[11]['y']])
-                    elbow = np.array([landmarks[13]['x'], landmarks[13]['y']])
-                    wrist = np.array([landmarks[15]['x'], landmarks[15]['y']])
-                    elbow_angle = self._calculate_angle(shoulder, elbow, wrist)
-                    elbow_angles.append(elbow_angle)
-                    
-                # Calculate body alignment
-                if all(k in landmarks for k in [11, 23, 27]):  # Left side
-                    shoulder = np.array([landmarks[11]['x'], landmarks[11]['y']])
-                    hip = np.array([landmarks[23]['x'], landmarks[23]['y']])
-                    ankle = np.array([landmarks[27]['x'], landmarks[27]['y']])
-                    body_angle = self._calculate_angle(shoulder, hip, ankle)
-                    body_angles.append(body_angle)
+            elbow_angles = self._angle_series(landmarks_sequence, 11, 13, 15)  # Left arm
+            body_angles = self._angle_series(landmarks_sequence, 11, 23, 27)  # Body alignment, left side
                     
             # Calculate metrics
             min_elbow = min(elbow_angles) if elbow_angles else 0
             stability = np.std(body_angles) if body_angles else 0
-            rep_count = self._estimate_rep_count(elbow_angles)
-            tempo = len(landmarks_sequence) / rep_count if rep_count > 0 else 0
+            reps = self._find_reps(landmarks_sequence, ExerciseType.PUSHUP, 11, 13, 15)
+            rep_count = len(reps)
+            tempo = self._calculate_tempo(timestamps, len(landmarks_sequence), rep_count)
             
             # Calculate form score
             form_score = self._calculate_pushup_form_score(
@@ -271,7 +274,8 @@ class MovementAnalyzer:
                 rep_count=rep_count,
                 tempo=tempo,
                 stability=stability,
-                confidence=min(1.0, form_score / 100)
+                confidence=min(1.0, form_score / 100),
+                rep_boundaries=reps.rows()
             )
             
         except Exception as e:
@@ -375,28 +379,31 @@ class MovementAnalyzer:
             logger.error(f"Angle calculation failed: {str(e)}")
             raise
             
-    def _estimate_rep_count(self, angles: List[float], threshold: float = 100) -> int:
-        """Estimate the number of repetitions based on angle cycles."""
-        if not angles:
-            return 0
-            
-        try:
-            # Find peaks and valleys
-            peaks = []
-            valleys = []
-            
-            for i in range(1, len(angles) - 1):
-                if angles[i] > angles[i-1] and angles[i] > angles[i+1]:
-                    peaks.append(i)
-                elif angles[i] < angles[i-1] and angles[i] < angles[i+1]:
-                    valleys.append(i)
-                    
-            # Count complete cycles
-            return min(len(peaks), len(valleys))
-            
-        except Exception as e:
-            logger.error(f"Rep counting failed: {str(e)}")
-            return 0
+    def _angle_series(self, landmarks_sequence: np.ndarray, a: int, b: int, c: int) -> List[float]:
+        """Angle at joint b in every frame where joints a, b and c are all present."""
+        angles = joint_angle_series(landmarks_sequence, a, b, c)
+        return angles[~np.isnan(angles)].tolist()
+        
+    def _calculate_tempo(self, timestamps: Optional[List[float]], frame_count: int, rep_count: int) -> float:
+        """Return the average duration of a rep in seconds."""
+        if rep_count <= 0 or frame_count == 0:
+            return 0.0
+        times = frame_times(timestamps, frame_count)
+        # Each frame covers one frame interval, so the span includes the last one
+        frame_interval = float(np.median(np.diff(times))) if frame_count > 1 else 0.0
+        duration = float(times[-1] - times[0]) + frame_interval
+        return duration / rep_count
+        
+    def _find_reps(self, landmarks_sequence: np.ndarray, exercise: ExerciseType, a: int, b: int, c: int) -> RepBounds:
+        """
+        Reps of the angle at joint b, thresholded with hysteresis so that
+        jitter around a turning point is not counted as a rep. Boundaries
+        are frame indices of the sequence; frames missing a joint are
+        interpolated over.
+        """
+        thresholds = self.rep_thresholds[exercise]
+        return find_reps(joint_angle_series(landmarks_sequence, a, b, c),
+                         prominence=thresholds['prominence'], min_frames=thresholds['min_frames'])
         
     def _calculate_form_score(self, depth: float, stability: float, back_angles: List[float], knee_angles: List[float]) -> float:
         """Calculate a form score from 0 to 100."""
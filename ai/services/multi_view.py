@@ -0,0 +1,283 @@
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import queue
+import threading
+import logging
+import numpy as np
+
+from .deadline import Deadline
+from .frame_quality import FrameQualityGate
+from .inference_budget import InferenceBudget
+from .landmark_buffer import VISIBILITY, array_to_landmarks_dict
+from .pose_detector import (PoseDetector, DetectionResult, MIN_CONFIDENCE_THRESHOLD, blend_pose_arrays,
+                            normalize_pose_array)
+from .video_io import DEFAULT_FPS, iter_sampled_frames
+from .view_alignment import ViewOffset, align_views
+
+logger = logging.getLogger(__name__)
+
+# Multi-view configuration
+MULTI_VIEW_CONFIG = {
+    'prefetch_frames': 4,  # Frames each camera is decoded ahead of detection
+    'sync_tolerance': 0.5,  # Views within this many sample intervals form one tuple
+    'blend_joints': [11, 12, 23, 24]  # Shoulders/hips that must be visible to normalize a view
+}
+
+
+class SynchronizedFrames(NamedTuple):
+    frame_number: int  # Index of the tuple in the session
+    timestamp: float  # Presentation time in seconds (earliest view in the tuple)
+    frames: Tuple[Optional[np.ndarray], ...]  # One per camera; None where a view has no frame
+
+
+@dataclass
+class MultiViewResult:
+    points: Optional[np.ndarray] = None  # (33, 4) blended over the views that found a pose
+    confidence: float = 0.0  # Mean over the views that were detected
+    views: List[Optional[DetectionResult]] = field(default_factory=list)  # Per camera; None if no frame
+
+    @property
+    def landmarks(self) -> Dict:
+        """Blended pose in landmarks dict form; empty when no view found one."""
+        return array_to_landmarks_dict(self.points) if self.points is not None else {}
+
+
+class _Prefetcher:
+    """Decodes one camera on its own thread, a bounded number of frames ahead."""
+
+    _END = object()
+
+    def __init__(self, frames: Iterator, depth: int):
+        self._queue: queue.Queue = queue.Queue(maxsize=max(depth, 1))
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._done = False
+        self._thread = threading.Thread(target=self._run, args=(frames,), daemon=True)
+        self._thread.start()
+
+    def _put(self, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self, frames: Iterator):
+        try:
+            for item in frames:
+                if not self._put(item):
+                    break
+        except Exception as e:
+            self._error = e
+        finally:
+            close = getattr(frames, 'close', None)
+            if close is not None:
+                close()  # releases the capture on the thread that owns it
+            self._put(self._END)
+
+    def next(self):
+        """The next sampled frame, or None at the end of the video."""
+        if self._done:
+            return None
+        item = self._queue.get()
+        if item is self._END:
+            self._done = True
+            if self._error is not None:
+                raise self._error
+            return None
+        return item
+
+    def close(self):
+        self._stop.set()
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self._thread.join(timeout=1.0)
+
+
+def iter_synchronized_frames(
+    video_paths: Sequence[str],
+    target_fps: Optional[float] = None,
+    tolerance: Optional[float] = None,
+    offsets: Optional[Sequence[float]] = None
+) -> Iterator[SynchronizedFrames]:
+    """
+    Decode several cameras of one session and yield time-aligned frame tuples.
+
+    Every camera is decoded on its own thread and sampled on the same time
+    grid. Each tuple takes the earliest pending frame of any camera plus
+    every other camera's pending frame within `tolerance` seconds of it; a
+    camera with nothing that close (dropped frames, later start) is None in
+    that tuple rather than holding the others back.
+
+    With `offsets` (see view_alignment.align_views) each camera's clock is
+    shifted onto the first camera's: footage before the shared start is
+    not decoded and tuple timestamps are in reference time.
+
+    Args:
+        video_paths: One recording per camera
+        target_fps: Sampling rate; every decoded frame when None
+        tolerance: Seconds between frames of one tuple; half a sample
+            interval by default
+        offsets: Per camera, seconds its recording lags the reference
+    """
+    if tolerance is None:
+        tolerance = MULTI_VIEW_CONFIG['sync_tolerance'] / (target_fps or DEFAULT_FPS)
+    offsets = list(offsets) if offsets is not None else [0.0] * len(video_paths)
+    # Cameras that started recording before the reference skip their lead-in
+    shift = max(-min(offsets), 0.0)
+    streams = [_Prefetcher(iter_sampled_frames(path, target_fps, start_time=offset + shift),
+                           MULTI_VIEW_CONFIG['prefetch_frames'])
+               for path, offset in zip(video_paths, offsets)]
+    try:
+        heads = [stream.next() for stream in streams]
+        frame_number = 0
+        while any(head is not None for head in heads):
+            timestamp = min(head.timestamp - offsets[i] for i, head in enumerate(heads) if head is not None)
+            frames = []
+            for i, head in enumerate(heads):
+                if head is not None and head.timestamp - offsets[i] - timestamp <= tolerance:
+                    frames.append(head.frame)
+                    heads[i] = streams[i].next()
+                else:
+                    frames.append(None)
+            yield SynchronizedFrames(frame_number, timestamp, tuple(frames))
+            frame_number += 1
+    finally:
+        for stream in streams:
+            stream.close()
+
+
+def blend_views(results: Sequence[Optional[DetectionResult]]) -> Tuple[Optional[np.ndarray], float]:
+    """
+    Normalize each view's pose and merge them as multiAngleBlend does, on
+    the detections' landmark rows.
+
+    Views whose shoulders and hips are barely visible are blended
+    unnormalized, as their scale estimate would be unreliable.
+
+    Returns:
+        Tuple of (blended (33, 4) row or None, mean confidence of the detected views)
+    """
+    rows: List[np.ndarray] = []
+    confidences: List[float] = []
+    for result in results:
+        if result is None:
+            continue
+        confidences.append(result.confidence)
+        if result.points is not None:
+            rows.append(result.points)
+    if not rows:
+        return None, 0.0
+    views = np.stack(rows)
+    torso_visibility = np.nan_to_num(views[:, MULTI_VIEW_CONFIG['blend_joints'], VISIBILITY]).mean(axis=1)
+    views = np.where((torso_visibility >= MIN_CONFIDENCE_THRESHOLD)[:, None, None], normalize_pose_array(views), views)
+    return blend_pose_arrays(views), float(np.mean(confidences))
+
+
+class MultiViewDetector:
+    """
+    One PoseDetector per camera, detecting the views of a frame in parallel.
+
+    Each camera keeps its own tracker, last pose and frame-skip history, so
+    tracking is as good as in a single-camera session. The first view runs
+    on the calling thread and the others on one thread per camera;
+    MediaPipe releases the GIL during inference, so the views overlap and a
+    frame tuple costs about as much as its slowest view.
+    """
+
+    def __init__(self, detectors: Sequence[PoseDetector]):
+        if not detectors:
+            raise ValueError("at least one view is required")
+        self.detectors = list(detectors)
+        self.alignment: Optional[List[ViewOffset]] = None  # Offsets used by the last iter_poses
+        self._executor = ThreadPoolExecutor(max_workers=len(self.detectors) - 1,
+                                            thread_name_prefix='pose-view') if len(self.detectors) > 1 else None
+
+    @classmethod
+    def create(cls, factory: Callable[[], PoseDetector], views: int) -> 'MultiViewDetector':
+        return cls([factory() for _ in range(views)])
+
+    def detect(
+        self,
+        frames: Sequence[Optional[np.ndarray]],
+        frame_number: int,
+        timestamp: Optional[float] = None,
+        gates: Optional[Sequence[Optional[FrameQualityGate]]] = None,
+        budgets: Optional[Sequence[Optional[InferenceBudget]]] = None
+    ) -> MultiViewResult:
+        """
+        Detect every view of one synchronized frame tuple and blend them.
+
+        Args:
+            frames: One frame per camera, None where a camera has none
+            frame_number: Index of the tuple; the same for every view
+            timestamp: Presentation time in seconds
+            gates: Optional per-camera quality gates (they keep per-video state)
+            budgets: Optional per-camera inference budgets
+        """
+        if len(frames) != len(self.detectors):
+            raise ValueError(f"expected {len(self.detectors)} views, got {len(frames)}")
+        gates = gates or [None] * len(frames)
+        budgets = budgets or [None] * len(frames)
+
+        def run(view: int) -> Optional[DetectionResult]:
+            if frames[view] is None:
+                return None
+            return self.detectors[view].detect(frames[view], frame_number, gate=gates[view],
+                                               timestamp=timestamp, budget=budgets[view])
+
+        if self._executor is None:
+            views = [run(view) for view in range(len(frames))]
+        else:
+            futures = [self._executor.submit(run, view) for view in range(1, len(frames))]
+            views = [run(0)] + [future.result() for future in futures]
+        points, confidence = blend_views(views)
+        return MultiViewResult(points, confidence, views)
+
+    def iter_poses(
+        self,
+        video_paths: Sequence[str],
+        target_fps: Optional[float] = None,
+        enable_quality_gate: bool = True,
+        deadline: Optional[Deadline] = None,
+        align: bool = True
+    ) -> Iterator[Tuple[float, MultiViewResult]]:
+        """
+        Decode a multi-camera session and yield (timestamp, blended result)
+        per synchronized frame tuple, stopping early once the deadline passes.
+
+        Recordings from separate phones start at different times; with
+        `align` their offsets are estimated first, from the opening window of
+        each recording (kept in `self.alignment` for reporting), and applied
+        before frames are paired and blended.
+        """
+        if len(video_paths) != len(self.detectors):
+            raise ValueError(f"expected {len(self.detectors)} videos, got {len(video_paths)}")
+        deadline = deadline or Deadline()
+        self.alignment = align_views(video_paths, deadline=deadline) if align and len(video_paths) > 1 else None
+        if deadline.expired:
+            return
+        offsets = [offset.offset for offset in self.alignment] if self.alignment else None
+        self.reset_tracking()
+        gates = [FrameQualityGate() if enable_quality_gate else None for _ in video_paths]
+        budgets = [InferenceBudget(deadline=deadline) for _ in video_paths]
+        for frame_number, timestamp, frames in iter_synchronized_frames(video_paths, target_fps, offsets=offsets):
+            if deadline.expired:
+                break
+            yield timestamp, self.detect(frames, frame_number, timestamp, gates, budgets)
+
+    def reset_tracking(self):
+        for detector in self.detectors:
+            detector.reset_tracking()
+
+    def close(self):
+        """Stop the view threads; later calls detect the views one after another."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
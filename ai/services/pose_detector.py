@@ -13,66 +13,109 @@ from typing import List, Optional, Tuple, Dict
 from dataclasses import dataclass
 from collections import deque
 import logging
+from enum import Enum
+from .calibration import Calibration
 from .error_handling import (
-    PoseDetectionError, LowConfidenceError, InvalidFrameError,
-    NoLandmarksDetectedError, ProcessingTimeoutError,
-    exponential_backoff, fallback_enabled, log_execution_time
+    PoseDetectionError, InvalidFrameError
 )
+from .frame_quality import FrameQualityGate
+from .inference_budget import InferenceBudget
+from .landmark_buffer import VISIBILITY, landmarks_to_array
+from .metrics import RunningStats
+from .tracing import span, traced
 
 # Image processing configuration
 IMAGE_PROCESSING_CONFIG = {
     'target_size': (256, 256),  # Optimal size for pose detection
-    'max_dimension': 1080,  # Maximum dimension for any input
+    'luma_size': (64, 64),  # Downsampled luma plane used for brightness estimates
     'jpeg_quality': 90,  # JPEG compression quality
     'enable_gpu': True,  # Use GPU acceleration when available
     'batch_size': 4,  # Process frames in batches
-    'cache_size': 5,  # Number of frames to cache
     'brightness_threshold': 0.3,  # Minimum brightness threshold
     'contrast_limit': 3.0,  # CLAHE contrast limit
     'grid_size': (8, 8)  # CLAHE grid size
 }
 
-# TODO-MVP: Add camera calibration system for accurate velocity measurements
 # TODO-MVP: Implement multi-angle pose detection for improved accuracy
 # TODO-MVP: Add confidence thresholds for pose normalization
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 SUPPORTED_EXERCISES = ['squat', 'pushup', 'deadlift']
 MIN_CONFIDENCE_THRESHOLD = 0.5
-PROCESSING_TIMEOUT = 5.0  # seconds
+
+class DetectionStatus(Enum):
+    OK = "ok"
+    GATED = "gated"  # Rejected by the frame quality gate
+    SKIPPED = "skipped"  # Last pose reused while tracking is good
+    NO_POSE = "no_pose"
+    LOW_CONFIDENCE = "low_confidence"
+    INVALID_FRAME = "invalid_frame"
+    CIRCUIT_OPEN = "circuit_open"  # Not probed while the circuit is open
+    BUDGET_EXHAUSTED = "budget_exhausted"
+    ERROR = "error"
+
+@dataclass
+class DetectionResult:
+    status: DetectionStatus
+    landmarks: Optional[object] = None
+    points: Optional[np.ndarray] = None  # Landmarks as a (33, 4) float32 row: x, y, z, visibility
+    confidence: float = 0.0
+    attempts: int = 0  # pose.process calls spent on the frame
+    # Stage timings in seconds
+    preprocess_time: float = 0.0
+    inference_time: float = 0.0  # Primary attempt
+    fallback_time: float = 0.0  # Enhanced retry
+
+    @property
+    def ok(self) -> bool:
+        return self.status == DetectionStatus.OK
 
 @dataclass
 class ProcessingMetrics:
     frame_count: int = 0
     processed_frames: int = 0
     skipped_frames: int = 0
-    processing_times: List[float] = None
-    confidence_scores: List[float] = None
+    gated_frames: int = 0
+    processing_times: RunningStats = None  # ms per inference
+    confidence_scores: RunningStats = None
+    last_confidence: float = 0.0
     failures: int = 0
     
     def __post_init__(self):
-        self.processing_times = []
-        self.confidence_scores = []
+        self.processing_times = RunningStats()
+        self.confidence_scores = RunningStats()
     
     def add_processing_time(self, time_ms: float):
-        self.processing_times.append(time_ms)
+        self.processing_times.add(time_ms)
     
     def add_confidence_score(self, score: float):
-        self.confidence_scores.append(score)
+        self.confidence_scores.add(score)
+        self.last_confidence = score
     
     def compute_averages(self) -> Dict:
         return {
-            'avg_processing_time': np.mean(self.processing_times) if self.processing_times else 0,
-            'avg_confidence': np.mean(self.confidence_scores) if self.confidence_scores else 0,
+            'avg_processing_time': self.processing_times.mean,
+            'avg_confidence': self.confidence_scores.mean,
             'frame_processing_rate': self.processed_frames / self.frame_count if self.frame_count else 0,
             'failure_rate': self.failures / self.frame_count if self.frame_count else 0
         }
 
 class ImageProcessor:
-    def __init__(self):
+    """
+    Single-pass frame preprocessing for pose detection.
+
+    Each frame is resized once, straight from its source resolution to the
+    model input size. Brightness is estimated on a small luma plane, and CLAHE
+    runs only on frames that need it. All intermediates are written into
+    preallocated buffers, so the returned RGB frame is only valid until the
+    next call.
+    """
+
+    def __init__(self, target_size: Tuple[int, int] = IMAGE_PROCESSING_CONFIG['target_size']):
+        self.target_size = target_size
+        self.use_gpu = False
+        self.gpu_clahe = None
         if cv2 is None:
             self.clahe = None
         else:
@@ -80,7 +123,16 @@ class ImageProcessor:
                 clipLimit=IMAGE_PROCESSING_CONFIG['contrast_limit'],
                 tileGridSize=IMAGE_PROCESSING_CONFIG['grid_size']
             )
-        self.frame_cache = deque(maxlen=IMAGE_PROCESSING_CONFIG['cache_size'])
+
+        # Preallocated destination buffers, reused for every frame
+        width, height = target_size
+        luma_width, luma_height = IMAGE_PROCESSING_CONFIG['luma_size']
+        self._resized = np.empty((height, width, 3), dtype=np.uint8)
+        self._rgb = np.empty((height, width, 3), dtype=np.uint8)
+        self._lab = np.empty((height, width, 3), dtype=np.uint8)
+        self._l_channel = np.empty((height, width), dtype=np.uint8)
+        self._luma_thumb = np.empty((luma_height, luma_width, 3), dtype=np.uint8)
+        self._luma = np.empty((luma_height, luma_width), dtype=np.uint8)
         
         # Initialize GPU context if available
         if IMAGE_PROCESSING_CONFIG['enable_gpu'] and cv2 is not None:
@@ -92,56 +144,66 @@ class ImageProcessor:
                 self.use_gpu = False
                 logging.warning("GPU acceleration not available, falling back to CPU")
     
-    def preprocess_frame(self, frame: np.ndarray) -> np.ndarray:
-        """Optimize frame for pose detection."""
+    def preprocess_frame(self, frame: np.ndarray, force_enhance: bool = False) -> np.ndarray:
+        """
+        Optimize frame for pose detection.
+
+        Args:
+            frame: BGR frame at source resolution
+            force_enhance: Apply contrast enhancement regardless of brightness
+
+        Returns:
+            RGB frame of `target_size` backed by a reused buffer
+        """
+        if cv2 is None:
+            return frame
+        self.prepare(frame)
+        return self.to_model_input(force_enhance)
+
+    def prepare(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Resize a BGR frame to the model input size and refresh `luma`.
+
+        This is the only resize in the pipeline; quality checks read the luma
+        plane before `to_model_input` finishes the frame for inference.
+        """
         try:
             # Validate frame
             if frame is None or frame.size == 0:
                 raise InvalidFrameError("Invalid frame data")
-            
-            if cv2 is None:
-                return frame
 
-            # Resize if needed
-            h, w = frame.shape[:2]
-            if max(h, w) > IMAGE_PROCESSING_CONFIG['max_dimension']:
-                scale = IMAGE_PROCESSING_CONFIG['max_dimension'] / max(h, w)
-                new_size = (int(w * scale), int(h * scale))
-                frame = cv2.resize(frame, new_size)
-            
-            # Convert to RGB
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            
-            # Enhance low light conditions
-            if self._needs_enhancement(frame_rgb):
-                frame_rgb = self._enhance_frame(frame_rgb)
-            
-            # Resize to target size
-            frame_rgb = cv2.resize(frame_rgb, IMAGE_PROCESSING_CONFIG['target_size'])
-            
-            # Cache frame
-            self.frame_cache.append(frame_rgb)
-            
-            return frame_rgb
+            # One resize, straight to the model input size
+            cv2.resize(frame, self.target_size, dst=self._resized, interpolation=cv2.INTER_LINEAR)
+            cv2.resize(self._resized, IMAGE_PROCESSING_CONFIG['luma_size'], dst=self._luma_thumb, interpolation=cv2.INTER_AREA)
+            cv2.cvtColor(self._luma_thumb, cv2.COLOR_BGR2GRAY, dst=self._luma)
+            return self._resized
             
         except Exception as e:
             logging.error(f"Frame preprocessing failed: {str(e)}")
             raise InvalidFrameError(f"Frame preprocessing failed: {str(e)}")
-    
-    def _needs_enhancement(self, frame: np.ndarray) -> bool:
-        """Check if frame needs brightness/contrast enhancement."""
+
+    @property
+    def luma(self) -> np.ndarray:
+        """Downsampled grayscale plane of the last prepared frame."""
+        return self._luma
+
+    def to_model_input(self, force_enhance: bool = False) -> np.ndarray:
+        """Convert the last prepared frame to RGB, enhancing it if too dark."""
+        # Enhance low light conditions, otherwise just convert to RGB
+        if force_enhance or self._needs_enhancement():
+            return self._enhance_frame(self._resized)
+        return cv2.cvtColor(self._resized, cv2.COLOR_BGR2RGB, dst=self._rgb)
+    
+    def _needs_enhancement(self) -> bool:
+        """Check if the prepared frame needs brightness/contrast enhancement."""
         if cv2 is None:
             return False
-        # Convert to LAB color space
-        lab = cv2.cvtColor(frame, cv2.COLOR_RGB2LAB)
-        l_channel = lab[:,:,0]
-        
-        # Calculate average brightness
-        avg_brightness = np.mean(l_channel) / 255.0
+        # Average brightness of the downsampled luma plane
+        avg_brightness = cv2.mean(self._luma)[0] / 255.0
         return avg_brightness < IMAGE_PROCESSING_CONFIG['brightness_threshold']
     
     def _enhance_frame(self, frame: np.ndarray) -> np.ndarray:
-        """Enhance frame quality."""
+        """Enhance a BGR frame and return it as RGB."""
         if cv2 is None:
             return frame
         if self.use_gpu:
@@ -149,24 +211,22 @@ class ImageProcessor:
         return self._enhance_frame_cpu(frame)
     
     def _enhance_frame_cpu(self, frame: np.ndarray) -> np.ndarray:
-        """CPU-based frame enhancement."""
+        """CPU-based frame enhancement (BGR in, RGB out)."""
         if cv2 is None or self.clahe is None:
             return frame
         # Convert to LAB color space
-        lab = cv2.cvtColor(frame, cv2.COLOR_RGB2LAB)
-        l, a, b = cv2.split(lab)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2LAB, dst=self._lab)
         
-        # Apply CLAHE to L channel
-        cl = self.clahe.apply(l)
-        
-        # Merge channels
-        enhanced_lab = cv2.merge((cl, a, b))
+        # Apply CLAHE to L channel in place
+        cv2.extractChannel(self._lab, 0, dst=self._l_channel)
+        self.clahe.apply(self._l_channel, dst=self._l_channel)
+        cv2.insertChannel(self._l_channel, self._lab, 0)
         
         # Convert back to RGB
-        return cv2.cvtColor(enhanced_lab, cv2.COLOR_LAB2RGB)
+        return cv2.cvtColor(self._lab, cv2.COLOR_LAB2RGB, dst=self._rgb)
     
     def _enhance_frame_gpu(self, frame: np.ndarray) -> np.ndarray:
-        """GPU-accelerated frame enhancement."""
+        """GPU-accelerated frame enhancement (BGR in, RGB out)."""
         if cv2 is None:
             return frame
         try:
@@ -174,16 +234,18 @@ class ImageProcessor:
             gpu_frame = cv2.cuda_GpuMat(frame)
             
             # Convert to LAB
-            gpu_lab = cv2.cuda.cvtColor(gpu_frame, cv2.COLOR_RGB2LAB, stream=self.gpu_stream)
+            gpu_lab = cv2.cuda.cvtColor(gpu_frame, cv2.COLOR_BGR2LAB, stream=self.gpu_stream)
             
             # Split channels
             gpu_channels = cv2.cuda.split(gpu_lab)
             
             # Apply CLAHE
-            gpu_cl = cv2.cuda.createCLAHE(
-                clipLimit=IMAGE_PROCESSING_CONFIG['contrast_limit'],
-                tileGridSize=IMAGE_PROCESSING_CONFIG['grid_size']
-            ).apply(gpu_channels[0], stream=self.gpu_stream)
+            if self.gpu_clahe is None:
+                self.gpu_clahe = cv2.cuda.createCLAHE(
+                    clipLimit=IMAGE_PROCESSING_CONFIG['contrast_limit'],
+                    tileGridSize=IMAGE_PROCESSING_CONFIG['grid_size']
+                )
+            gpu_cl = self.gpu_clahe.apply(gpu_channels[0], stream=self.gpu_stream)
             
             # Merge channels
             gpu_enhanced = cv2.cuda.merge([gpu_cl, gpu_channels[1], gpu_channels[2]])
@@ -192,7 +254,7 @@ class ImageProcessor:
             gpu_result = cv2.cuda.cvtColor(gpu_enhanced, cv2.COLOR_LAB2RGB, stream=self.gpu_stream)
             
             # Download result
-            return gpu_result.download()
+            return gpu_result.download(dst=self._rgb)
             
         except Exception as e:
             logging.warning(f"GPU enhancement failed, falling back to CPU: {str(e)}")
@@ -207,6 +269,11 @@ class PoseDetector:
                  frame_buffer_size: int = 5,
                  calibration: Optional[Dict] = None):
         """Initialize pose detector with optimized settings."""
+        # Kept so per-camera siblings can be created with the same settings
+        self._init_kwargs = dict(model_complexity=model_complexity, min_detection_confidence=min_detection_confidence,
+                                 min_tracking_confidence=min_tracking_confidence,
+                                 enable_frame_skipping=enable_frame_skipping, frame_buffer_size=frame_buffer_size,
+                                 calibration=calibration)
         try:
             self.mp_pose = mp.solutions.pose if mp is not None else None
             self.pose = None if self.mp_pose is None else self.mp_pose.Pose(
@@ -217,24 +284,40 @@ class PoseDetector:
                 )
             
             self.enable_frame_skipping = enable_frame_skipping
-            self.frame_buffer = deque(maxlen=frame_buffer_size)
+            self.frame_buffer = deque(maxlen=frame_buffer_size)  # Sample indices of recent detections
+            self.sampled_frames = 0  # Frames of the current video passed to detect()
             self.metrics = ProcessingMetrics()
             self.last_successful_pose = None
+            self.last_successful_points = None
             self.consecutive_failures = 0
             self.image_processor = ImageProcessor()
             # Optional calibration info: {'pixelsPerMeter': float, 'homography': [...], 'tiltDeg': float}
-            self.calibration: Optional[Dict] = calibration if isinstance(calibration, dict) else None
+            self._default_calibration = Calibration.from_dict(calibration) if isinstance(calibration, dict) else None
+            self.calibration: Optional[Calibration] = self._default_calibration
             
         except Exception as e:
             logging.error(f"Failed to initialize MediaPipe Pose: {str(e)}")
             raise PoseDetectionError(f"Pose detector initialization failed: {str(e)}")
 
     def set_calibration(self, calibration: Optional[Dict]):
-        """Update calibration parameters used during normalization/blending."""
+        """
+        Calibrate the video being processed. Detectors are pooled, so this
+        lasts until the next reset_tracking; session calibrations belong in
+        calibration.CalibrationCache.
+        """
         if calibration is not None and not isinstance(calibration, dict):
             raise ValueError("calibration must be dict or None")
-        self.calibration = calibration
-    
+        self.calibration = Calibration.from_dict(calibration) if calibration is not None else None
+    
+    def reset_tracking(self):
+        """Forget the previous video so its pose is never reused for a new one."""
+        self.frame_buffer.clear()
+        self.sampled_frames = 0
+        self.last_successful_pose = None
+        self.last_successful_points = None
+        self.consecutive_failures = 0
+        self.calibration = self._default_calibration
+
     def validate_frame(self, frame: np.ndarray) -> None:
         """Validate frame data before processing."""
         if frame is None:
@@ -246,189 +329,189 @@ class PoseDetector:
         if len(frame.shape) != 3:
             raise InvalidFrameError("Frame must be a 3D array (height, width, channels)")
             
-    @log_execution_time
-    def detect_pose(self, frame: np.ndarray, frame_number: int) -> Tuple[Optional[mp.solutions.pose.PoseLandmarkList], float]:
-        """Detect pose in frame with performance optimizations."""
-        self.metrics.frame_count += 1
-        
-        try:
-            # Preprocess frame
-            processed_frame = self.image_processor.preprocess_frame(frame)
-            
-            # Check if we should skip this frame
-            if self.should_skip_frame(frame_number):
-                self.metrics.skipped_frames += 1
-                if self.last_successful_pose is None:
-                    raise NoLandmarksDetectedError("No previous pose available for skipped frame")
-                return self.last_successful_pose, self.metrics.confidence_scores[-1] if self.metrics.confidence_scores else 0
-            
-            # Set processing timeout
-            start_time = time.time()
-            
-            # Detect pose
-            if self.pose is None:
-                raise PoseDetectionError("Pose model not available")
-            results = self.pose.process(processed_frame)
-            
-            # Check processing time
-            if time.time() - start_time > PROCESSING_TIMEOUT:
-                raise ProcessingTimeoutError(f"Pose detection exceeded timeout of {PROCESSING_TIMEOUT}s")
-            
-            if results.pose_landmarks:
-                self.metrics.processed_frames += 1
-                self.consecutive_failures = 0
-                
-                # Calculate confidence score
-                confidence = sum(lm.visibility for lm in results.pose_landmarks.landmark) / len(results.pose_landmarks.landmark)
-                
-                # Check confidence threshold
-                if confidence < MIN_CONFIDENCE_THRESHOLD:
-                    raise LowConfidenceError(f"Low confidence score: {confidence:.2f}")
-                
-                self.metrics.add_confidence_score(confidence)
-                self.last_successful_pose = results.pose_landmarks
-                self.frame_buffer.append(frame_number)
-                
-                return results.pose_landmarks, confidence
-                
-            else:
-                raise NoLandmarksDetectedError("No pose landmarks detected in frame")
-                
-        except Exception as e:
-            self.metrics.failures += 1
-            self.consecutive_failures += 1
-            logging.error(f"Error processing frame {frame_number}: {str(e)}")
-            raise PoseDetectionError(f"Pose detection failed: {str(e)}")
-            
-    def should_skip_frame(self, frame_number: int) -> bool:
-        """Determine if frame should be skipped based on motion and performance."""
+    def should_skip_frame(self, sample_index: int) -> bool:
+        """
+        Determine if frame should be skipped based on motion and performance.
+
+        Args:
+            sample_index: Position of the frame among those sampled from the
+                video; source frame numbers would alias with the sampling
+                stride (every sampled frame of a 60 fps video is even)
+        """
         if not self.enable_frame_skipping or len(self.frame_buffer) < 2:
             return False
             
         # Skip every other frame if we have good tracking
-        if self.consecutive_failures == 0 and frame_number % 2 == 0:
+        if self.consecutive_failures == 0 and sample_index % 2 == 0:
             return True
             
         # Calculate motion between frames
         prev_frame = self.frame_buffer[-1]
-        curr_frame = frame_number
+        curr_frame = sample_index
         motion = abs(curr_frame - prev_frame)
         
         # Skip if motion is minimal
         return motion < 0.1
         
-    @exponential_backoff(max_retries=3, base_delay=0.1, max_delay=2.0)
-    @fallback_enabled(fallback_func='fallback_detection')
-    @log_execution_time
-    def detect_pose(self, frame: np.ndarray, frame_number: int) -> Tuple[Optional[mp.solutions.pose.PoseLandmarkList], float]:
+    @traced()
+    def detect(
+        self,
+        frame: np.ndarray,
+        frame_number: int,
+        gate: Optional[FrameQualityGate] = None,
+        timestamp: Optional[float] = None,
+        budget: Optional[InferenceBudget] = None
+    ) -> DetectionResult:
         """
-        Detect pose in frame with performance optimizations.
-        
+        Detect pose in frame within a bounded inference budget.
+
+        The frame gets one inference and, if that finds nobody, one retry on a
+        contrast-enhanced copy. Nothing sleeps and per-frame failures are
+        reported through the result status rather than raised.
+
         Args:
             frame: Input frame
             frame_number: Current frame number
-        
+            gate: Optional per-video quality gate checked before inference
+            timestamp: Presentation time of the frame in seconds
+            budget: Per-video inference budget; without one only the
+                per-frame limits apply
+
         Returns:
-            Tuple of (landmarks, confidence_score)
+            DetectionResult with landmarks set for OK and SKIPPED frames
         """
         self.metrics.frame_count += 1
+        sample_index = self.sampled_frames
+        self.sampled_frames += 1
+        if budget is None:
+            budget = InferenceBudget()
         
+        start_time = time.perf_counter()
         try:
-            # Validate and preprocess frame
+            # Validate and resize frame
             self.validate_frame(frame)
-            processed_frame = self.preprocess_frame(frame)
-            
-            # Check if we should skip this frame
-            if self.should_skip_frame(frame_number):
-                self.metrics.skipped_frames += 1
-                if self.last_successful_pose is None:
-                    raise NoLandmarksDetectedError("No previous pose available for skipped frame")
-                return self.last_successful_pose, self.metrics.confidence_scores[-1] if self.metrics.confidence_scores else 0
-            
-            # Set processing timeout
-            start_time = time.time()
-            
-            # Detect pose
-            results = self.pose.process(processed_frame)
-            
-            # Check processing time
-            if time.time() - start_time > PROCESSING_TIMEOUT:
-                raise ProcessingTimeoutError(f"Pose detection exceeded timeout of {PROCESSING_TIMEOUT}s")
-            
-            if results.pose_landmarks:
-                self.metrics.processed_frames += 1
-                self.consecutive_failures = 0
-                
-                # Calculate confidence score
-                confidence = sum(lm.visibility for lm in results.pose_landmarks.landmark) / len(results.pose_landmarks.landmark)
-                
-                # Check confidence threshold
-                if confidence < MIN_CONFIDENCE_THRESHOLD:
-                    raise LowConfidenceError(f"Low confidence score: {confidence:.2f}")
-                
-                self.metrics.add_confidence_score(confidence)
-                self.last_successful_pose = results.pose_landmarks
-                self.frame_buffer.append(frame_number)
-                
-                logger.debug(f"Frame {frame_number} processed successfully. Confidence: {confidence:.2f}")
-                return results.pose_landmarks, confidence
-                
-            else:
-                raise NoLandmarksDetectedError("No pose landmarks detected in frame")
-                
-        except Exception as e:
+            self.image_processor.prepare(frame)
+        except InvalidFrameError as e:
+            self.metrics.failures += 1
+            logger.warning("Skipping invalid frame %d: %s", frame_number, e)
+            return DetectionResult(DetectionStatus.INVALID_FRAME, preprocess_time=time.perf_counter() - start_time)
+        
+        # Reject frames that inference would fail on anyway
+        gated = gate is not None and gate.check(self.image_processor.luma, timestamp) is not None
+        preprocess_time = time.perf_counter() - start_time
+        if gated:
+            self.metrics.gated_frames += 1
+            return DetectionResult(DetectionStatus.GATED, preprocess_time=preprocess_time)
+        
+        # Reuse the last pose while tracking is good
+        if self.last_successful_pose is not None and self.should_skip_frame(sample_index):
+            self.metrics.skipped_frames += 1
+            return DetectionResult(DetectionStatus.SKIPPED, self.last_successful_pose, self.last_successful_points,
+                                   self.metrics.last_confidence, preprocess_time=preprocess_time)
+        
+        if self.pose is None:
+            return DetectionResult(DetectionStatus.ERROR, preprocess_time=preprocess_time)
+        if budget.exhausted:
+            return DetectionResult(DetectionStatus.BUDGET_EXHAUSTED, preprocess_time=preprocess_time)
+        if not budget.begin_frame():
+            return DetectionResult(DetectionStatus.CIRCUIT_OPEN, preprocess_time=preprocess_time)
+        
+        result = self._infer(frame_number, budget)
+        result.preprocess_time += preprocess_time
+        
+        budget.end_frame(result.ok)
+        if gate is not None and result.attempts:
+            gate.record_detection(result.status in (DetectionStatus.OK, DetectionStatus.LOW_CONFIDENCE))
+        
+        if result.ok:
+            self.metrics.processed_frames += 1
+            self.metrics.add_confidence_score(result.confidence)
+            self.consecutive_failures = 0
+            self.last_successful_pose = result.landmarks
+            self.last_successful_points = result.points
+            self.frame_buffer.append(sample_index)
+            logger.debug("Frame %d processed successfully. Confidence: %.2f", frame_number, result.confidence)
+        else:
             self.metrics.failures += 1
             self.consecutive_failures += 1
-            logger.error(f"Error processing frame {frame_number}: {str(e)}")
-            raise PoseDetectionError(f"Pose detection failed: {str(e)}")
-            
-    @log_execution_time
-    def fallback_detection(self, frame: np.ndarray) -> Tuple[Optional[mp.solutions.pose.PoseLandmarkList], float]:
-        """Fallback detection method for challenging frames."""
-        try:
-            logger.info("Attempting fallback detection with enhanced preprocessing...")
-            
-            # Try with different preprocessing
-            enhanced_frame = self.enhance_frame_quality(frame)
-            results = self.pose.process(enhanced_frame)
+            logger.debug("Frame %d: %s after %d attempt(s)", frame_number, result.status.value, result.attempts)
+        return result
+    
+    def _infer(self, frame_number: int, budget: InferenceBudget) -> DetectionResult:
+        """Run the primary and, budget permitting, the enhanced attempt on the prepared frame."""
+        result = DetectionResult(DetectionStatus.NO_POSE)
+        # A dark frame is already enhanced on the first attempt
+        enhance_passes = (True,) if self.image_processor._needs_enhancement() else (False, True)
+        
+        for force_enhance in enhance_passes:
+            if not budget.allow_attempt():
+                break
+            prepare_start = time.perf_counter()
+            model_input = self.image_processor.to_model_input(force_enhance)
+            start_time = time.perf_counter()
+            result.preprocess_time += start_time - prepare_start
+            try:
+                with span('inference' if result.attempts == 0 else 'fallback'):
+                    results = self.pose.process(model_input)
+            except Exception as e:
+                logger.error("Error processing frame %d: %s", frame_number, e)
+                results = None
+                result.status = DetectionStatus.ERROR
+            elapsed = time.perf_counter() - start_time
+            budget.record_inference(elapsed)
+            self.metrics.add_processing_time(elapsed * 1000)
+            if result.attempts == 0:
+                result.inference_time = elapsed
+            else:
+                result.fallback_time += elapsed
+            result.attempts += 1
             
-            if results.pose_landmarks:
-                confidence = sum(lm.visibility for lm in results.pose_landmarks.landmark) / len(results.pose_landmarks.landmark)
-                logger.info(f"Fallback detection succeeded with confidence: {confidence:.2f}")
-                return results.pose_landmarks, confidence
-                
-            raise NoLandmarksDetectedError("Fallback detection failed to detect landmarks")
+            if results is None:
+                break
+            if not results.pose_landmarks:
+                continue
             
-        except Exception as e:
-            logger.error(f"Fallback detection failed: {str(e)}")
-            # Return last successful pose if available, otherwise raise
-            if self.last_successful_pose:
-                logger.warning("Using last successful pose as ultimate fallback")
-                return self.last_successful_pose, 0.5
-            raise
+            # The one conversion of the result; everything downstream reads the row
+            points = landmarks_to_array(results.pose_landmarks)
+            confidence = float(points[:, VISIBILITY].mean())
+            if confidence >= MIN_CONFIDENCE_THRESHOLD:
+                result.status = DetectionStatus.OK
+                result.landmarks = results.pose_landmarks
+                result.points = points
+                result.confidence = confidence
+                break
+            result.status = DetectionStatus.LOW_CONFIDENCE
+            result.confidence = max(result.confidence, confidence)
+        
+        return result
+    
+    def detect_pose(
+        self,
+        frame: np.ndarray,
+        frame_number: int,
+        gate: Optional[FrameQualityGate] = None,
+        timestamp: Optional[float] = None,
+        budget: Optional[InferenceBudget] = None
+    ) -> Tuple[Optional[mp.solutions.pose.PoseLandmarkList], float]:
+        """
+        Tuple form of `detect`.
+        
+        Returns:
+            Tuple of (landmarks, confidence_score); landmarks is None whenever
+            the frame produced no usable pose
+        """
+        result = self.detect(frame, frame_number, gate=gate, timestamp=timestamp, budget=budget)
+        return result.landmarks, result.confidence
             
-    @log_execution_time
+    @traced()
     def enhance_frame_quality(self, frame: np.ndarray) -> np.ndarray:
-        """Enhance frame quality for better detection."""
+        """Enhance frame quality for better detection (BGR in, RGB out)."""
         try:
-            # Convert to LAB color space
-            lab = cv2.cvtColor(frame, cv2.COLOR_RGB2LAB)
-            l, a, b = cv2.split(lab)
-            
-            # Apply CLAHE to L channel
-            clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8,8))
-            cl = clahe.apply(l)
-            
-            # Merge channels
-            enhanced = cv2.merge((cl,a,b))
-            
-            # Convert back to RGB
-            enhanced_rgb = cv2.cvtColor(enhanced, cv2.COLOR_LAB2RGB)
-            
-            return enhanced_rgb
+            # Reuses the processor's cached CLAHE and buffers
+            return self.image_processor.preprocess_frame(frame, force_enhance=True)
             
         except Exception as e:
-            logger.error(f"Frame quality enhancement failed: {str(e)}")
+            logger.error("Frame quality enhancement failed: %s", e)
             return frame  # Return original frame if enhancement fails
             
     def get_performance_metrics(self) -> Dict:
@@ -438,6 +521,7 @@ class PoseDetector:
             'total_frames': self.metrics.frame_count,
             'processed_frames': self.metrics.processed_frames,
             'skipped_frames': self.metrics.skipped_frames,
+            'gated_frames': self.metrics.gated_frames,
             'failures': self.metrics.failures,
             'consecutive_failures': self.consecutive_failures
         })
@@ -481,13 +565,9 @@ class PoseDetector:
         """Process a batch of frames efficiently."""
         results = []
         for i, frame in enumerate(frames):
-            try:
-                landmarks, _ = self.detect_pose(frame, len(results))
-                if landmarks:
-                    results.append(landmarks)
-            except Exception as e:
-                logging.warning(f"Failed to process frame in batch: {str(e)}")
-                continue
+            landmarks, _ = self.detect_pose(frame, len(results))
+            if landmarks:
+                results.append(landmarks)
         return results
         
     def calculate_angles(self, landmarks: Dict) -> Dict[str, float]:
@@ -1787,15 +1867,53 @@ def multiAngleBlend(poses_from_views: List[Dict]) -> Dict:
     
     
     
-    
-    
-    
-    
-    
-    
-    
-    
-    
+
+def normalize_pose_array(points: np.ndarray) -> np.ndarray:
+    """
+    normalize_pose on (..., 33, 4) landmark rows: centered at the hip
+    center, body axis rotated onto +Y and scaled by shoulder width. Rows
+    whose shoulders/hips are missing or degenerate are returned unchanged.
+    """
+    LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_HIP, RIGHT_HIP = 11, 12, 23, 24
+    points = np.asarray(points, dtype=np.float32)
+    xy = points[..., :2]
+    shoulder_center = (xy[..., LEFT_SHOULDER, :] + xy[..., RIGHT_SHOULDER, :]) / 2
+    hip_center = (xy[..., LEFT_HIP, :] + xy[..., RIGHT_HIP, :]) / 2
+    axis = hip_center - shoulder_center
+    shoulder_width = np.linalg.norm(xy[..., LEFT_SHOULDER, :] - xy[..., RIGHT_SHOULDER, :], axis=-1)
+    valid = (np.linalg.norm(axis, axis=-1) >= 1e-6) & (shoulder_width >= 1e-6)  # False for NaN too
+
+    angle = np.arctan2(axis[..., 0], axis[..., 1])
+    cos_t, sin_t = np.cos(-angle), np.sin(-angle)
+    centered = xy - hip_center[..., None, :]
+    scale = 1.0 / np.where(valid, shoulder_width, 1.0)
+    out = points.copy()
+    out[..., 0] = np.where(valid[..., None], (cos_t[..., None] * centered[..., 0] - sin_t[..., None] * centered[..., 1])
+                           * scale[..., None], points[..., 0])
+    out[..., 1] = np.where(valid[..., None], (sin_t[..., None] * centered[..., 0] + cos_t[..., None] * centered[..., 1])
+                           * scale[..., None], points[..., 1])
+    return out
+
+
+def blend_pose_arrays(views: np.ndarray) -> np.ndarray:
+    """
+    multiAngleBlend on a (views, 33, 4) stack: x/y averaged per joint
+    weighted by visibility, visibility averaged. Joints no view saw with
+    any visibility keep the last view's values.
+    """
+    views = np.asarray(views, dtype=np.float32)
+    weights = np.nan_to_num(views[..., VISIBILITY])
+    present = ~np.isnan(views[..., :2]).any(axis=-1)
+    weights = np.where(present, weights, 0.0)
+    total = weights.sum(axis=0)
+    xy = np.nan_to_num(views[..., :2]) * weights[..., None]
+    out = views[-1].copy()
+    blended = total > 0
+    out[blended, :2] = xy.sum(axis=0)[blended] / total[blended, None]
+    out[blended, VISIBILITY] = np.nanmean(np.where(present, views[..., VISIBILITY], np.nan), axis=0)[blended]
+    return out
+
+
 def _results_to_landmarks_dict(results_landmarks) -> Dict:
     """Convert MediaPipe landmarks to a landmarks dict keyed by index with x,y,visibility."""
     if results_landmarks is None:
@@ -1822,29 +1940,22 @@ class PoseDetector(PoseDetector):  # extend with multi-view utilities
         """
         Detect pose from multiple synchronized frames (views), normalize per-view,
         and blend landmarks using confidence-weighted averaging.
+
+        The first view runs on this detector and every other view on a
+        detector of its own, created with the same settings on first use, so
+        each camera keeps independent tracking state; the views are detected
+        in parallel. Sessions known up front should use MultiViewDetector.
+
         Returns blended landmarks dict and aggregated confidence.
         """
         if not frames:
             return {}, 0.0
-        per_view: List[Dict] = []
-        confidences: List[float] = []
-        for i, f in enumerate(frames):
-            try:
-                lm, conf = self.detect_pose(f, frame_number + i)
-                confidences.append(conf)
-                if lm is None:
-                    continue
-                lm_dict = _results_to_landmarks_dict(lm)
-                # Confidence gate for normalization
-                vis = _avg_visibility(lm_dict, [11,12,23,24])  # shoulders/hips
-                if vis >= MIN_CONFIDENCE_THRESHOLD:
-                    lm_dict = normalize_pose(lm_dict)
-                per_view.append(lm_dict)
-            except Exception as e:
-                logger.warning(f"Multi-view detection failed on view {i}: {e}")
-                continue
-        if not per_view:
-            return {}, 0.0
-        blended = multiAngleBlend(per_view)
-        agg_conf = float(np.mean(confidences)) if confidences else 0.0
-        return blended, agg_conf
\ No newline at end of file
+        from .multi_view import MultiViewDetector
+        views = getattr(self, '_multi_view', None)
+        if views is None or len(views.detectors) != len(frames):
+            if views is not None:
+                views.close()
+            views = self._multi_view = MultiViewDetector(
+                [self] + [PoseDetector(**self._init_kwargs) for _ in frames[1:]])
+        result = views.detect(frames, frame_number)
+        return result.landmarks, result.confidence
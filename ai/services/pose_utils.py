@@ -3,7 +3,19 @@ from typing import List, Dict, Tuple, Optional
 from enum import Enum
 from dataclasses import dataclass
 from scipy.signal import savgol_filter
-from filterpy.kalman import KalmanFilter
+from .landmark_filters import create_landmark_filter
+
+# MediaPipe Pose landmark names, in index order
+POSE_LANDMARK_NAMES = [
+    'nose', 'left_eye_inner', 'left_eye', 'left_eye_outer', 'right_eye_inner', 'right_eye',
+    'right_eye_outer', 'left_ear', 'right_ear', 'mouth_left', 'mouth_right', 'left_shoulder',
+    'right_shoulder', 'left_elbow', 'right_elbow', 'left_wrist', 'right_wrist', 'left_pinky',
+    'right_pinky', 'left_index', 'right_index', 'left_thumb', 'right_thumb', 'left_hip', 'right_hip',
+    'left_knee', 'right_knee', 'left_ankle', 'right_ankle', 'left_heel', 'right_heel',
+    'left_foot_index', 'right_foot_index'
+]
+_LANDMARK_INDEX = {**{name: i for i, name in enumerate(POSE_LANDMARK_NAMES)},
+                   **{str(i): i for i in range(len(POSE_LANDMARK_NAMES))}}
 
 class JointAngle(Enum):
     HIP = "hip"
@@ -27,10 +39,9 @@ class NormalizedPose:
     rotation_matrix: np.ndarray
 
 class PoseNormalizer:
-    def __init__(self):
-        # Initialize Kalman filters for each joint
-        self.joint_filters = {}
-        self.init_kalman_filters()
+    def __init__(self, filter_method: Optional[str] = None):
+        # Landmark smoothing ('kalman' or 'one_euro'); filter state is per session
+        self.filter_method = filter_method
         
         # Reference points for coordinate system
         self.reference_points = {
@@ -46,27 +57,21 @@ class PoseNormalizer:
             'optional': 0.3   # Non-essential joints
         }
 
-    def init_kalman_filters(self):
-        """Initialize Kalman filters for joint tracking"""
-        for joint in ['hip', 'knee', 'ankle', 'shoulder', 'elbow', 'wrist']:
-            kf = KalmanFilter(dim_x=4, dim_z=2)  # State: [x, y, dx, dy], Measurement: [x, y]
-            kf.F = np.array([[1, 0, 1, 0],
-                           [0, 1, 0, 1],
-                           [0, 0, 1, 0],
-                           [0, 0, 0, 1]])  # State transition matrix
-            kf.H = np.array([[1, 0, 0, 0],
-                           [0, 1, 0, 0]])  # Measurement function
-            kf.R *= 0.1  # Measurement noise
-            kf.Q *= 0.1  # Process noise
-            self.joint_filters[joint] = kf
+    def create_filter(self):
+        """Landmark filter for one session (streaming use with normalize_pose)."""
+        return create_landmark_filter(self.filter_method)
 
-    def normalize_pose(self, landmarks: Dict[str, np.ndarray], image_size: Tuple[int, int]) -> NormalizedPose:
+    def normalize_pose(self, landmarks: Dict[str, np.ndarray], image_size: Tuple[int, int],
+                       landmark_filter=None, timestamp: Optional[float] = None) -> NormalizedPose:
         """
         Normalize pose landmarks to be camera angle and distance invariant.
         
         Args:
             landmarks: Dictionary of joint positions
             image_size: (width, height) of input image
+            landmark_filter: Session filter from create_filter(); the pose
+                is smoothed against the session's earlier frames when given
+            timestamp: Presentation time of the frame in seconds
             
         Returns:
             NormalizedPose with transformed landmarks and confidence scores
@@ -91,11 +96,11 @@ class PoseNormalizer:
         scale_factor = self._calculate_scale_factor(rotated_pose, image_size)
         normalized_pose = self._scale_pose(rotated_pose, scale_factor)
         
-        # Apply Kalman filtering
-        filtered_pose = self._apply_kalman_filtering(normalized_pose)
+        if landmark_filter is not None:
+            normalized_pose = self._apply_landmark_filter(normalized_pose, landmark_filter, timestamp)
         
         return NormalizedPose(
-            landmarks=filtered_pose,
+            landmarks=normalized_pose,
             confidence=confidence,
             scale_factor=scale_factor,
             rotation_matrix=rotation_matrix
@@ -181,20 +186,27 @@ class PoseNormalizer:
             scaled[joint] = scaled_pos
         return scaled
 
-    def _apply_kalman_filtering(self, landmarks: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
-        """Apply Kalman filtering to joint positions"""
-        filtered = {}
-        for joint, pos in landmarks.items():
-            if joint in self.joint_filters:
-                kf = self.joint_filters[joint]
-                measurement = pos[:2]
-                kf.predict()
-                kf.update(measurement)
-                filtered_pos = np.append(kf.x[:2], pos[2:] if len(pos) > 2 else [])
-                filtered[joint] = filtered_pos
-            else:
-                filtered[joint] = pos
-        return filtered
+    def smooth_sequence(self, poses: List[NormalizedPose], timestamps: Optional[List[float]] = None) -> List[NormalizedPose]:
+        """
+        Smooth the landmarks of a whole normalized sequence in place.
+
+        All frames are filtered at once with a forward-backward pass, so
+        there is no lag and every frame benefits from the frames after it.
+        """
+        if not poses:
+            return poses
+        points, visibility = _landmark_arrays([pose.landmarks for pose in poses])
+        times = np.asarray(timestamps, dtype=float) if timestamps is not None else None
+        smoothed = create_landmark_filter(self.filter_method).smooth(points, visibility, times)
+        for pose, frame in zip(poses, smoothed):
+            pose.landmarks = _write_landmarks(pose.landmarks, frame)
+        return poses
+
+    def _apply_landmark_filter(self, landmarks: Dict[str, np.ndarray], landmark_filter,
+                               timestamp: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """Filter one frame's landmarks against the session's earlier frames"""
+        points, visibility = _landmark_arrays([landmarks])
+        return _write_landmarks(landmarks, landmark_filter.update(points[0], visibility[0], timestamp))
 
     def _get_reference_point(self, landmarks: Dict[str, np.ndarray], point_name: str) -> Optional[np.ndarray]:
         """Get reference point coordinates (e.g. hip center, shoulder center)"""
@@ -235,6 +247,36 @@ class PoseNormalizer:
             
         return np.linalg.norm(spine_vector)
 
+def _landmark_arrays(frames: List[Dict[str, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Gather landmark dicts keyed by name or index into (frames, 33, 2)
+    positions and (frames, 33) visibility; NaN where a joint is absent.
+    """
+    points = np.full((len(frames), len(POSE_LANDMARK_NAMES), 2), np.nan)
+    visibility = np.full((len(frames), len(POSE_LANDMARK_NAMES)), np.nan)
+    for t, landmarks in enumerate(frames):
+        for key, pos in landmarks.items():
+            index = _LANDMARK_INDEX.get(key)
+            if index is None:
+                continue
+            pos = np.asarray(pos, dtype=float)
+            points[t, index] = pos[:2]
+            visibility[t, index] = pos[2] if len(pos) > 2 else 1.0
+    return points, visibility
+
+
+def _write_landmarks(landmarks: Dict[str, np.ndarray], filtered: np.ndarray) -> Dict[str, np.ndarray]:
+    """Copy of landmarks with the filtered (33, 2) positions written back."""
+    out = {}
+    for key, pos in landmarks.items():
+        index = _LANDMARK_INDEX.get(key)
+        if index is not None and np.isfinite(filtered[index]).all():
+            pos = np.array(pos, dtype=float)
+            pos[:2] = filtered[index]
+        out[key] = pos
+    return out
+
+
 def calculate_angle(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> float:
     """Calculate angle between three points"""
     ba = a - b
@@ -254,7 +296,7 @@ def smooth_angles(angles: List[float], window_size: int = 5) -> List[float]:
 
 def calculate_stability(angles: List[float]) -> float:
     """Calculate movement stability score"""
-    if not angles:
+    if len(angles) == 0:
         return 0.0
         
     std_dev = np.std(angles)
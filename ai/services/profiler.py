@@ -0,0 +1,108 @@
+from typing import Dict, Optional
+from collections import Counter
+import os
+import sys
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# On-demand profiler configuration
+PROFILER_CONFIG = {
+    'interval': 0.005,  # Seconds between stack samples (200 Hz)
+    'max_duration': 300.0,  # Stop sampling after this long
+    'max_depth': 128,  # Innermost frames kept per stack
+    'max_concurrent': 1  # Profiled requests at once per process; others run unprofiled
+}
+
+_slots = threading.BoundedSemaphore(PROFILER_CONFIG['max_concurrent'])
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for a single thread.
+
+    A background thread reads the target thread's stack from
+    `sys._current_frames()` at a fixed interval and counts identical stacks.
+    The result is written in collapsed-stack format (`outer;inner count` per
+    line), which flamegraph.pl and speedscope read directly. Only the
+    profiled thread is inspected, and the number of concurrent profiles is
+    capped, so other requests pay at most the sampler's GIL time.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = PROFILER_CONFIG['interval']):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> bool:
+        """Start sampling; False if the per-process profile limit is reached."""
+        if not _slots.acquire(blocking=False):
+            logger.warning("Profiler busy; running request unprofiled")
+            return False
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="velox-profiler", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.duration = time.perf_counter() - self.started_at
+        _slots.release()
+
+    def _run(self):
+        max_depth = PROFILER_CONFIG['max_depth']
+        deadline = self.started_at + PROFILER_CONFIG['max_duration']
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            labels = []
+            while frame is not None and len(labels) < max_depth:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.reverse()
+            self.stacks[';'.join(labels)] += 1
+            self.samples += 1
+            if time.perf_counter() > deadline:
+                break
+
+    def collapsed(self) -> str:
+        """Collapsed stacks, one `frame;frame;... count` line per distinct stack."""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def write(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(self.collapsed())
+
+    def summary(self) -> Dict:
+        return {
+            'samples': self.samples,
+            'interval_ms': self.interval * 1000,
+            'duration_seconds': round(self.duration, 3),
+            'distinct_stacks': len(self.stacks)
+        }
+
+    def __enter__(self) -> 'SamplingProfiler':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.stop()
+        return False
@@ -0,0 +1,127 @@
+"""
+Vectorized rep segmentation of a joint-angle (or bar height) signal.
+
+The signal is thresholded with hysteresis into "top" and "bottom" states;
+every bottom episode between two top episodes is one rep, running from
+where the signal leaves the top before it, through its lowest point, to
+where it is back at the top after it. Jitter inside the hysteresis band never changes state, so
+noisy signals do not produce extra reps, and everything is computed with
+array operations rather than a per-frame loop.
+"""
+from typing import List, NamedTuple, Optional, Sequence
+import numpy as np
+
+# Rep segmentation configuration
+REP_SEGMENTATION_CONFIG = {
+    'prominence': 0.3,  # Band between the top and bottom thresholds, as a fraction of the signal range
+    'min_frames': 10,  # Shorter reps are dropped
+    'min_range': 15.0,  # Signal range (e.g. degrees) below which there is no movement to count
+    'top_tolerance': 0.02,  # A rep leaves / reaches the top within this fraction of the range of the top's peak
+    'range_percentiles': (5, 95)  # Robust signal range, ignoring outlier frames
+}
+
+
+class RepBounds(NamedTuple):
+    start: np.ndarray  # Frame index where the rep leaves the top
+    bottom: np.ndarray  # Frame index of the lowest point of the rep
+    end: np.ndarray  # Frame index where the rep is back at the top
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def rows(self) -> List[List[int]]:
+        """[start, bottom, end] per rep, for JSON."""
+        return np.column_stack(self).tolist()
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence[int]]) -> 'RepBounds':
+        columns = np.asarray(rows, dtype=np.int64).reshape(-1, 3).T
+        return cls(*columns)
+
+
+def fill_gaps(signal: np.ndarray) -> Optional[np.ndarray]:
+    """Signal with NaN frames linearly interpolated; None with fewer than three valid frames."""
+    signal = np.asarray(signal, dtype=np.float64)
+    finite = np.isfinite(signal)
+    if finite.sum() < 3:
+        return None
+    if finite.all():
+        return signal
+    frames = np.arange(len(signal))
+    return np.interp(frames, frames[finite], signal[finite])
+
+
+def _empty_bounds() -> RepBounds:
+    empty = np.empty(0, dtype=np.int64)
+    return RepBounds(empty, empty, empty)
+
+
+def _run_reach(signal: np.ndarray, run_starts: np.ndarray, tolerance: float) -> tuple:
+    """First and last frame of each run within `tolerance` of the run's maximum."""
+    peaks = np.maximum.reduceat(signal, run_starts)
+    run_ids = np.repeat(np.arange(len(run_starts)), np.diff(np.append(run_starts, len(signal))))
+    hits = np.flatnonzero(signal >= peaks[run_ids] - tolerance)
+    hit_runs = run_ids[hits]
+    first = np.flatnonzero(np.diff(hit_runs, prepend=-1))
+    last = np.append(first[1:], len(hits)) - 1
+    return hits[first], hits[last]
+
+
+def find_reps(
+    signal: np.ndarray,
+    prominence: Optional[float] = None,
+    min_frames: Optional[int] = None,
+    min_range: Optional[float] = None,
+    rest_high: bool = True
+) -> RepBounds:
+    """
+    Find the reps of a movement signal.
+
+    Args:
+        signal: One value per frame; NaN frames are interpolated
+        prominence: Hysteresis band as a fraction of the signal range; a
+            rep must cross the whole band down and back up
+        min_frames: Reps spanning fewer frames are dropped
+        min_range: Below this signal range nothing is counted
+        rest_high: True when the rest position is the high end of the
+            signal (joint angles at lockout); False to count valleys-up
+            movements such as bar height in a deadlift
+
+    Returns:
+        RepBounds with one entry per rep, in frame order
+    """
+    prominence = REP_SEGMENTATION_CONFIG['prominence'] if prominence is None else prominence
+    min_frames = REP_SEGMENTATION_CONFIG['min_frames'] if min_frames is None else min_frames
+    min_range = REP_SEGMENTATION_CONFIG['min_range'] if min_range is None else min_range
+
+    signal = fill_gaps(signal)
+    if signal is None:
+        return _empty_bounds()
+    if not rest_high:
+        signal = -signal
+
+    low, high = np.percentile(signal, REP_SEGMENTATION_CONFIG['range_percentiles'])
+    if high - low < min_range:
+        return _empty_bounds()
+    middle, band = (high + low) / 2, prominence * (high - low) / 2
+
+    # Schmitt trigger: +1 at the top, -1 at the bottom, held inside the band
+    state = np.where(signal > middle + band, 1, np.where(signal < middle - band, -1, 0))
+    decided = np.flatnonzero(state)
+    if not len(decided):
+        return _empty_bounds()
+    held = np.maximum.accumulate(np.where(state != 0, np.arange(len(state)), 0))
+    held[:decided[0]] = decided[0]
+    state = state[held]
+
+    run_starts = np.concatenate(([0], np.flatnonzero(np.diff(state)) + 1))
+    run_states = state[run_starts]
+    reaches_top, leaves_top = _run_reach(signal, run_starts, REP_SEGMENTATION_CONFIG['top_tolerance'] * (high - low))
+    bottoms, _ = _run_reach(-signal, run_starts, 0.0)
+
+    # Bottom runs with a top run on both sides
+    runs = np.flatnonzero(run_states == -1)
+    runs = runs[(runs > 0) & (runs < len(run_starts) - 1)]
+    bounds = RepBounds(leaves_top[runs - 1], bottoms[runs], reaches_top[runs + 1])
+    keep = bounds.end - bounds.start >= min_frames
+    return RepBounds(*(column[keep] for column in bounds))
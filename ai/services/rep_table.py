@@ -0,0 +1,251 @@
+"""
+Columnar per-rep tables and set-level fatigue analytics.
+
+A RepTable holds one array per metric (timing, range of motion, velocity,
+confidence) with one entry per rep; SetSummary does the same per set.
+Both are computed from the (T, 33, 4) landmark array with array
+operations only, so sessions of hundreds of reps cost about as much as a
+handful. The metrics follow RepMetrics/FatigueMetrics of repDetector.ts:
+velocity and ROM decay against the first rep of the set, time under
+tension, rest ratio and the velocity trend across the set.
+"""
+from typing import Dict, Optional, Sequence, Tuple
+from dataclasses import dataclass, fields
+import logging
+import numpy as np
+
+from .calibration import CALIBRATION_CONFIG, Calibration
+from .landmark_buffer import VISIBILITY, joint_angle_series
+from .rep_segmentation import RepBounds, fill_gaps, find_reps
+
+logger = logging.getLogger(__name__)
+
+# Rep table configuration
+REP_TABLE_CONFIG = {
+    'set_rest_seconds': 20.0,  # A longer pause between reps starts a new set
+    'velocity_loss_target': 0.2,  # Suggest ending the set once velocity drops this far from its best rep
+    'velocity_loss_limit': 0.4,  # Suggest ending the session once a set loses this much
+    # Joint angle (a, b, c: angle at b) tracked per exercise
+    'exercise_angles': {
+        'squat': (23, 25, 27),  # Left knee
+        'deadlift': (11, 23, 25),  # Left hip
+        'pushup': (11, 13, 15)  # Left elbow
+    },
+    # Barbell lifts, whose bar (the wrists) is tracked in m/s when calibrated;
+    # other exercises keep the angular velocity of their tracked joint
+    'bar_exercises': ('squat', 'deadlift')
+}
+
+
+@dataclass
+class RepTable:
+    start: np.ndarray  # Frame the rep starts at (top)
+    bottom: np.ndarray  # Frame of the lowest point
+    end: np.ndarray  # Frame the rep ends at (top)
+    set_index: np.ndarray  # Set the rep belongs to, from 0
+    start_time: np.ndarray  # seconds
+    duration: np.ndarray  # seconds; time under tension
+    eccentric_time: np.ndarray  # seconds, start -> bottom
+    concentric_time: np.ndarray  # seconds, bottom -> end
+    rom: np.ndarray  # Range of motion of the tracked angle, degrees
+    peak_velocity: np.ndarray  # Concentric peak, in velocity_unit
+    mean_velocity: np.ndarray  # Mean concentric velocity, in velocity_unit
+    velocity_decay: np.ndarray  # (first rep of the set - this rep) / first, mean velocity
+    rom_decay: np.ndarray  # (first rep of the set - this rep) / first, ROM
+    confidence: np.ndarray  # Mean visibility of the tracked joints over the rep
+    velocity_unit: str = 'deg/s'  # 'm/s' when the bar was tracked with a calibration
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def to_dict(self) -> Dict:
+        """Columns as lists, for JSON."""
+        return {f.name: getattr(self, f.name).tolist() if f.name != 'velocity_unit' else self.velocity_unit
+                for f in fields(self)}
+
+
+@dataclass
+class SetSummary:
+    first_rep: np.ndarray  # Row of the set's first rep in the RepTable
+    reps: np.ndarray  # Reps in the set
+    rest_before: np.ndarray  # seconds since the previous set ended; 0 for the first
+    time_under_tension: np.ndarray  # seconds
+    rest_ratio: np.ndarray  # rest_before / time under tension
+    best_velocity: np.ndarray  # Fastest mean concentric velocity in the set
+    last_velocity: np.ndarray  # Mean concentric velocity of the last rep
+    velocity_loss: np.ndarray  # 1 - last / best
+    rom_loss: np.ndarray  # 1 - last rep ROM / first rep ROM
+    velocity_trend: np.ndarray  # Least-squares slope of rep velocity over the set mean, per rep
+    stop_set: np.ndarray  # Velocity loss reached the target
+
+    def __len__(self) -> int:
+        return len(self.first_rep)
+
+    @property
+    def session_velocity_loss(self) -> float:
+        """Drop of the best rep velocity from the first set to the last."""
+        if len(self) < 2 or self.best_velocity[0] <= 0:
+            return 0.0
+        return float(1.0 - self.best_velocity[-1] / self.best_velocity[0])
+
+    def advice(self) -> str:
+        """Autoregulation hint for the next set."""
+        if not len(self):
+            return 'no_reps'
+        if max(self.session_velocity_loss, float(self.velocity_loss[-1])) >= REP_TABLE_CONFIG['velocity_loss_limit']:
+            return 'end_session'
+        return 'reduce_load' if self.stop_set[-1] else 'continue'
+
+    def to_dict(self) -> Dict:
+        columns = {f.name: getattr(self, f.name).tolist() for f in fields(self)}
+        return {**columns, 'session_velocity_loss': self.session_velocity_loss, 'advice': self.advice()}
+
+
+def _range_sums(values: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Sum of values[start:end + 1] per row, from one cumulative sum."""
+    cumulative = np.concatenate(([0.0], np.cumsum(values)))
+    return cumulative[ends + 1] - cumulative[starts]
+
+
+def _range_max(values: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Max of values[start:end + 1] per row."""
+    edges = np.empty(2 * len(starts), dtype=np.int64)
+    edges[0::2], edges[1::2] = starts, ends + 1
+    return np.maximum.reduceat(np.append(values, -np.inf), edges)[0::2]
+
+
+def _decay(values: np.ndarray, set_first: np.ndarray) -> np.ndarray:
+    first = values[set_first]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(first > 0, (first - values) / first, 0.0)
+
+
+def build_rep_table(
+    signal: np.ndarray,
+    timestamps: Sequence[float],
+    bounds: Optional[RepBounds] = None,
+    visibility: Optional[np.ndarray] = None,
+    velocity_signal: Optional[np.ndarray] = None,
+    velocity_unit: str = 'deg/s'
+) -> RepTable:
+    """
+    Per-rep columns of a movement.
+
+    Args:
+        signal: Tracked joint angle per frame (NaN where missing)
+        timestamps: Frame times in seconds
+        bounds: Reps to tabulate; found with find_reps when None
+        visibility: Per-frame confidence of the tracked joints
+        velocity_signal: Position to differentiate for velocities (e.g.
+            bar height in meters); the angle itself when None
+        velocity_unit: Unit of the velocity columns
+    """
+    times = np.asarray(timestamps, dtype=np.float64)
+    filled = fill_gaps(signal)
+    bounds = bounds if bounds is not None else find_reps(signal)
+    if filled is None or not len(bounds):
+        empty = np.empty(0)
+        return RepTable(*(empty.astype(np.int64),) * 4, *(empty,) * 10, velocity_unit=velocity_unit)
+    start, bottom, end = (np.asarray(column, dtype=np.int64) for column in bounds)
+
+    position = filled if velocity_signal is None else fill_gaps(velocity_signal)
+    speed = np.abs(np.gradient(position, times)) if position is not None else np.zeros(len(times))
+    concentric_frames = end - bottom + 1
+    peak_velocity = _range_max(speed, bottom, end)
+    mean_velocity = _range_sums(speed, bottom, end) / concentric_frames
+
+    # A pause longer than the set rest starts a new set
+    new_set = np.concatenate(([False], times[start[1:]] - times[end[:-1]] > REP_TABLE_CONFIG['set_rest_seconds']))
+    set_index = np.cumsum(new_set)
+    set_first = np.concatenate(([0], np.flatnonzero(new_set)))[set_index]
+
+    rom = _range_max(filled, start, end) - filled[bottom]
+    if visibility is None:
+        confidence = np.ones(len(start))
+    else:
+        confidence = _range_sums(np.nan_to_num(np.asarray(visibility, dtype=np.float64)), start, end) / (end - start + 1)
+    return RepTable(
+        start=start, bottom=bottom, end=end, set_index=set_index,
+        start_time=times[start],
+        duration=times[end] - times[start],
+        eccentric_time=times[bottom] - times[start],
+        concentric_time=times[end] - times[bottom],
+        rom=rom,
+        peak_velocity=peak_velocity,
+        mean_velocity=mean_velocity,
+        velocity_decay=_decay(mean_velocity, set_first),
+        rom_decay=_decay(rom, set_first),
+        confidence=confidence,
+        velocity_unit=velocity_unit
+    )
+
+
+def summarize_sets(table: RepTable) -> SetSummary:
+    """Per-set fatigue and velocity-loss columns of a rep table, with grouped array reductions."""
+    if not len(table):
+        empty = np.empty(0)
+        return SetSummary(*(empty.astype(np.int64),) * 2, *(empty,) * 8, empty.astype(bool))
+    sets = table.set_index
+    count = np.bincount(sets)
+    first = np.concatenate(([0], np.cumsum(count)[:-1]))
+    last = first + count - 1
+
+    velocity = table.mean_velocity
+    best = np.maximum.reduceat(velocity, first)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        velocity_loss = np.where(best > 0, 1.0 - velocity[last] / best, 0.0)
+        rom_loss = np.where(table.rom[first] > 0, 1.0 - table.rom[last] / table.rom[first], 0.0)
+
+    # Slope of velocity against rep number within each set, over the set mean
+    rep_number = np.arange(len(table)) - first[sets]
+    x_mean = (count - 1) / 2.0
+    y_mean = np.bincount(sets, velocity) / count
+    dx = rep_number - x_mean[sets]
+    covariance = np.bincount(sets, dx * (velocity - y_mean[sets]))
+    variance = np.bincount(sets, dx * dx)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        velocity_trend = np.where((variance > 0) & (y_mean > 0), covariance / variance / y_mean, 0.0)
+
+    end_time = table.start_time + table.duration
+    rest_before = np.concatenate(([0.0], table.start_time[first[1:]] - end_time[last[:-1]]))
+    time_under_tension = np.bincount(sets, table.duration)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rest_ratio = np.where(time_under_tension > 0, rest_before / time_under_tension, 0.0)
+    return SetSummary(
+        first_rep=first, reps=count, rest_before=rest_before, time_under_tension=time_under_tension,
+        rest_ratio=rest_ratio, best_velocity=best, last_velocity=velocity[last],
+        velocity_loss=velocity_loss, rom_loss=rom_loss, velocity_trend=velocity_trend,
+        stop_set=velocity_loss >= REP_TABLE_CONFIG['velocity_loss_target']
+    )
+
+
+def rep_analytics(
+    points: np.ndarray,
+    timestamps: Sequence[float],
+    exercise_type: str,
+    calibration: Optional[Calibration] = None,
+    frame_size: Optional[Tuple[int, int]] = None,
+    bounds: Optional[RepBounds] = None
+) -> Optional[Tuple[RepTable, SetSummary]]:
+    """
+    Rep table and set summary of a video's landmarks. Velocities are bar
+    speeds in m/s for barbell lifts when a calibration is given, else
+    angular velocities.
+    Reps are segmented here unless `bounds` (e.g. from MovementAnalyzer)
+    are given.
+
+    Returns:
+        Tuple of (RepTable, SetSummary), or None for exercises without a
+        tracked angle
+    """
+    joints = REP_TABLE_CONFIG['exercise_angles'].get(exercise_type)
+    if joints is None or not len(points):
+        return None
+    angle = joint_angle_series(points, *joints)
+    visibility = np.nan_to_num(points[:, list(joints), VISIBILITY]).mean(axis=1)
+    bar_height, unit = None, 'deg/s'
+    if calibration is not None and frame_size is not None and exercise_type in REP_TABLE_CONFIG['bar_exercises']:
+        bar = calibration.landmarks_to_metric(points[:, CALIBRATION_CONFIG['bar_joints']], frame_size).mean(axis=1)
+        bar_height, unit = bar[:, 1], 'm/s'
+    table = build_rep_table(angle, timestamps, bounds, visibility, bar_height, unit)
+    return table, summarize_sets(table)
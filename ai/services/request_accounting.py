@@ -0,0 +1,102 @@
+from typing import Dict, Iterator, Optional
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+import os
+import time
+try:
+    import resource  # type: ignore
+except Exception:  # pragma: no cover
+    resource = None  # type: ignore
+
+# Per-request accounting configuration
+REQUEST_ACCOUNTING_CONFIG = {
+    'rss_sample_interval': 30  # Sampled frames between resident-memory readings
+}
+
+_current_usage: ContextVar[Optional['RequestUsage']] = ContextVar('velox_request_usage', default=None)
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process, or its peak where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        if resource is None:
+            return 0
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class RequestUsage:
+    """
+    Resources consumed by one analysis request.
+
+    CPU time is thread CPU of the threads doing the request's work, so it is
+    not inflated by concurrent requests. Resident memory is process-wide;
+    the peak delta is exact for a lone request and an upper bound otherwise.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.cpu_seconds = 0.0
+        self.stages: Dict[str, float] = defaultdict(float)
+        self.frames: Counter = Counter()
+        self.bytes_read = 0
+        self.inference_attempts = 0
+        self.retries = 0
+        self.rss_start = current_rss_bytes()
+        self.rss_peak = self.rss_start
+
+    @contextmanager
+    def track_cpu(self) -> Iterator[None]:
+        """Add the calling thread's CPU time spent inside the block."""
+        start = time.thread_time()
+        try:
+            yield
+        finally:
+            self.cpu_seconds += time.thread_time() - start
+
+    def sample_rss(self):
+        self.rss_peak = max(self.rss_peak, current_rss_bytes())
+
+    def to_dict(self) -> Dict:
+        self.sample_rss()
+        return {
+            'wall_seconds': round(time.perf_counter() - self.start, 4),
+            'cpu_seconds': round(self.cpu_seconds, 4),
+            'stage_seconds': {stage: round(seconds, 4) for stage, seconds in self.stages.items()},
+            'frames': dict(self.frames),
+            'bytes_read': self.bytes_read,
+            'peak_rss_delta_bytes': self.rss_peak - self.rss_start,
+            'inference_attempts': self.inference_attempts,
+            'retries': self.retries
+        }
+
+
+def start_usage():
+    """Begin accounting for the current request; returns (usage, token)."""
+    usage = RequestUsage()
+    return usage, _current_usage.set(usage)
+
+
+def end_usage(token):
+    _current_usage.reset(token)
+
+
+def current_usage() -> Optional[RequestUsage]:
+    return _current_usage.get()
+
+
+def record_stage(stage: str, seconds: float):
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.stages[stage] += seconds
+
+
+def track_cpu():
+    """Count the calling thread's CPU time toward the current request, if any."""
+    usage = _current_usage.get()
+    return usage.track_cpu() if usage is not None else nullcontext()
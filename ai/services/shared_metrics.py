@@ -0,0 +1,259 @@
+from contextlib import contextmanager
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import glob
+import logging
+import os
+import threading
+import time
+import numpy as np
+try:
+    import fcntl  # type: ignore
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+from .metrics import ExerciseStats, PipelineMetrics
+
+logger = logging.getLogger(__name__)
+
+# Host-wide metrics configuration. Each worker process publishes its
+# aggregates to its own memory-mapped file in a shared directory; readers sum
+# every file. A file has exactly one writer, so publishing takes no
+# cross-process lock. Files of exited workers are folded into one retired
+# file under a directory lock, so their counters keep counting.
+SHARED_METRICS_CONFIG = {
+    # Fixed exercise slots keep the file layout constant; unknown names go to 'other'
+    'exercise_slots': ('squat', 'deadlift', 'pushup', 'unspecified', 'other'),
+    'file_pattern': 'velox-worker-{pid}.metrics',
+    'retired_file': 'velox-retired.metrics',  # Summed counters of exited workers
+    'lock_file': 'velox-metrics.lock',
+    'read_retries': 50  # Attempts to get a consistent snapshot of a file mid-publish
+}
+
+POOL_FIELDS = ('size', 'busy', 'queue_depth', 'rejected')
+
+# Header slots (float64) preceding the payload. In the retired file the PID
+# slot holds the number of workers folded into it.
+_SEQUENCE, _PID, _PUBLISHED_AT, _PAYLOAD_SIZE = range(4)
+_HEADER_SIZE = 4
+
+
+class FleetMetrics(NamedTuple):
+    exercise_stats: Dict[str, ExerciseStats]
+    pipeline: PipelineMetrics
+    pool: Dict[str, int]  # Summed over live workers
+    workers: int  # Live worker files read
+    retired_workers: int  # Exited workers whose counters still count
+
+
+def exercise_slot(exercise_type: Optional[str]) -> str:
+    """Map a request's exercise type onto one of the fixed slots."""
+    if not exercise_type:
+        return 'unspecified'
+    return exercise_type if exercise_type in SHARED_METRICS_CONFIG['exercise_slots'] else 'other'
+
+
+def _payload_size() -> int:
+    slots = len(SHARED_METRICS_CONFIG['exercise_slots'])
+    return slots * ExerciseStats().pack().size + PipelineMetrics().pack().size + len(POOL_FIELDS)
+
+
+def _pack_payload(exercise_stats: Dict[str, ExerciseStats], pipeline: PipelineMetrics, pool: Optional[Dict] = None) -> np.ndarray:
+    empty = ExerciseStats()
+    parts = [exercise_stats.get(slot, empty).pack() for slot in SHARED_METRICS_CONFIG['exercise_slots']]
+    parts.append(pipeline.pack())
+    parts.append(np.array([(pool or {}).get(field, 0) for field in POOL_FIELDS], dtype=np.float64))
+    return np.concatenate(parts)
+
+
+def _unpack_payload(payload: np.ndarray) -> Tuple[Dict[str, ExerciseStats], PipelineMetrics, Dict[str, int]]:
+    exercise_stats = {}
+    offset = 0
+    for slot in SHARED_METRICS_CONFIG['exercise_slots']:
+        stats = ExerciseStats()
+        size = stats.pack().size
+        stats.unpack(payload[offset:offset + size])
+        exercise_stats[slot] = stats
+        offset += size
+    pipeline = PipelineMetrics()
+    size = pipeline.pack().size
+    pipeline.unpack(payload[offset:offset + size])
+    offset += size
+    pool = {field: int(value) for field, value in zip(POOL_FIELDS, payload[offset:offset + len(POOL_FIELDS)])}
+    return exercise_stats, pipeline, pool
+
+
+@contextmanager
+def _directory_lock(directory: str):
+    """Exclusive host-wide lock over folding exited workers and reading the totals."""
+    if fcntl is None:  # pragma: no cover
+        yield
+        return
+    with open(os.path.join(directory, SHARED_METRICS_CONFIG['lock_file']), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class WorkerMetricsFile:
+    """
+    This process's published snapshot.
+
+    Publishing bumps a sequence number to odd, writes the payload and bumps it
+    back to even (a seqlock). Readers retry until they see the same even
+    number before and after copying, so they never block the writer.
+
+    The file is named after the publishing process and opened by its first
+    publish, so an instance created before the server forks its workers
+    (e.g. gunicorn --preload) gives each worker a file of its own.
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.pid: Optional[int] = None  # Process the file is open for
+        self.path: Optional[str] = None
+        self._payload_size = _payload_size()
+        self._map: Optional[np.memmap] = None
+        self._lock = threading.Lock()  # Publishes may come from the event loop and worker threads
+
+    def _open(self):
+        self.pid = os.getpid()
+        self.path = os.path.join(self.directory, SHARED_METRICS_CONFIG['file_pattern'].format(pid=self.pid))
+        with _directory_lock(self.directory):
+            # A file under this PID was left by an exited worker the PID was reused from
+            if os.path.exists(self.path):
+                _retire(self.directory, [self.path])
+            self._map = np.memmap(self.path, dtype=np.float64, mode='w+', shape=(_HEADER_SIZE + self._payload_size,))
+        self._map[_PID] = self.pid
+        self._map[_PAYLOAD_SIZE] = self._payload_size
+
+    def publish(self, exercise_stats: Dict[str, ExerciseStats], pipeline: PipelineMetrics, pool: Optional[Dict] = None):
+        payload = _pack_payload(exercise_stats, pipeline, pool)
+        with self._lock:
+            if self.pid != os.getpid():
+                self._open()
+            sequence = self._map[_SEQUENCE]
+            self._map[_SEQUENCE] = sequence + 1
+            self._map[_HEADER_SIZE:] = payload
+            self._map[_PUBLISHED_AT] = time.time()
+            self._map[_SEQUENCE] = sequence + 2
+
+
+def _read_snapshot(path: str) -> Optional[np.ndarray]:
+    """Consistent copy of a worker file (header + payload), or None."""
+    try:
+        mapped = np.memmap(path, dtype=np.float64, mode='r')
+    except (OSError, ValueError):
+        return None
+    for _ in range(SHARED_METRICS_CONFIG['read_retries']):
+        before = mapped[_SEQUENCE]
+        if before % 2 == 1:
+            time.sleep(0)
+            continue
+        snapshot = np.array(mapped)
+        if mapped[_SEQUENCE] == before:
+            return snapshot
+    logger.warning(f"Could not read a consistent metrics snapshot from {path}")
+    return None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_payload(path: str) -> Optional[np.ndarray]:
+    """Header and payload of a metrics file with the current layout, or None."""
+    snapshot = _read_snapshot(path)
+    expected_size = _payload_size()
+    if snapshot is None or snapshot.size != _HEADER_SIZE + expected_size or int(snapshot[_PAYLOAD_SIZE]) != expected_size:
+        return None
+    return snapshot
+
+
+def _retire(directory: str, paths: List[str]):
+    """
+    Fold the files of exited workers into the retired file and delete them.
+    Call with the directory lock held.
+    """
+    retired_path = os.path.join(directory, SHARED_METRICS_CONFIG['retired_file'])
+    retired = _read_payload(retired_path)
+    if retired is not None:
+        exercise_stats, pipeline, _ = _unpack_payload(retired[_HEADER_SIZE:])
+        count = int(retired[_PID])
+    else:
+        exercise_stats = {slot: ExerciseStats() for slot in SHARED_METRICS_CONFIG['exercise_slots']}
+        pipeline, count = PipelineMetrics(), 0
+    for path in paths:
+        snapshot = _read_payload(path)
+        if snapshot is None:
+            continue
+        worker_stats, worker_pipeline, _ = _unpack_payload(snapshot[_HEADER_SIZE:])
+        for slot, stats in worker_stats.items():
+            exercise_stats[slot].merge(stats)
+        pipeline.merge(worker_pipeline)
+        count += 1
+
+    payload = _pack_payload(exercise_stats, pipeline)
+    header = np.array([0, count, time.time(), payload.size], dtype=np.float64)
+    # Replaced whole, so a crash never leaves a half-written total
+    temporary = f"{retired_path}.{os.getpid()}.tmp"
+    np.concatenate([header, payload]).tofile(temporary)
+    os.replace(temporary, retired_path)
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def read_fleet(directory: str) -> FleetMetrics:
+    """
+    Sum the snapshots of every worker that has published to `directory`.
+
+    Files of exited workers are folded into the retired totals, so counters
+    and distributions never go backwards; pool gauges only count workers
+    that are still alive.
+    """
+    slots = SHARED_METRICS_CONFIG['exercise_slots']
+    totals = {slot: ExerciseStats() for slot in slots}
+    pipeline = PipelineMetrics()
+    pool = {field: 0 for field in POOL_FIELDS}
+    workers = retired_workers = 0
+
+    pattern = SHARED_METRICS_CONFIG['file_pattern'].format(pid='*')
+    with _directory_lock(directory):
+        live, exited = [], []
+        for path in sorted(glob.glob(os.path.join(directory, pattern))):
+            snapshot = _read_payload(path)
+            if snapshot is None:
+                continue
+            if _pid_alive(int(snapshot[_PID])):
+                live.append(snapshot)
+            else:
+                exited.append(path)
+        if exited:
+            _retire(directory, exited)
+        retired = _read_payload(os.path.join(directory, SHARED_METRICS_CONFIG['retired_file']))
+
+    if retired is not None:
+        live.append(retired)
+        retired_workers = int(retired[_PID])
+    for snapshot in live:
+        worker_stats, worker_pipeline, worker_pool = _unpack_payload(snapshot[_HEADER_SIZE:])
+        for slot, stats in worker_stats.items():
+            totals[slot].merge(stats)
+        pipeline.merge(worker_pipeline)
+        if snapshot is not retired:
+            workers += 1
+            for field, value in worker_pool.items():
+                pool[field] += value
+
+    seen = {slot: stats for slot, stats in totals.items() if stats.total_videos or stats.failures}
+    return FleetMetrics(seen, pipeline, pool, workers, retired_workers)
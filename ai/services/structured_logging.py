@@ -0,0 +1,223 @@
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timezone
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+
+# Logging pipeline configuration
+LOGGING_CONFIG = {
+    'queue_size': 10000,  # Records buffered for the writer thread; beyond this they are dropped
+    'rate_limit_level': logging.WARNING,  # Records at or above this level are rate limited
+    'rate_limit_window': 10.0,  # Seconds per rate-limit window
+    'rate_limit_burst': 5,  # Identical events let through per window
+    'max_tracked_events': 1000  # Distinct event types tracked before the table is flushed
+}
+
+PII_KEYS = {"email", "e_mail", "password", "token", "authorization", "cookie", "ssn", "phone", "phoneNumber", "userEmail"}
+
+_traceback_formatter = logging.Formatter()
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+def mask_value(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        if len(value) <= 4:
+            return "***"
+        return value[:2] + "***" + value[-2:]
+    if isinstance(value, (int, float, bool)):
+        return value
+    if isinstance(value, list):
+        return [mask_value(v) for v in value]
+    if isinstance(value, dict):
+        return {k: (mask_value(v) if (k.lower() in PII_KEYS or 'email' in k.lower() or 'token' in k.lower()) else mask_value(v) if isinstance(v, (dict, list)) else v) for k, v in value.items()}
+    return "***"
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record.
+
+    Context passed as `extra` becomes top-level keys and is masked here, on the
+    writer thread, so request threads never pay for masking or serialization.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        ctx = {k: v for k, v in vars(record).items() if k not in _RECORD_FIELDS}
+        entry = {
+            "level": record.levelname.lower(),
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "logger": record.name,
+            "message": record.getMessage(),
+            **mask_value(ctx)
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        try:
+            return json.dumps(entry, default=str)
+        except Exception:
+            return f"{record.levelname} {record.getMessage()}"
+
+
+class EventRateLimiter:
+    """
+    Per-event rate limiter with suppression summaries.
+
+    Events are keyed by logger, level and the unformatted message template, so
+    `logger.error("Error processing frame %d: %s", n, e)` is one event type no
+    matter the frame. Each type gets `burst` records per window; the rest are
+    counted and reported as one "N similar events suppressed" record when the
+    window rolls over or the limiter is flushed.
+    """
+
+    def __init__(self, window: float = LOGGING_CONFIG['rate_limit_window'],
+                 burst: int = LOGGING_CONFIG['rate_limit_burst'],
+                 max_events: int = LOGGING_CONFIG['max_tracked_events']):
+        self.window = window
+        self.burst = burst
+        self.max_events = max_events
+        self._events: Dict[Tuple, List] = {}  # key -> [window_start, count, suppressed, sample record]
+        self._lock = threading.Lock()
+
+    def check(self, record: logging.LogRecord) -> Tuple[bool, List[logging.LogRecord]]:
+        """Return (allow, summaries to emit first) for a record."""
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        summaries = []
+        with self._lock:
+            state = self._events.get(key)
+            if state is None:
+                if len(self._events) >= self.max_events:
+                    summaries = self._drain()
+                state = self._events[key] = [now, 0, 0, record]
+            elif now - state[0] >= self.window:
+                if state[2]:
+                    summaries.append(self._summary(state, now))
+                state[:] = [now, 0, 0, record]
+            state[1] += 1
+            if state[1] <= self.burst:
+                return True, summaries
+            state[2] += 1
+            return False, summaries
+
+    def flush(self) -> List[logging.LogRecord]:
+        """Summaries for everything suppressed so far; resets all windows."""
+        with self._lock:
+            return self._drain()
+
+    def _drain(self) -> List[logging.LogRecord]:
+        now = time.monotonic()
+        summaries = [self._summary(state, now) for state in self._events.values() if state[2]]
+        self._events.clear()
+        return summaries
+
+    @staticmethod
+    def _summary(state: List, now: float) -> logging.LogRecord:
+        sample = state[3]
+        return logging.makeLogRecord({
+            'name': sample.name,
+            'levelno': sample.levelno,
+            'levelname': sample.levelname,
+            'msg': "%d similar events suppressed in %.0fs: %s",
+            'args': (state[2], now - state[0], sample.msg),
+            'suppressed': state[2]
+        })
+
+
+class SampledQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to a background writer thread through a bounded queue.
+
+    Rate limiting happens before the record is queued, and a full queue drops
+    the record (counted in `dropped`) instead of blocking the request.
+    """
+
+    def __init__(self, log_queue: queue.Queue, limiter: Optional[EventRateLimiter] = None,
+                 rate_limit_level: int = LOGGING_CONFIG['rate_limit_level']):
+        super().__init__(log_queue)
+        self.limiter = limiter
+        self.rate_limit_level = rate_limit_level
+        self.dropped = 0
+
+    def emit(self, record: logging.LogRecord):
+        if self.limiter is not None and record.levelno >= self.rate_limit_level:
+            allow, summaries = self.limiter.check(record)
+            for summary in summaries:
+                super().emit(summary)
+            if not allow:
+                return
+        super().emit(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only merge args (cheap and safe against later mutation); JSON
+        # formatting and masking are left to the writer thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush_suppressed(self):
+        if self.limiter is not None:
+            for summary in self.limiter.flush():
+                super().emit(summary)
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[SampledQueueHandler] = None
+
+
+def configure_logging(level=logging.INFO, stream=None) -> SampledQueueHandler:
+    """
+    Route all logging through one queue to a JSON writer thread.
+
+    This is the only place logging is configured; modules just call
+    `logging.getLogger(__name__)`. Calling it again replaces the pipeline.
+    """
+    global _listener, _queue_handler
+    shutdown_logging()
+    writer = logging.StreamHandler(stream or sys.stderr)
+    writer.setFormatter(JsonFormatter())
+    log_queue = queue.Queue(maxsize=LOGGING_CONFIG['queue_size'])
+    _queue_handler = SampledQueueHandler(log_queue, EventRateLimiter())
+    _listener = logging.handlers.QueueListener(log_queue, writer, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+    return _queue_handler
+
+
+def shutdown_logging():
+    """Report pending suppressions and drain the queue."""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        _queue_handler.flush_suppressed()
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,240 @@
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+from collections import deque
+from contextvars import ContextVar
+from functools import wraps
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Tracing configuration
+TRACING_CONFIG = {
+    'sample_rate': 0.01,  # Share of requests whose individual spans are kept
+    'max_spans_per_trace': 20000,  # Later spans are counted but not kept
+    'recent_traces': 50,  # Sampled traces kept in memory for /traces
+    'export_dir': None  # Also write sampled traces here as JSON when set
+}
+
+_current_trace: ContextVar[Optional['Trace']] = ContextVar('velox_trace', default=None)
+_current_span_id: ContextVar[int] = ContextVar('velox_span', default=0)
+
+_recent_traces: deque = deque(maxlen=TRACING_CONFIG['recent_traces'])
+_recent_lock = threading.Lock()
+
+_TOKEN_INVALID = re.compile(r'[^A-Za-z0-9_\-]')
+_SAFE_ID = re.compile(r'[A-Za-z0-9_\-]{1,64}')  # Trace ids usable as export file names
+
+
+class Trace:
+    """
+    Timing record of one request.
+
+    Every trace sums time per span name, which feeds the Server-Timing
+    header. Sampled traces also keep each span (name, parent, start, duration,
+    attributes) for JSON export.
+    """
+
+    def __init__(self, trace_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.started_at = time.time()
+        self.start_ns = time.perf_counter_ns()
+        self.totals: Dict[str, int] = {}  # ns per span name
+        self.spans: List[Dict[str, Any]] = []
+        self.dropped_spans = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()  # Spans may close on worker threads
+
+    def add_timing(self, name: str, duration_ns: int):
+        with self._lock:
+            self.totals[name] = self.totals.get(name, 0) + duration_ns
+
+    def _finish_span(self, name: str, start_ns: int, duration_ns: int, span_id: int,
+                     parent_id: int, attrs: Optional[Dict], error: Optional[str]):
+        with self._lock:
+            self.totals[name] = self.totals.get(name, 0) + duration_ns
+            if not self.sampled:
+                return
+            if len(self.spans) >= TRACING_CONFIG['max_spans_per_trace']:
+                self.dropped_spans += 1
+                return
+            record = {
+                'id': span_id,
+                'parent': parent_id,
+                'name': name,
+                'start_ms': (start_ns - self.start_ns) / 1e6,
+                'duration_ms': duration_ns / 1e6
+            }
+            if attrs:
+                record['attributes'] = attrs
+            if error:
+                record['error'] = error
+            self.spans.append(record)
+
+    def server_timing(self) -> str:
+        """Server-Timing header value with the summed duration of each span name."""
+        return ', '.join(
+            f"{_TOKEN_INVALID.sub('_', name)};dur={total / 1e6:.2f}"
+            for name, total in self.totals.items()
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            'trace_id': self.trace_id,
+            'started_at': self.started_at,
+            'duration_ms': (time.perf_counter_ns() - self.start_ns) / 1e6,
+            'totals_ms': {name: total / 1e6 for name, total in self.totals.items()},
+            'spans': list(self.spans),
+            'dropped_spans': self.dropped_spans
+        }
+
+
+class _Span:
+    __slots__ = ('trace', 'name', 'attrs', 'start_ns', 'span_id', 'parent_id', '_token')
+
+    def __init__(self, trace: Trace, name: str, attrs: Optional[Dict]):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+        self._token = None
+
+    def set(self, key: str, value: Any):
+        """Attach an attribute (kept only in sampled traces)."""
+        if self.trace.sampled:
+            if self.attrs is None:
+                self.attrs = {}
+            self.attrs[key] = value
+
+    def __enter__(self) -> '_Span':
+        if self.trace.sampled:
+            self.span_id = next(self.trace._ids)
+            self.parent_id = _current_span_id.get()
+            self._token = _current_span_id.set(self.span_id)
+        else:
+            self.span_id = self.parent_id = 0
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        duration_ns = time.perf_counter_ns() - self.start_ns
+        if self._token is not None:
+            _current_span_id.reset(self._token)
+        error = exc_type.__name__ if exc_type is not None else None
+        self.trace._finish_span(self.name, self.start_ns, duration_ns, self.span_id,
+                                self.parent_id, self.attrs, error)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, key: str, value: Any):
+        pass
+
+    def __enter__(self) -> '_NoopSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **attrs: Any):
+    """
+    Time a block as a span of the current trace.
+
+    Outside a trace this returns a shared no-op object without reading the
+    clock, so instrumentation costs one context variable lookup.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return _NOOP_SPAN
+    return _Span(trace, name, attrs or None)
+
+
+def traced(name: Optional[str] = None) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Decorator that runs a function inside a span named after it."""
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        span_name = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            trace = _current_trace.get()
+            if trace is None:
+                return func(*args, **kwargs)
+            with _Span(trace, span_name, None):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def add_timing(name: str, seconds: float):
+    """Add an externally measured duration to the current trace's totals."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_timing(name, int(seconds * 1e9))
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def start_trace(trace_id: str, sampled: Optional[bool] = None):
+    """
+    Begin a trace for the current context.
+
+    Args:
+        trace_id: Request or trace id
+        sampled: Keep individual spans; None samples at TRACING_CONFIG['sample_rate']
+
+    Returns:
+        Tuple of (trace, token) to pass to `finish_trace`
+    """
+    if sampled is None:
+        sampled = random.random() < TRACING_CONFIG['sample_rate']
+    trace = Trace(trace_id, sampled)
+    return trace, _current_trace.set(trace)
+
+
+def finish_trace(trace: Trace, token) -> None:
+    """End the trace, keeping and exporting it if it was sampled."""
+    _current_trace.reset(token)
+    if not trace.sampled:
+        return
+    with _recent_lock:
+        _recent_traces.append(trace)
+    export_dir = TRACING_CONFIG['export_dir']
+    if export_dir:
+        try:
+            os.makedirs(export_dir, exist_ok=True)
+            # Trace ids come from client headers; anything unusual gets a generated file name
+            file_id = trace.trace_id if _SAFE_ID.fullmatch(trace.trace_id) else uuid.uuid4().hex
+            with open(os.path.join(export_dir, f"trace-{file_id}.json"), 'w') as f:
+                json.dump(trace.to_dict(), f)
+        except OSError as e:
+            logger.warning(f"Could not export trace {trace.trace_id}: {e}")
+
+
+def get_trace(trace_id: str) -> Optional[Dict]:
+    """A recently sampled trace as a dict, or None."""
+    with _recent_lock:
+        for trace in reversed(_recent_traces):
+            if trace.trace_id == trace_id:
+                return trace.to_dict()
+    return None
+
+
+def recent_trace_ids() -> List[str]:
+    with _recent_lock:
+        return [trace.trace_id for trace in _recent_traces]
@@ -0,0 +1,116 @@
+from typing import Iterator, NamedTuple, Optional
+import numpy as np
+try:
+    import cv2  # type: ignore
+except Exception:  # pragma: no cover
+    cv2 = None  # type: ignore
+
+DEFAULT_FPS = 30.0  # Used when the container does not report a frame rate
+SAMPLE_TOLERANCE = 1e-3  # seconds; absorbs rounding in CAP_PROP_POS_MSEC
+
+
+class SampledFrame(NamedTuple):
+    frame_number: int  # Index of the frame in the decoded stream
+    timestamp: float  # Presentation timestamp in seconds
+    frame: np.ndarray
+
+
+def get_stream_fps(cap) -> float:
+    """Return the nominal frame rate of an opened capture, or DEFAULT_FPS."""
+    fps = float(cap.get(cv2.CAP_PROP_FPS) or 0.0)
+    return fps if fps > 0 else DEFAULT_FPS
+
+
+def estimate_sampled_frames(video_path: str, target_fps: Optional[float] = None) -> int:
+    """
+    Frames iter_sampled_frames would yield, from the container header only.
+
+    Nothing is decoded, so this is cheap enough to order a batch of clips
+    by cost. Returns 0 when the file cannot be opened or reports no length.
+    """
+    if cv2 is None:
+        raise RuntimeError("OpenCV is required for video decoding")
+
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            return 0
+        stream_fps = get_stream_fps(cap)
+        frame_count = max(int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0), 0)
+    finally:
+        cap.release()
+    if not target_fps or target_fps >= stream_fps:
+        return frame_count
+    return int(np.ceil(frame_count / stream_fps * target_fps))
+
+
+def iter_sampled_frames(
+    video_path: str,
+    target_fps: Optional[float] = None,
+    start_time: float = 0.0
+) -> Iterator[SampledFrame]:
+    """
+    Decode a video and yield frames sampled on a fixed time grid.
+
+    Sampling is driven by each frame's presentation timestamp
+    (CAP_PROP_POS_MSEC) rather than by frame index, so variable-frame-rate
+    recordings and non-integer fps ratios are decimated correctly. Frames
+    that are not sampled are only grabbed, never retrieved.
+
+    Args:
+        video_path: Path to the video file
+        target_fps: Desired sampling rate; None or 0 keeps every frame
+        start_time: Skip frames before this timestamp (seconds)
+
+    Yields:
+        SampledFrame tuples in presentation order
+    """
+    if cv2 is None:
+        raise RuntimeError("OpenCV is required for video decoding")
+
+    cap = cv2.VideoCapture(video_path)
+    try:
+        stream_fps = get_stream_fps(cap)
+        interval = 1.0 / target_fps if target_fps else 0.0
+        next_sample_time = start_time
+        last_timestamp = -1.0
+        frame_number = 0
+
+        while cap.isOpened():
+            if not cap.grab():
+                break
+
+            timestamp = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            # Some backends report 0 for every frame; fall back to the
+            # nominal rate whenever the reported clock does not advance.
+            if timestamp <= last_timestamp:
+                timestamp = max(frame_number / stream_fps, last_timestamp + 1.0 / stream_fps)
+            last_timestamp = timestamp
+
+            if timestamp + SAMPLE_TOLERANCE < next_sample_time:
+                frame_number += 1
+                continue
+
+            ret, frame = cap.retrieve()
+            if ret:
+                yield SampledFrame(frame_number, timestamp, frame)
+
+            # Advance on a fixed grid to avoid drift; re-anchor after gaps
+            next_sample_time += interval
+            if next_sample_time + SAMPLE_TOLERANCE <= timestamp:
+                next_sample_time = timestamp + interval
+            frame_number += 1
+    finally:
+        cap.release()
+
+
+def frame_times(timestamps: Optional[list], count: int, fps: float = DEFAULT_FPS) -> np.ndarray:
+    """
+    Return per-frame times in seconds for a sequence of `count` frames.
+
+    Uses the supplied timestamps when they match the sequence length and
+    otherwise assumes a constant `fps`.
+    """
+    if timestamps is not None and len(timestamps) == count:
+        return np.asarray(timestamps, dtype=float)
+    return np.arange(count, dtype=float) / fps
@@ -0,0 +1,152 @@
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+import logging
+import numpy as np
+try:
+    import cv2  # type: ignore
+except Exception:  # pragma: no cover
+    cv2 = None  # type: ignore
+
+from .deadline import Deadline
+from .video_io import iter_sampled_frames
+
+logger = logging.getLogger(__name__)
+
+# Multi-camera alignment configuration
+ALIGNMENT_CONFIG = {
+    'signal_fps': 30.0,  # Rate the motion-energy signals are sampled at
+    'thumbnail_size': (64, 64),  # Luma thumbnail motion energy is measured on
+    'max_offset': 300.0,  # Seconds; larger start differences are not searched
+    # Seconds from each recording's start the signal is taken from (None = all of it);
+    # offsets up to (1 - min_overlap) of this window can be found
+    'window_seconds': 600.0,
+    'min_overlap': 0.25,  # Share of the shorter recording that must overlap at a candidate offset
+    'min_confidence': 0.3  # Offsets correlating less than this are not applied
+}
+
+
+class ViewOffset(NamedTuple):
+    offset: float  # Seconds; an event at reference time t is at t + offset in this view
+    confidence: float  # Correlation of the aligned signals, 0-1
+    applied: bool  # False when the confidence was too low to trust the offset
+
+
+def motion_energy(
+    video_path: str,
+    fps: float = ALIGNMENT_CONFIG['signal_fps'],
+    max_seconds: Optional[float] = ALIGNMENT_CONFIG['window_seconds'],
+    deadline: Optional[Deadline] = None
+) -> np.ndarray:
+    """
+    Mean absolute luma change between consecutive sampled frames.
+
+    Computed on small thumbnails, so it is cheap next to decoding; it peaks
+    with the lifter's movement in every camera angle, which makes it a good
+    signal for cross-correlating recordings of one set. Only the first
+    `max_seconds` of the recording are decoded, and decoding stops early
+    once the deadline passes.
+
+    Returns:
+        One value per sampled frame (the first is 0), at `fps`
+    """
+    if cv2 is None:
+        raise RuntimeError("OpenCV is required for video decoding")
+    width, height = ALIGNMENT_CONFIG['thumbnail_size']
+    thumb = np.empty((height, width, 3), dtype=np.uint8)
+    previous: Optional[np.ndarray] = None
+    energy: List[float] = []
+    for _, timestamp, frame in iter_sampled_frames(video_path, fps):
+        if (max_seconds is not None and timestamp >= max_seconds) or (deadline is not None and deadline.expired):
+            break
+        cv2.resize(frame, (width, height), dst=thumb, interpolation=cv2.INTER_AREA)
+        luma = cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY).astype(np.float32)
+        energy.append(0.0 if previous is None else float(np.mean(np.abs(luma - previous))))
+        previous = luma
+    return np.asarray(energy, dtype=np.float64)
+
+
+def _standardize(signal: np.ndarray) -> np.ndarray:
+    signal = np.asarray(signal, dtype=np.float64)
+    std = signal.std()
+    return (signal - signal.mean()) / std if std > 0 else np.zeros_like(signal)
+
+
+def cross_correlation_lag(
+    reference: np.ndarray,
+    signal: np.ndarray,
+    max_lag: Optional[int] = None,
+    min_overlap: float = ALIGNMENT_CONFIG['min_overlap']
+) -> Tuple[float, float]:
+    """
+    Lag of `signal` behind `reference` from their FFT cross-correlation.
+
+    All lags are scored at once in O(n log n). Each lag's correlation is
+    divided by the number of overlapping samples, so short overlaps at the
+    edges are not favoured or penalized, and lags overlapping less than
+    `min_overlap` of the shorter signal are ignored. The peak is refined to
+    a fraction of a sample by parabolic interpolation.
+
+    Returns:
+        Tuple of (lag in samples, correlation at the peak clipped to 0-1);
+        (0.0, 0.0) when the signals are too short or flat
+    """
+    a, b = _standardize(reference), _standardize(signal)
+    if len(a) < 2 or len(b) < 2 or not a.any() or not b.any():
+        return 0.0, 0.0
+    size = len(a) + len(b) - 1
+    nfft = 1 << (size - 1).bit_length()
+    circular = np.fft.irfft(np.fft.rfft(b, nfft) * np.conj(np.fft.rfft(a, nfft)), nfft)
+    # In lag order: circular[k] = sum_t b[t + k] * a[t], negative lags wrap to the end
+    lags = np.arange(-(len(a) - 1), len(b))
+    values = np.concatenate([circular[nfft - (len(a) - 1):], circular[:len(b)]])
+    overlap = np.minimum(len(a), len(b) - lags) - np.maximum(0, -lags)
+    valid = overlap >= max(min_overlap * min(len(a), len(b)), 2)
+    if max_lag is not None:
+        valid &= np.abs(lags) <= max_lag
+    if not valid.any():
+        return 0.0, 0.0
+    scores = np.where(valid, values / np.maximum(overlap, 1), -np.inf)
+    best = int(np.argmax(scores))
+
+    lag = float(lags[best])
+    if 0 < best < len(scores) - 1 and np.isfinite(scores[best - 1]) and np.isfinite(scores[best + 1]):
+        left, peak, right = scores[best - 1], scores[best], scores[best + 1]
+        curvature = left - 2 * peak + right
+        if curvature < 0:
+            lag += 0.5 * (left - right) / curvature
+    return lag, float(np.clip(scores[best], 0.0, 1.0))
+
+
+def estimate_offset(reference: np.ndarray, signal: np.ndarray, fps: float = ALIGNMENT_CONFIG['signal_fps'],
+                    max_offset: Optional[float] = ALIGNMENT_CONFIG['max_offset']) -> ViewOffset:
+    """Time offset of one camera's signal against the reference camera's."""
+    max_lag = int(round(max_offset * fps)) if max_offset is not None else None
+    lag, confidence = cross_correlation_lag(reference, signal, max_lag)
+    applied = confidence >= ALIGNMENT_CONFIG['min_confidence']
+    return ViewOffset(lag / fps if applied else 0.0, confidence, applied)
+
+
+def align_views(video_paths: Sequence[str], fps: float = ALIGNMENT_CONFIG['signal_fps'],
+                deadline: Optional[Deadline] = None) -> Optional[List[ViewOffset]]:
+    """
+    Estimate every camera's offset against the first one.
+
+    Offsets that correlate too weakly to trust are reported but not applied
+    (offset 0), so a camera that saw little of the movement is blended as
+    recorded rather than shifted arbitrarily.
+
+    Returns:
+        One ViewOffset per camera, or None if the deadline passed while the
+        signals were being read
+    """
+    signals = []
+    for path in video_paths:
+        signals.append(motion_energy(path, fps, deadline=deadline))
+        if deadline is not None and deadline.expired:
+            return None
+    offsets = [ViewOffset(0.0, 1.0, True)]
+    for path, signal in zip(video_paths[1:], signals[1:]):
+        offset = estimate_offset(signals[0], signal, fps)
+        if not offset.applied:
+            logger.warning("Low alignment confidence %.2f for %s; not shifting it", offset.confidence, path)
+        offsets.append(offset)
+    return offsets
@@ -66,7 +66,7 @@ def test_pose_detection():
         print(f"Depth: {metrics.depth:.2f} degrees")
         print(f"Form Score: {metrics.form_score:.2f}/100")
         print(f"Rep Count: {metrics.rep_count}")
-        print(f"Tempo: {metrics.tempo:.2f} frames per rep")
+        print(f"Tempo: {metrics.tempo:.2f} seconds per rep")
         print(f"Stability: {metrics.stability:.2f}")
         
         print("\nFeedback:")
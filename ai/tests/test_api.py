@@ -0,0 +1,108 @@
+import json
+import logging
+import os
+import sys
+
+import pytest
+
+AI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='module')
+def main_module():
+    """The service module on the stand-in pose backend, imported as the server imports it."""
+    if AI_DIR not in sys.path:
+        sys.path.insert(0, AI_DIR)
+    from benchmarks.standin_server import create_app
+    handlers = logging.getLogger().handlers[:]
+    create_app()
+    yield sys.modules['main']
+    # The service logs to the stream pytest captured for this module
+    logging.getLogger().handlers[:] = handlers
+
+
+@pytest.fixture(scope='module')
+def client(main_module):
+    from fastapi.testclient import TestClient
+    return TestClient(main_module.app)
+
+
+@pytest.fixture(scope='module')
+def video_path(tmp_path_factory):
+    from ai.benchmarks.synthetic_video import VideoSpec, cached_video
+    return cached_video(str(tmp_path_factory.mktemp('videos')), VideoSpec(160, 120, 15, 2))
+
+
+def _analyze(client, video_path, data=None, **params):
+    with open(video_path, 'rb') as f:
+        return client.post('/analyze-pose', params={'exercise_type': 'squat', **params}, data=data or {},
+                           files={'file': ('clip.mp4', f, 'video/mp4')})
+
+
+def test_calibration_form_field_is_kept_for_the_session(client, video_path):
+    session = {'session_id': 'calibrated-session', 'device_id': 'phone-a'}
+    calibrated = _analyze(client, video_path, {'calibration': json.dumps({'pixelsPerMeter': 500})}, **session)
+    assert calibrated.status_code == 200
+    assert calibrated.json()['metric_results']['calibration']['pixelsPerMeter'] == 500
+
+    reused = _analyze(client, video_path, **session)
+    assert reused.json()['metric_results']['calibration']['pixelsPerMeter'] == 500
+    assert _analyze(client, video_path, session_id='other-session').json()['metric_results'] is None
+
+    for bad in ('{not json', json.dumps({'pixelsPerMeter': 'abc'}), json.dumps({'sweep': [1, 2, 3]})):
+        response = _analyze(client, video_path, {'calibration': bad}, **session)
+        assert response.status_code == 400
+        assert response.json()['detail'].startswith('invalid_calibration')
+
+
+def test_traces_and_forced_sampling_need_the_operator_token(client, main_module, monkeypatch):
+    monkeypatch.setattr(main_module.settings, 'ai_profiler_token', 'operator-secret')
+    monkeypatch.setitem(main_module.tracing.TRACING_CONFIG, 'sample_rate', 0.0)
+    assert client.get('/traces').status_code == 403
+    assert client.get('/traces/anything', headers={'x-profile-token': 'wrong'}).status_code == 403
+
+    client.get('/health', headers={'x-trace-sample': '1', 'x-request-id': 'anonymous-forced'})
+    client.get('/health', headers={'x-trace-sample': '1', 'x-request-id': 'operator-forced',
+                                   'x-profile-token': 'operator-secret'})
+    trace_ids = client.get('/traces', headers={'x-profile-token': 'operator-secret'}).json()['trace_ids']
+    assert 'operator-forced' in trace_ids and 'anonymous-forced' not in trace_ids
+
+
+def test_performance_metrics_only_report_known_exercise_slots(client, video_path):
+    _analyze(client, video_path)
+    _analyze(client, video_path, exercise_type='front_squat')  # Counted in the 'other' slot
+    assert client.get('/performance/metrics', params={'exercise_type': 'squat'}).json()['exercise_type'] == 'squat'
+    assert client.get('/performance/metrics', params={'exercise_type': 'front_squat'}).status_code == 404
+
+
+def test_exhausted_inference_budget_marks_the_result_partial(client, main_module, video_path, monkeypatch):
+    budget_config = sys.modules[main_module.InferenceBudget.__module__].INFERENCE_BUDGET_CONFIG
+    monkeypatch.setitem(budget_config, 'max_inferences', 3)
+    response = _analyze(client, video_path).json()
+    assert response['partial'] and response['partial_reason'] == 'inference_budget_exhausted'
+
+    with open(video_path, 'rb') as f:
+        batch = client.post('/analyze-batch', params={'exercise_type': 'squat'},
+                            files=[('files', ('clip.mp4', f, 'video/mp4'))])
+    clip = next(line for line in map(json.loads, batch.text.splitlines()) if line['type'] == 'clip')
+    assert clip['status'] == 'partial' and clip['partial_reason'] == 'inference_budget_exhausted'
+
+
+def test_batch_uploads_are_removed_when_the_stream_never_starts(main_module, video_path, tmp_path, monkeypatch):
+    import asyncio
+    from types import SimpleNamespace
+    from starlette.datastructures import UploadFile
+    upload_dir = tmp_path / 'batch'
+    upload_dir.mkdir()
+    monkeypatch.setattr(main_module.tempfile, 'mkdtemp', lambda: str(upload_dir))
+    request = SimpleNamespace(headers={})
+    with open(video_path, 'rb') as f:
+        files = [UploadFile(file=f, filename='clip.mp4')]
+        response = asyncio.run(main_module.analyze_batch(request, files, [], 'squat', None, None, None,
+                                                         main_module.VideoProcessingOptions()))
+    assert list(upload_dir.iterdir())
+
+    # The client went away before the first chunk: only the background task runs
+    asyncio.run(response.background())
+    assert not upload_dir.exists()
+    assert main_module.detector_pool.reserved == 0
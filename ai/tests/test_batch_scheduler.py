@@ -0,0 +1,91 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+from ai.benchmarks.synthetic_video import VideoSpec, cached_video
+from ai.services.batch_scheduler import (BATCH_CONFIG, BatchClip, BatchQueue, batch_parallelism, fetch_reference,
+                                         is_allowed_reference, upload_path)
+from ai.services.video_io import estimate_sampled_frames
+
+
+def test_queue_hands_out_shortest_clips_first_once_each():
+    clips = [BatchClip(i, f"clip{i}.mp4", estimated_frames=frames) for i, frames in enumerate([300, 30, 90, 30, 600])]
+    queue = BatchQueue(clips)
+    assert [queue.next().index for _ in range(3)] == [1, 3, 2]
+    assert [clip.index for clip in queue.drain()] == [0, 4]
+    assert queue.next() is None
+
+    # Workers racing on one queue never get the same clip twice
+    queue = BatchQueue(BatchClip(i, str(i), estimated_frames=i % 7) for i in range(500))
+    taken, lock = [], threading.Lock()
+
+    def worker():
+        while (clip := queue.next()) is not None:
+            with lock:
+                taken.append(clip.index)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(taken) == list(range(500))
+
+
+def test_batch_parallelism_leaves_room_for_single_requests():
+    assert batch_parallelism(20, pool_size=4) == 2
+    assert batch_parallelism(20, pool_size=1) == 1
+    assert batch_parallelism(1, pool_size=8) == 1
+    assert batch_parallelism(20, pool_size=4, max_parallel=8) == 4
+
+
+def test_references_are_limited_to_storage_hosts(tmp_path):
+    hosts = ['project.supabase.co']
+    assert is_allowed_reference('https://PROJECT.supabase.co/storage/v1/object/sign/user-videos/a.mp4?token=x', hosts)
+    assert not is_allowed_reference('http://project.supabase.co/a.mp4', hosts)
+    assert not is_allowed_reference('https://169.254.169.254/latest/meta-data', hosts)
+    with pytest.raises(ValueError, match='video_url_not_allowed'):
+        fetch_reference('file:///etc/passwd', str(tmp_path / 'x'), hosts, 1 << 20)
+    assert upload_path(str(tmp_path), 3, '../../etc/passwd') == str(tmp_path / '3-passwd')
+
+
+class _RedirectingStorage(BaseHTTPRequestHandler):
+    """/video.mp4 is the upload; /moved redirects to it and /escape to another host."""
+
+    def do_GET(self):
+        port = self.server.server_address[1]
+        targets = {'/moved': f'http://127.0.0.1:{port}/video.mp4', '/escape': f'http://localhost:{port}/video.mp4'}
+        if self.path in targets:
+            self.send_response(302)
+            self.send_header('Location', targets[self.path])
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Length', '5')
+        self.end_headers()
+        self.wfile.write(b'video')
+
+    def log_message(self, *args):
+        pass
+
+
+def test_redirects_are_held_to_the_storage_hosts(tmp_path, monkeypatch):
+    monkeypatch.setitem(BATCH_CONFIG, 'allowed_schemes', ('http',))  # the local server has no TLS
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _RedirectingStorage)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    try:
+        assert fetch_reference(f'{base}/moved', str(tmp_path / 'a'), ['127.0.0.1'], 1 << 20) == 5
+        with pytest.raises(ValueError, match='video_url_not_allowed'):
+            fetch_reference(f'{base}/escape', str(tmp_path / 'b'), ['127.0.0.1'], 1 << 20)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_frame_estimate_matches_sampling(tmp_path):
+    path = cached_video(str(tmp_path), VideoSpec(160, 120, 30, 2))
+    assert estimate_sampled_frames(path) == 60
+    assert estimate_sampled_frames(path, target_fps=15) == 30
+    assert estimate_sampled_frames(str(tmp_path / 'missing.mp4')) == 0
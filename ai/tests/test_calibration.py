@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from ai.services.calibration import (Calibration, CalibrationCache, CalibrationError, bar_path_metrics,
+                                     calibrate_from_sweep)
+
+
+def test_client_forms_parse_and_bad_values_are_rejected():
+    assert Calibration.from_dict({'pixelsPerMeter': 500}).pixels_per_meter == 500
+    assert Calibration.from_dict({'pixelsPerCm': 5}).pixels_per_meter == 500
+    homography = Calibration.from_dict({'homography': list(range(1, 10))}).homography
+    assert homography.shape == (3, 3)
+    for bad in [{}, {'pixelsPerMeter': -1}, {'homography': [1, 2, 3]}, {'pixelsPerMeter': 500, 'tiltDeg': 80},
+                {'sweep': [[0, 0], [1, 1]]}, {'pixelsPerMeter': 'abc'}, {'pixelsPerCm': 'x'},
+                {'pixelsPerMeter': 500, 'tiltDeg': 'x'}, {'sweep': [1, 2, 3]}, {'sweep': 'abc'},
+                {'homography': ['a'] * 9}, {'pixelsPerMeter': 500, 'confidence': 'high'},
+                {'pixelsPerMeter': [500]}]:
+        with pytest.raises(CalibrationError):
+            Calibration.from_dict(bad)
+
+
+def test_sweep_matches_the_device_calibrator():
+    # 20 points, 200 px of path over the 20 cm reference -> 10 px/cm, full confidence
+    sweep = [[100 + 10 * i * 0.6, 50 + 10 * i * 0.8] for i in range(21)]
+    calibration = calibrate_from_sweep(sweep)
+    assert calibration.pixels_per_meter == pytest.approx(1000.0)
+    assert calibration.confidence == 1.0
+    assert calibrate_from_sweep(sweep[:5]) is None
+    assert calibrate_from_sweep([[0, 0]] * 20) is None
+    assert Calibration.from_dict({'sweep': sweep}).pixels_per_meter == pytest.approx(1000.0)
+
+
+def test_batched_transforms_match_per_point_conversion():
+    rng = np.random.default_rng(0)
+    pixels = rng.uniform(0, 1000, (50, 33, 2))
+    homography = np.array([[0.002, 0.0001, -0.5], [0.00005, 0.0021, -0.3], [0.00001, 0.00002, 1.0]])
+    projective = Calibration(homography=homography)
+    expected = np.array([(homography @ [x, y, 1.0])[:2] / (homography @ [x, y, 1.0])[2]
+                         for x, y in pixels.reshape(-1, 2)]).reshape(pixels.shape)
+    np.testing.assert_allclose(projective.to_metric(pixels), expected)
+
+    tilted = Calibration(pixels_per_meter=400.0, tilt_deg=30.0)
+    np.testing.assert_allclose(tilted.to_metric(pixels)[..., 0], pixels[..., 0] / 400.0)
+    np.testing.assert_allclose(tilted.to_metric(pixels)[..., 1], pixels[..., 1] / 400.0 / np.cos(np.radians(30)))
+
+
+def test_bar_metrics_are_reported_in_metric_units():
+    fps, frame_size = 30, (1000, 800)
+    t = np.arange(90) / fps
+    points = np.full((len(t), 33, 4), 0.5, dtype=np.float32)
+    bar_y_m = 0.25 * np.sin(2 * np.pi * t / 3)  # 25 cm amplitude, 3 s reps
+    points[:, [15, 16], 1] = (0.5 + bar_y_m * 500 / frame_size[1])[:, None]
+    points[:, 15, 0] = 0.5 + 0.02 * 500 / frame_size[0]  # wrists 4 cm apart, bar centered at 0.5
+    points[:, 16, 0] = 0.5 - 0.02 * 500 / frame_size[0]
+    points[45, [15, 16], 0] += 0.03 * 500 / frame_size[0]  # one frame drifts 3 cm forward
+    points[10] = np.nan  # missing frame
+
+    metrics = bar_path_metrics(points, t, Calibration(pixels_per_meter=500.0), frame_size)
+    assert metrics['peak_velocity_mps'] == pytest.approx(2 * np.pi * 0.25 / 3, rel=0.02)
+    assert metrics['range_of_motion_cm'] == pytest.approx(50.0, rel=0.01)
+    assert metrics['bar_path_deviation_cm'] == pytest.approx(3.0, abs=0.01)
+    assert bar_path_metrics(points[:1], t[:1], Calibration(pixels_per_meter=500.0), frame_size) is None
+
+
+def test_cache_keeps_sessions_apart_and_expires_them():
+    now = [0.0]
+    cache = CalibrationCache(max_entries=2, ttl=60, clock=lambda: now[0])
+    first = cache.resolve('phone-a', 'session-1', {'pixelsPerMeter': 500})
+    assert cache.resolve('phone-a', 'session-1') is first
+    assert cache.resolve('phone-b', 'session-1') is None  # other device
+    assert cache.resolve(None, None, {'pixelsPerMeter': 300}).pixels_per_meter == 300  # not cached
+    assert len(cache) == 1
+
+    cache.put('phone-a', 'session-2', Calibration(pixels_per_meter=1.0))
+    cache.get('phone-a', 'session-1')  # most recently used
+    cache.put('phone-a', 'session-3', Calibration(pixels_per_meter=2.0))
+    assert cache.get('phone-a', 'session-2') is None and cache.get('phone-a', 'session-1') is first
+
+    now[0] = 120.0
+    assert cache.get('phone-a', 'session-1') is None
+
+
+def test_pooled_detector_forgets_a_videos_calibration(monkeypatch):
+    from ai.benchmarks.stub_pose import stub_mediapipe
+    from ai.services import pose_detector as pose_detector_module
+    monkeypatch.setattr(pose_detector_module, "mp", stub_mediapipe())
+    detector = pose_detector_module.PoseDetector()
+    detector.set_calibration({'pixelsPerMeter': 500})
+    assert detector.calibration.pixels_per_meter == 500
+    detector.reset_tracking()
+    assert detector.calibration is None
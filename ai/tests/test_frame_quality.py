@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+from ai.services.frame_quality import (
+    FrameQualityGate, BLUR, UNDEREXPOSED, NO_CONTENT, EMPTY_SCENE
+)
+from ai.services.pose_detector import ImageProcessor
+
+
+_processor = ImageProcessor()
+
+
+def _luma(frame):
+    # The luma plane the detector gates on; copied, since its buffer is reused
+    _processor.prepare(frame)
+    return _processor.luma.copy()
+
+
+def _gym(seed=0, person_x=None):
+    rng = np.random.default_rng(seed)
+    frame = np.full((720, 1280, 3), 110, dtype=np.uint8)
+    for x in range(0, 1280, 80):
+        cv2.rectangle(frame, (x, 300), (x + 40, 700), (60, 70, 80), -1)
+    if person_x is not None:
+        cv2.circle(frame, (person_x, 200), 35, (200, 180, 160), -1)
+        cv2.line(frame, (person_x, 240), (person_x, 520), (200, 180, 160), 25)
+    noise = rng.normal(0, 4, frame.shape)
+    return np.clip(frame + noise, 0, 255).astype(np.uint8)
+
+
+def test_rejects_dark_flat_and_blurred_frames():
+    gate = FrameQualityGate()
+    assert gate.check(_luma((_gym() * 0.04).astype(np.uint8))) == UNDEREXPOSED
+    assert gate.check(_luma(np.full((480, 640, 3), 128, dtype=np.uint8))) == NO_CONTENT
+    assert gate.check(_luma(cv2.GaussianBlur(_gym(), (0, 0), 25))) == BLUR
+    assert gate.check(_luma(_gym(person_x=640))) is None
+    assert gate.summary()['gated_by_reason'] == {UNDEREXPOSED: 1, NO_CONTENT: 1, BLUR: 1}
+
+
+def test_static_empty_scene_is_gated_until_someone_appears():
+    gate = FrameQualityGate({'empty_probe_interval': 5})
+    t = 0.0
+    inferred = 0
+
+    def step(frame):
+        nonlocal t, inferred
+        t += 1 / 30
+        reason = gate.check(_luma(frame), t)
+        if reason is None:
+            inferred += 1
+            gate.record_detection(person_found=False)
+        return reason
+
+    # Two misses are needed before a static scene is treated as empty
+    assert step(_gym(1)) is None
+    assert step(_gym(2)) is None
+    reasons = [step(_gym(3 + i)) for i in range(10)]
+    assert reasons.count(EMPTY_SCENE) == 8  # every 5th static frame is still probed
+    assert inferred == 4
+
+    # A lifter walking in changes the scene locally and is inferred at once
+    assert step(_gym(20, person_x=1150)) is None
+
+    summary = gate.summary()
+    assert summary['gated_frames'] == 8
+    assert len(summary['gaps']) == 2
+    assert summary['gaps'][0][0] < summary['gaps'][0][1]
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+from ai.services.pose_detector import IMAGE_PROCESSING_CONFIG, ImageProcessor
+
+
+class CountingCLAHE:
+    def __init__(self, clahe):
+        self.clahe = clahe
+        self.calls = 0
+
+    def apply(self, src, dst=None):
+        self.calls += 1
+        return self.clahe.apply(src, dst=dst)
+
+
+@pytest.fixture
+def processor():
+    processor = ImageProcessor()
+    processor.use_gpu = False
+    processor.clahe = CountingCLAHE(processor.clahe)
+    return processor
+
+
+def _scene(level, seed=0):
+    """1280x720 BGR frame with some structure around a mean luma of `level`."""
+    rng = np.random.default_rng(seed)
+    frame = np.full((720, 1280, 3), level, dtype=np.int16)
+    frame[200:600, 500:800] += 25
+    frame += rng.integers(-10, 10, frame.shape, dtype=np.int16)
+    return np.clip(frame, 0, 255).astype(np.uint8)
+
+
+def test_output_is_rgb_at_the_target_size():
+    for target_size in (IMAGE_PROCESSING_CONFIG['target_size'], (320, 240)):
+        processor = ImageProcessor(target_size)
+        frame = _scene(120)
+        frame[:, :, 0] = 255  # Pure blue channel in BGR
+        out = processor.preprocess_frame(frame)
+        width, height = target_size
+        assert out.shape == (height, width, 3) and out.dtype == np.uint8
+        assert (out[:, :, 2] == 255).all()
+        assert processor.luma.shape == IMAGE_PROCESSING_CONFIG['luma_size'][::-1]
+
+
+def test_returned_frame_is_a_reused_buffer(processor):
+    first = processor.preprocess_frame(_scene(120, seed=1))
+    kept = first.copy()
+    second = processor.preprocess_frame(_scene(40, seed=2))
+    assert second is first
+    assert not np.array_equal(first, kept)  # Overwritten by the next call
+
+
+def test_clahe_runs_only_on_dark_or_forced_frames(processor):
+    threshold = IMAGE_PROCESSING_CONFIG['brightness_threshold'] * 255
+    processor.preprocess_frame(_scene(int(threshold) + 20))
+    assert processor.clahe.calls == 0
+    processor.preprocess_frame(_scene(int(threshold) - 20))
+    assert processor.clahe.calls == 1
+    processor.preprocess_frame(_scene(int(threshold) + 20), force_enhance=True)
+    assert processor.clahe.calls == 2
+
+
+def test_dark_frames_match_the_lab_clahe_reference(processor):
+    frame = _scene(30)
+    out = processor.preprocess_frame(frame)
+
+    # Previous path: RGB at model size, CLAHE on the LAB lightness channel, back to RGB
+    rgb = cv2.cvtColor(cv2.resize(frame, IMAGE_PROCESSING_CONFIG['target_size']), cv2.COLOR_BGR2RGB)
+    l, a, b = cv2.split(cv2.cvtColor(rgb, cv2.COLOR_RGB2LAB))
+    clahe = cv2.createCLAHE(clipLimit=IMAGE_PROCESSING_CONFIG['contrast_limit'],
+                            tileGridSize=IMAGE_PROCESSING_CONFIG['grid_size'])
+    expected = cv2.cvtColor(cv2.merge((clahe.apply(l), a, b)), cv2.COLOR_LAB2RGB)
+    assert np.abs(out.astype(int) - expected).max() <= 1
+    assert out.mean() > rgb.mean() + 5
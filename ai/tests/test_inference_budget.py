@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+
+from ai.services import pose_detector as pose_detector_module
+from ai.services.pose_detector import PoseDetector, DetectionStatus
+from ai.services.inference_budget import InferenceBudget
+from ai.services.deadline import Deadline, CLIENT_DISCONNECTED, DEADLINE_EXCEEDED
+
+
+class _FakePose:
+    """Stands in for mp.solutions.pose.Pose; finds a person only when told to."""
+
+    def __init__(self):
+        self.person_visible = False
+        self.calls = 0
+
+    def process(self, image):
+        self.calls += 1
+        if not self.person_visible:
+            return SimpleNamespace(pose_landmarks=None)
+        landmarks = [SimpleNamespace(x=0.5, y=0.5, z=0.0, visibility=0.9) for _ in range(33)]
+        return SimpleNamespace(pose_landmarks=SimpleNamespace(landmark=landmarks))
+
+
+@pytest.fixture
+def detector(monkeypatch):
+    monkeypatch.setattr(pose_detector_module, "mp", None)
+    detector = PoseDetector(enable_frame_skipping=False)
+    detector.pose = _FakePose()
+    return detector
+
+
+def _frame(seed):
+    rng = np.random.default_rng(seed)
+    return rng.integers(60, 200, (240, 320, 3), dtype=np.uint8)
+
+
+def test_failed_frames_return_status_without_retry_storm(detector):
+    result = detector.detect(_frame(0), 0)
+    assert result.status == DetectionStatus.NO_POSE
+    assert result.landmarks is None
+    assert result.attempts == 2  # primary plus one enhanced attempt
+    assert detector.detect_pose(_frame(1), 1) == (None, 0.0)
+
+
+def test_circuit_opens_on_empty_stretch_and_recloses(detector):
+    budget = InferenceBudget({'failure_threshold': 3, 'probe_interval': 10})
+
+    # 30 seconds out of frame at 30 fps
+    statuses = [detector.detect(_frame(i), i, budget=budget).status for i in range(900)]
+    assert statuses[:3] == [DetectionStatus.NO_POSE] * 3
+    assert statuses.count(DetectionStatus.CIRCUIT_OPEN) > 800
+    # 3 frames x 2 attempts, then single-attempt probes every 10th frame
+    assert detector.pose.calls == 6 + (900 - 3) // 10
+    assert budget.summary()['circuit_opened'] == 1
+
+    detector.pose.person_visible = True
+    results = [detector.detect(_frame(i), i, budget=budget) for i in range(900, 920)]
+    first_ok = next(i for i, r in enumerate(results) if r.ok)
+    assert first_ok < 10
+    assert all(r.ok for r in results[first_ok:])
+    assert budget.state == 'closed'
+
+
+def test_exhausted_budget_stops_inference(detector):
+    budget = InferenceBudget({'max_inferences': 4})
+    statuses = [detector.detect(_frame(i), i, budget=budget).status for i in range(5)]
+    assert statuses == [DetectionStatus.NO_POSE] * 2 + [DetectionStatus.BUDGET_EXHAUSTED] * 3
+    assert detector.pose.calls == 4
+
+
+def test_deadline_stops_inference_and_reports_reason(detector):
+    deadline = Deadline(60.0)
+    budget = InferenceBudget(deadline=deadline)
+    assert detector.detect(_frame(0), 0, budget=budget).attempts == 2
+
+    deadline.cancel(CLIENT_DISCONNECTED)
+    deadline.cancel(DEADLINE_EXCEEDED)  # first reason wins
+    assert deadline.reason == CLIENT_DISCONNECTED
+    assert deadline.remaining() == 0.0
+    assert detector.detect(_frame(1), 1, budget=budget).status == DetectionStatus.BUDGET_EXHAUSTED
+    assert detector.pose.calls == 2
+
+    assert Deadline(0.0).reason == DEADLINE_EXCEEDED
+    assert not Deadline().expired
+
+
+def test_frame_skipping_alternates_on_sampled_frames(detector):
+    # A 60 fps source sampled at 30 fps yields only even frame numbers
+    detector.enable_frame_skipping = True
+    detector.pose.person_visible = True
+    statuses = [detector.detect(_frame(0), frame_number).status for frame_number in range(0, 40, 2)]
+    assert statuses.count(DetectionStatus.SKIPPED) <= len(statuses) // 2
+    assert detector.pose.calls >= len(statuses) // 2
+
+    detector.reset_tracking()
+    assert detector.detect(_frame(0), 40).status == DetectionStatus.OK
@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from ai.services.landmark_buffer import (LandmarkBuffer, array_to_landmarks_dict, as_landmark_array,
+                                         landmarks_to_array)
+from ai.services.movement_analyzer import MovementAnalyzer
+from ai.services.pose_detector import blend_pose_arrays, multiAngleBlend, normalize_pose, normalize_pose_array
+
+
+def _pose(seed=0):
+    rng = np.random.default_rng(seed)
+    row = np.empty((33, 4), dtype=np.float32)
+    row[:, :3] = rng.random((33, 3))
+    row[:, 3] = rng.uniform(0.2, 1.0, 33)
+    return row
+
+
+def _mediapipe_landmarks(row):
+    return SimpleNamespace(landmark=[SimpleNamespace(x=x, y=y, z=z, visibility=v) for x, y, z, v in row.tolist()])
+
+
+def test_every_landmark_form_converts_to_the_same_row():
+    row = _pose()
+    np.testing.assert_array_equal(landmarks_to_array(_mediapipe_landmarks(row)), row)
+    from_dict = landmarks_to_array(array_to_landmarks_dict(row))
+    np.testing.assert_allclose(from_dict[:, [0, 1, 3]], row[:, [0, 1, 3]])
+
+    partial = landmarks_to_array({11: [0.1, 0.2, 0.9], 'left_knee': [0.3, 0.4]})
+    assert np.isnan(partial[0]).all() and partial[11, 3] == pytest.approx(0.9)
+    assert 0 not in array_to_landmarks_dict(partial) and 11 in array_to_landmarks_dict(partial)
+
+
+def test_buffer_grows_and_keeps_rows():
+    buffer = LandmarkBuffer(capacity=2)
+    rows = [_pose(i) for i in range(5)]
+    for row in rows:
+        buffer.append(row)
+    assert len(buffer) == 5 and buffer.array.shape == (5, 33, 4)
+    np.testing.assert_array_equal(buffer.array, np.stack(rows))
+    np.testing.assert_array_equal(as_landmark_array([array_to_landmarks_dict(r) for r in rows])[..., :2],
+                                  buffer.array[..., :2])
+
+
+def test_vectorized_normalize_and_blend_match_the_dict_versions():
+    views = np.stack([_pose(1), _pose(2), _pose(3)])
+    for row in views:
+        expected = normalize_pose(array_to_landmarks_dict(row))
+        np.testing.assert_allclose(normalize_pose_array(row)[:, :2],
+                                   [[expected[i]['x'], expected[i]['y']] for i in range(33)], atol=1e-5)
+
+    expected = multiAngleBlend([array_to_landmarks_dict(row) for row in views])
+    blended = blend_pose_arrays(views)
+    np.testing.assert_allclose(blended[:, [0, 1, 3]],
+                               [[expected[i]['x'], expected[i]['y'], expected[i]['visibility']] for i in range(33)],
+                               atol=1e-5)
+
+
+def _squat(frames=90):
+    rows = np.tile(_pose(), (frames, 1, 1))
+    depth = 0.15 * (1 - np.cos(2 * np.pi * np.arange(frames) / 30)) / 2
+    rows[:, 11] = [0.5, 0.2, 0.0, 0.9]
+    rows[:, 23, :2] = np.stack([0.5 + 0 * depth, 0.5 + depth], axis=1)
+    rows[:, 25, :2] = np.stack([0.6 + 0.5 * depth, 0.7 + 0 * depth], axis=1)
+    rows[:, 27, :2] = [0.5, 0.9]
+    return rows
+
+
+def test_movement_analysis_accepts_arrays_and_dict_frames_alike():
+    analyzer = MovementAnalyzer()
+    rows = _squat()
+    from_array, _ = analyzer.analyze_movement(rows, 'squat')
+    from_dicts, _ = analyzer.analyze_movement([array_to_landmarks_dict(row) for row in rows], 'squat')
+    assert from_array.depth > 0
+    assert from_array.depth == pytest.approx(from_dicts.depth)
+    assert from_array.rep_count == from_dicts.rep_count
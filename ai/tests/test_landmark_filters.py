@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from ai.services.landmark_filters import create_landmark_filter
+from ai.services.pose_utils import PoseNormalizer
+
+
+def _noisy_trajectories(frames=300, joints=33, noise=0.01, seed=0):
+    t = np.arange(frames) / 30.0
+    phase = np.linspace(0, np.pi, joints)
+    truth = np.stack([0.5 + 0.1 * np.sin(2 * np.pi * 0.5 * t[:, None] + phase),
+                      0.5 + 0.2 * np.cos(2 * np.pi * 0.5 * t[:, None] + phase)], axis=-1)
+    rng = np.random.default_rng(seed)
+    return truth, truth + noise * rng.standard_normal(truth.shape), t
+
+
+def _rmse(a, b):
+    return float(np.sqrt(np.nanmean((a - b) ** 2)))
+
+
+@pytest.mark.parametrize('method', ['kalman', 'one_euro'])
+def test_batch_smoothing_removes_jitter_without_lag(method):
+    truth, noisy, t = _noisy_trajectories(noise=0.02)
+    smoothed = create_landmark_filter(method).smooth(noisy, timestamps=t)
+    assert smoothed.shape == noisy.shape
+    assert _rmse(smoothed, truth) < 0.7 * _rmse(noisy, truth)
+    # Forward-backward: no systematic delay against the true motion
+    lag = [np.argmax(np.correlate(np.diff(smoothed[:, j, 1]), np.diff(truth[:, j, 1]), 'full')) - 298
+           for j in range(0, 33, 8)]
+    assert max(abs(l) for l in lag) <= 1
+
+
+def test_streaming_kalman_predicts_through_gaps_and_ignores_unseen_joints():
+    truth, noisy, t = _noisy_trajectories(frames=120, noise=0.02)
+    noisy[40:50, 5] = np.nan  # joint 5 occluded
+    visibility = np.ones(noisy.shape[:2])
+    visibility[:, 7] = 0.1  # joint 7 never seen well enough
+    bank = create_landmark_filter('kalman')
+    out = np.stack([bank.update(noisy[i], visibility[i], t[i]) for i in range(len(noisy))])
+
+    assert np.isnan(out[:, 7]).all()
+    assert np.isfinite(out[40:50, 5]).all() and _rmse(out[40:50, 5], truth[40:50, 5]) < 0.05
+    assert _rmse(out[30:], truth[30:]) < _rmse(noisy[30:], truth[30:])
+
+    bank.reset()
+    assert np.isnan(bank.update(np.full((33, 2), np.nan))).all()
+
+
+def _roughness(positions):
+    return float(np.mean(np.diff(positions, n=2, axis=0) ** 2))
+
+
+def test_pose_normalizer_smooths_name_and_index_keyed_frames():
+    _, noisy, _ = _noisy_trajectories(frames=60, noise=0.02)
+    names = {11: 'left_shoulder', 12: 'right_shoulder', 23: 'left_hip', 24: 'right_hip', 25: 'left_knee'}
+    frames = []
+    for i in range(60):
+        frame = {name: np.array([*noisy[i, index], 0.9]) for index, name in names.items()}
+        frame['25'] = frame['left_knee'].copy()
+        frame['bar'] = np.array([1.0, 2.0])
+        frames.append(frame)
+    normalizer = PoseNormalizer()
+    raw = [normalizer.normalize_pose(f, (100, 100)) for f in frames]
+    poses = normalizer.smooth_sequence([normalizer.normalize_pose(f, (100, 100)) for f in frames])
+
+    knees = np.array([pose.landmarks['left_knee'][:2] for pose in poses])
+    np.testing.assert_array_equal(knees, [pose.landmarks['25'][:2] for pose in poses])
+    raw_knees = np.array([pose.landmarks['left_knee'][:2] for pose in raw])
+    assert _roughness(knees) < 0.2 * _roughness(raw_knees)
+    assert all(pose.landmarks['left_knee'][2] == 0.9 for pose in poses)  # visibility kept
+    np.testing.assert_array_equal(poses[0].landmarks['bar'], raw[0].landmarks['bar'])  # unknown keys not filtered
+
+    # Streaming with a session filter smooths too; without one frames are independent
+    session = normalizer.create_filter()
+    streamed = np.array([normalizer.normalize_pose(f, (100, 100), landmark_filter=session).landmarks['left_knee'][:2]
+                         for f in frames])
+    assert _roughness(streamed[10:]) < 0.5 * _roughness(raw_knees[10:])
+    np.testing.assert_array_equal(normalizer.normalize_pose(frames[3], (100, 100)).landmarks['left_knee'],
+                                  raw[3].landmarks['left_knee'])
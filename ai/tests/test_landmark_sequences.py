@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from ai.benchmarks.analyzer_benchmark import scaling_exponent
+from ai.benchmarks.landmark_sequences import EXERCISE_MOTIONS, generate_landmark_sequence
+
+
+@pytest.mark.parametrize('exercise', sorted(EXERCISE_MOTIONS))
+def test_sequences_are_deterministic_with_gaps_and_visibility_dips(exercise):
+    sequence = generate_landmark_sequence(exercise, 3000, dropout_rate=0.005)
+    again = generate_landmark_sequence(exercise, 3000, dropout_rate=0.005)
+    np.testing.assert_array_equal(sequence.points, again.points)
+
+    assert 2800 < len(sequence) < 3000  # dropped frames are removed
+    gaps = np.diff(sequence.timestamps)
+    assert gaps.max() > 5 / 30 and np.isclose(gaps.min(), 1 / 30)
+    assert sequence.visibility.min() >= 0.5  # dips stay usable
+    assert (sequence.visibility < 0.7).any()
+
+    # The driving joints actually move through a range of motion
+    assert np.ptp(sequence.points, axis=0).max() > 0.1
+
+    frame = sequence.mediapipe_frames([23, 25])[0]
+    assert set(frame) == {23, 25} and set(frame[23]) == {'x', 'y', 'visibility'}
+    frame = sequence.analyzer_frames([23])[0]
+    assert set(frame) == {'23', 'left_hip'} and frame['23'].shape == (3,)
+
+
+def test_scaling_exponent():
+    sizes = [1000, 10000, 100000]
+    assert scaling_exponent(sizes, [0.01, 0.1, 1.0]) == 1.0
+    assert scaling_exponent(sizes, [0.01, 1.0, 100.0]) == 2.0
+    assert scaling_exponent(sizes, [0.0001, 0.0001, 0.5]) is None  # too short to trust
@@ -0,0 +1,49 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ai.benchmarks.load_test import LoadGenerator, multipart_body, summarize
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    calls = 0
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        assert body.endswith(b'--\r\n') and b'name="file"' in body
+        type(self).calls += 1
+        if type(self).calls % 4 == 0:
+            status, payload = 503, {'detail': 'overloaded'}
+        else:
+            status, payload = 200, {'partial': False, 'usage': {'stage_seconds': {'queue_wait': 0.25}}}
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_load_generator_reports_throughput_rejections_and_queue_wait(tmp_path):
+    video = tmp_path / 'clip.mp4'
+    video.write_bytes(b'\x00' * 4096)
+    content_type, body = multipart_body(str(video))
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        generator = LoadGenerator(f'http://127.0.0.1:{server.server_port}', '/analyze-pose', body, content_type,
+                                  {'exercise_type': 'squat'}, concurrency=2, duration=0.5, rate=40)
+        results = generator.run()
+    finally:
+        server.shutdown()
+
+    summary = summarize(results, generator.elapsed, 4096)
+    assert 15 <= summary['requests'] <= 20  # open loop: the schedule sets the count
+    assert summary['error_rate'] == 0.0
+    assert 0.15 < summary['rejection_rate'] < 0.35
+    assert summary['queue_wait_seconds']['p50'] == 0.25
+    assert summary['throughput_rps'] > 0
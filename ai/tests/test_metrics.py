@@ -0,0 +1,155 @@
+import threading
+
+import numpy as np
+
+from ai.services.metrics import (
+    RunningStats, QuantileSketch, FixedHistogram, WindowedRate, ExerciseStats,
+    PipelineMetrics, render_prometheus
+)
+from ai.services.detector_pool import DetectorPool
+
+
+def test_sketch_quantiles_within_relative_accuracy_and_merge():
+    rng = np.random.default_rng(0)
+    values = rng.lognormal(mean=0.0, sigma=1.0, size=20000)
+
+    whole = QuantileSketch()
+    whole.add_many(values)
+    left, right = QuantileSketch(), QuantileSketch()
+    for v in values[:10000]:
+        left.add(v)
+    right.add_many(values[10000:])
+    left.merge(right)
+
+    assert np.array_equal(whole.counts, left.counts)
+    for q in (0.5, 0.95, 0.99):
+        exact = np.quantile(values, q)
+        assert abs(whole.quantile(q) - exact) / exact < 0.02
+    # Memory does not depend on how many values were seen
+    assert whole.counts.nbytes < 16 * 1024
+
+
+def test_running_stats_and_histogram_merge_match_batch():
+    values = np.linspace(0.05, 0.95, 101)
+    a, b = RunningStats(), RunningStats()
+    for v in values[:40]:
+        a.add(v)
+    b.add_many(values[40:])
+    a.merge(b)
+    assert a.count == 101
+    assert np.isclose(a.mean, values.mean())
+    assert np.isclose(a.variance, values.var(ddof=1))
+
+    hist, other = FixedHistogram.confidence(), FixedHistogram.confidence()
+    hist.add_many(values[:50])
+    for v in values[50:]:
+        other.add(v)
+    hist.merge(other)
+    assert hist.counts.tolist() == np.histogram(values, bins=10, range=(0, 1))[0].tolist()
+    assert np.isclose(hist.mean, values.mean())
+
+
+def test_windowed_rate_forgets_old_events():
+    rate = WindowedRate(window_seconds=10)
+    for second in range(100, 110):
+        rate.add(3, now=second)
+    assert rate.rate(now=109) == 3.0
+    assert rate.rate(now=115) == 1.2  # only seconds 106..109 remain
+    assert rate.rate(now=200) == 0.0
+
+
+def test_exercise_stats_are_bounded():
+    stats = ExerciseStats()
+    for i in range(1000):
+        stats.record_video(1.0 + i % 5, frames=30)
+    stats.record_failure()
+    assert stats.total_videos == 1000
+    assert len(stats.recent_processing_times) == 10
+    assert np.isclose(stats.processing_time.mean, 3.0)
+    assert 2.9 < stats.processing_time_quantiles.quantile(0.5) < 3.1
+    assert stats.success_rate == 0.999
+
+
+def test_prometheus_exposition_has_cumulative_stage_buckets():
+    pipeline = PipelineMetrics()
+    pipeline.observe_many('inference', [0.004, 0.02, 0.02, 0.5])
+    pipeline.observe('decode', 400.0)
+    pipeline.count_frames({'decoded': 5, 'gated': 1, 'inferred': 4})
+    stats = {'squat': ExerciseStats()}
+    stats['squat'].record_video(2.0, frames=4)
+
+    text = render_prometheus(pipeline, stats, gauges={'velox_analysis_queue_depth': lambda: 3},
+                             counters={'velox_analysis_rejected_total': lambda: 7})
+    lines = text.splitlines()
+    assert 'velox_stage_duration_seconds_bucket{stage="inference",le="0.005"} 1' in lines
+    assert 'velox_stage_duration_seconds_bucket{stage="inference",le="0.025"} 3' in lines
+    assert 'velox_stage_duration_seconds_bucket{stage="inference",le="+Inf"} 4' in lines
+    assert 'velox_stage_duration_seconds_count{stage="inference"} 4' in lines
+    assert 'velox_stage_duration_seconds_bucket{stage="decode",le="300"} 0' in lines
+    assert 'velox_stage_duration_seconds_bucket{stage="decode",le="+Inf"} 1' in lines
+    assert 'velox_frames_total{outcome="gated"} 1' in lines
+    assert 'velox_videos_total{exercise="squat"} 1' in lines
+    assert 'velox_analysis_queue_depth 3' in lines
+    assert '# TYPE velox_analysis_rejected_total counter' in lines and 'velox_analysis_rejected_total 7' in lines
+
+    # Every sample belongs to the family of the TYPE line above it
+    family = None
+    for line in lines:
+        if line.startswith('# TYPE '):
+            family = line.split()[2]
+        elif not line.startswith('#'):
+            assert line.split('{')[0].split()[0] in (family, f'{family}_bucket', f'{family}_sum', f'{family}_count')
+
+
+def test_detector_pool_reports_queue_depth_and_utilization():
+    pool = DetectorPool(object, size=1)
+    release = threading.Event()
+    checked_out = threading.Event()
+
+    def hold():
+        with pool.acquire() as detector:
+            assert detector is not None
+            checked_out.set()
+            release.wait(5)
+
+    worker = threading.Thread(target=hold)
+    worker.start()
+    checked_out.wait(5)
+    assert pool.utilization == 1.0
+
+    with pool.acquire(timeout=0.01) as detector:
+        assert detector is None  # still busy
+    assert pool.queue_depth == 0
+
+    release.set()
+    worker.join()
+    with pool.acquire(timeout=1) as detector:
+        assert detector is not None
+    assert pool.utilization == 0.0
+
+
+def test_detector_pool_rejects_arrivals_to_a_full_line():
+    pool = DetectorPool(object, size=1, max_waiting=2)
+    start = threading.Barrier(10)
+    admissions = []
+
+    def arrive():
+        start.wait(5)
+        admissions.append(pool.admit())  # still uploading; nobody has called acquire() yet
+
+    arrivals = [threading.Thread(target=arrive) for _ in range(10)]
+    for thread in arrivals:
+        thread.start()
+    for thread in arrivals:
+        thread.join()
+    admitted = [admission for admission in admissions if admission is not None]
+    assert len(admitted) == 3  # one detector plus two places in line
+    assert pool.stats()['rejected'] == 7 and pool.queue_depth == 2
+
+    with pool.acquire(timeout=1, admission=admitted[0]) as detector:
+        assert detector is not None
+        assert pool.admit() is None  # the detector holder still counts
+    admitted[1].release()  # ended before reaching a detector
+    admitted[1].release()
+    assert pool.reserved == 1 and pool.admit() is not None
+    assert DetectorPool(object, size=1).admit()  # unbounded by default
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+
+from ai.benchmarks.stub_pose import stub_mediapipe
+from ai.benchmarks.synthetic_video import VideoSpec, cached_video
+from ai.services import pose_detector as pose_detector_module
+from ai.services.multi_view import MultiViewDetector, iter_synchronized_frames
+from ai.services.pose_detector import DetectionStatus, PoseDetector
+
+
+def _frame(seed):
+    rng = np.random.default_rng(seed)
+    return rng.integers(60, 200, (240, 320, 3), dtype=np.uint8)
+
+
+def test_synchronized_frames_align_views_and_pad_the_shorter_one(tmp_path):
+    front = cached_video(str(tmp_path), VideoSpec(160, 120, 30, 2))
+    side = cached_video(str(tmp_path), VideoSpec(160, 120, 15, 1))
+
+    tuples = list(iter_synchronized_frames([front, side], target_fps=15))
+    assert len(tuples) == 30
+    assert [t.frame_number for t in tuples] == list(range(30))
+    assert all(t.frames[0] is not None for t in tuples)
+    assert [t.frames[1] is not None for t in tuples] == [True] * 15 + [False] * 15
+    np.testing.assert_allclose(np.diff([t.timestamp for t in tuples]), 1 / 15, atol=1e-3)
+
+    # Stopping early releases the decoding threads
+    stream = iter_synchronized_frames([front, side])
+    next(stream)
+    stream.close()
+
+
+def test_views_keep_independent_tracking_and_run_in_parallel(monkeypatch):
+    monkeypatch.setattr(pose_detector_module, "mp", stub_mediapipe(inference_ms=100, latency_mode='sleep'))
+    views = MultiViewDetector.create(lambda: PoseDetector(enable_frame_skipping=False), 2)
+    front, side = views.detectors
+
+    result = views.detect([_frame(0), _frame(1)], 0, timestamp=0.0)
+    # Each view's inference started before the other's finished
+    (front_start, front_end), (side_start, side_end) = front.pose.call_spans[0], side.pose.call_spans[0]
+    assert front_start < side_end and side_start < front_end
+    assert [view.status for view in result.views] == [DetectionStatus.OK] * 2
+    assert result.landmarks and result.confidence > 0.5
+
+    # A view without a frame this tuple is left out and its tracker untouched
+    result = views.detect([_frame(2), None], 1)
+    assert result.views[1] is None
+    assert (front.pose.calls, side.pose.calls) == (2, 1)
+    assert front.last_successful_pose is not side.last_successful_pose
+    views.close()
+
+
+def test_detect_pose_multi_gives_each_camera_its_own_detector(monkeypatch):
+    monkeypatch.setattr(pose_detector_module, "mp", stub_mediapipe())
+    detector = PoseDetector(enable_frame_skipping=False)
+
+    landmarks, confidence = detector.detect_pose_multi([_frame(0), _frame(1)], 0)
+    assert landmarks and confidence > 0.5
+    primary, sibling = detector._multi_view.detectors
+    assert primary is detector and sibling is not detector
+    assert sibling.enable_frame_skipping is False
+    assert list(detector.frame_buffer) == [0] and list(sibling.frame_buffer) == [0]
@@ -0,0 +1,34 @@
+from ai.benchmarks.pipeline_benchmark import compare
+from ai.benchmarks.stub_pose import StubPose
+from ai.benchmarks.synthetic_video import VideoSpec, cached_video
+from ai.services.frame_quality import FrameQualityGate
+from ai.services.video_io import iter_sampled_frames
+import cv2
+
+
+def test_synthetic_video_is_decodable_and_passes_the_gate(tmp_path):
+    spec = VideoSpec(160, 120, 15, 1)
+    path = cached_video(str(tmp_path), spec)
+    assert cached_video(str(tmp_path), spec) == path  # generated once
+
+    gate = FrameQualityGate()
+    frames = list(iter_sampled_frames(path))
+    assert len(frames) == spec.frame_count
+    for _, timestamp, frame in frames:
+        luma = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        assert gate.check(luma, timestamp) is None
+
+    first, second = StubPose(), StubPose()
+    assert [first.process(None).pose_landmarks.landmark[23].y for _ in range(5)] == \
+        [second.process(None).pose_landmarks.landmark[23].y for _ in range(5)]
+
+
+def test_compare_flags_throughput_and_tail_latency_regressions():
+    baseline = {'a': {'fps': 100.0, 'frame_latency_ms': {'p50': 1.0, 'p95': 2.0}},
+                'b': {'fps': 100.0, 'frame_latency_ms': {'p50': 1.0, 'p95': 2.0}}}
+    results = {'a': {'fps': 95.0, 'frame_latency_ms': {'p50': 1.0, 'p95': 2.1}},
+               'b': {'fps': 50.0, 'frame_latency_ms': {'p50': 1.0, 'p95': 9.0}},
+               'new': {'fps': 1.0, 'frame_latency_ms': {'p50': 1.0, 'p95': 9.0}}}
+    regressions = compare(results, baseline, tolerance=0.3)
+    assert len(regressions) == 2
+    assert all(line.startswith('b:') for line in regressions)
@@ -0,0 +1,53 @@
+import threading
+import time
+
+from ai.services.profiler import SamplingProfiler
+
+
+def _busy_leaf(seconds):
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += 1
+    return total
+
+
+def _analysis(seconds):
+    return _busy_leaf(seconds)
+
+
+def test_profiles_only_the_calling_thread(tmp_path):
+    stop = threading.Event()
+    def _bystander():
+        stop.wait(5)
+
+    bystander = threading.Thread(target=_bystander)
+    bystander.start()
+
+    with SamplingProfiler(interval=0.001) as profiler:
+        _analysis(0.2)
+    stop.set()
+    bystander.join()
+
+    assert profiler.samples > 20
+    collapsed = profiler.collapsed()
+    top_stack = collapsed.splitlines()[0]
+    frames, count = top_stack.rsplit(' ', 1)
+    names = [frame.split(' ')[0] for frame in frames.split(';')]
+    assert names[-2:] == ['_analysis', '_busy_leaf']
+    assert int(count) > 0
+    assert '_bystander' not in collapsed  # other threads are never sampled
+
+    path = tmp_path / 'profile.collapsed'
+    profiler.write(str(path))
+    assert path.read_text() == collapsed
+
+
+def test_concurrent_profiles_are_capped():
+    first = SamplingProfiler()
+    assert first.start()
+    second = SamplingProfiler()
+    assert not second.start()
+    first.stop()
+    assert second.start()
+    second.stop()
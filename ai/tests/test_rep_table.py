@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+
+from ai.services.calibration import Calibration
+from ai.services.rep_segmentation import RepBounds, find_reps
+from ai.services.rep_table import REP_TABLE_CONFIG, build_rep_table, rep_analytics, summarize_sets
+
+
+def knee_angle(reps, fps=30, rep_seconds=2.0, rest_seconds=0.0, slowdown=0.0, noise=0.0, seed=0):
+    """Knee angle of `reps` squats from 170 to 80 degrees, each rep `slowdown` slower than the last."""
+    pieces = [np.full(int(fps * 0.5), 170.0)]
+    for i in range(reps):
+        frames = int(fps * rep_seconds * (1 + slowdown) ** i)
+        pieces.append(125.0 + 45.0 * np.cos(np.linspace(0, 2 * np.pi, frames, endpoint=False)))
+    pieces.append(np.full(int(fps * (0.5 + rest_seconds)), 170.0))
+    angle = np.concatenate(pieces)
+    angle += np.random.default_rng(seed).normal(0, noise, len(angle))
+    return angle, np.arange(len(angle)) / fps
+
+
+def test_jitter_does_not_add_reps():
+    angle, _ = knee_angle(8, noise=4.0)
+    bounds = find_reps(angle)
+    assert len(bounds) == 8
+    assert (bounds.start < bounds.bottom).all() and (bounds.bottom < bounds.end).all()
+    np.testing.assert_allclose(angle[bounds.bottom], 80.0, atol=15.0)
+    assert len(find_reps(170.0 + np.random.default_rng(1).normal(0, 4.0, 600))) == 0
+
+    angle[100:110] = np.nan
+    assert len(find_reps(angle)) == 8
+
+
+def test_table_columns_and_set_velocity_loss():
+    first, _ = knee_angle(5, slowdown=0.1)
+    second, _ = knee_angle(3, slowdown=0.4)
+    gap = np.full(int(30 * REP_TABLE_CONFIG['set_rest_seconds'] * 1.5), 170.0)
+    angle = np.concatenate([first, gap, second])
+    times = np.arange(len(angle)) / 30
+
+    table = build_rep_table(angle, times)
+    assert len(table) == 8
+    np.testing.assert_array_equal(table.set_index, [0] * 5 + [1] * 3)
+    np.testing.assert_allclose(table.rom, 90.0, atol=2.0)
+    np.testing.assert_allclose(table.duration, table.eccentric_time + table.concentric_time)
+    assert (np.diff(table.mean_velocity[:5]) < 0).all()
+    assert table.velocity_decay[0] == 0 and table.velocity_decay[5] == 0
+    # Each rep takes 10% longer, so mean speed falls to 1/1.1^4 of the first
+    assert table.velocity_decay[4] == pytest.approx(1 - 1 / 1.1 ** 4, abs=0.03)
+
+    sets = summarize_sets(table)
+    np.testing.assert_array_equal(sets.reps, [5, 3])
+    np.testing.assert_array_equal(sets.first_rep, [0, 5])
+    assert sets.rest_before[1] > REP_TABLE_CONFIG['set_rest_seconds']
+    assert sets.velocity_loss[0] == pytest.approx(table.velocity_decay[4])
+    assert (sets.velocity_trend < 0).all()
+    assert list(sets.stop_set) == [True, True]
+    assert sets.advice() == 'end_session'  # second set lost about 1 - 1/1.4^2 = 49%
+    assert summarize_sets(build_rep_table(knee_angle(4)[0], knee_angle(4)[1])).advice() == 'continue'
+
+
+def test_landmark_analytics_in_metric_units():
+    angle, times = knee_angle(4)
+    theta = np.radians(angle)
+    points = np.full((len(angle), 33, 4), 0.5, dtype=np.float32)
+    points[:, 23, :2] = [0.5, 0.3]
+    points[:, 25, :2] = [0.5, 0.5]
+    points[:, 27, 0] = 0.5 + 0.2 * np.sin(theta)
+    points[:, 27, 1] = 0.5 - 0.2 * np.cos(theta)
+    points[:, [15, 16], 1] = (0.4 + 0.001 * (angle - 170))[:, None]
+    points[:, :, 3] = 0.9
+
+    table, sets = rep_analytics(points, times, 'squat')
+    assert len(table) == 4 and table.velocity_unit == 'deg/s'
+    np.testing.assert_allclose(table.rom, 90.0, atol=2.0)
+    np.testing.assert_allclose(table.confidence, 0.9, atol=1e-6)
+
+    table, _ = rep_analytics(points, times, 'squat', Calibration(pixels_per_meter=1000.0), (1000, 1000))
+    assert table.velocity_unit == 'm/s'
+    # Bar moves 1 mm per degree: 90 mm down and up in 2 s
+    assert table.peak_velocity[0] == pytest.approx(0.045 * np.pi, rel=0.05)
+    assert rep_analytics(points, times, 'plank') is None
+
+
+def test_calibrated_pushups_keep_angular_velocity():
+    # Elbow angle goes 170 -> 80 -> 170 degrees while the wrist stays still
+    angle, times = knee_angle(4)
+    theta = np.radians(angle)
+    points = np.full((len(angle), 33, 4), 0.5, dtype=np.float32)
+    points[:, 15, :2] = [0.5, 0.5]
+    points[:, 13, :2] = [0.5, 0.7]
+    points[:, 11, 0] = 0.5 + 0.2 * np.sin(theta)
+    points[:, 11, 1] = 0.7 - 0.2 * np.cos(theta)
+    points[:, :, 3] = 0.9
+
+    table, sets = rep_analytics(points, times, 'pushup', Calibration(pixels_per_meter=1000.0), (1000, 1000))
+    assert len(table) == 4 and table.velocity_unit == 'deg/s'
+    # 90 degrees down and up in 2 s, not the ~0 m/s of the still wrists
+    assert table.mean_velocity[0] == pytest.approx(90.0, rel=0.1)
+    assert sets.advice() == 'continue'
+
+
+def test_long_sessions_tabulate_every_rep():
+    angle, times = knee_angle(200, noise=2.0)
+    table = build_rep_table(angle, times)
+    sets = summarize_sets(table)
+    assert len(table) == 200 and sets.reps.sum() == 200
+
+
+def test_legacy_analyzer_counts_noisy_reps_and_shares_boundaries():
+    from ai.services.movement_analyzer import MovementAnalyzer
+    angle, times = knee_angle(6, noise=3.0)
+    theta = np.radians(angle)
+    points = np.full((len(angle), 33, 4), 0.5, dtype=np.float32)
+    points[:, 23, :2] = [0.5, 0.3]
+    points[:, 25, :2] = [0.5, 0.5]
+    points[:, 27, 0] = 0.5 + 0.2 * np.sin(theta)
+    points[:, 27, 1] = 0.5 - 0.2 * np.cos(theta)
+
+    metrics, _ = MovementAnalyzer().analyze_movement(points, 'squat', timestamps=times.tolist())
+    assert metrics.error_message is None
+    assert metrics.rep_count == 6 == len(metrics.rep_boundaries)
+    bounds = RepBounds.from_rows(metrics.rep_boundaries)
+    table, _ = rep_analytics(points, times, 'squat', bounds=bounds)
+    np.testing.assert_array_equal(table.bottom, bounds.bottom)
+    assert metrics.tempo == pytest.approx(len(angle) / 30 / 6)
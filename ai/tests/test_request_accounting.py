@@ -0,0 +1,49 @@
+import contextvars
+import threading
+import time
+
+import numpy as np
+
+from ai.services import request_accounting
+from ai.services.request_accounting import record_stage, track_cpu
+
+
+def _spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_usage_counts_only_this_requests_threads():
+    noisy_neighbour = threading.Thread(target=_spin, args=(0.3,))
+    noisy_neighbour.start()
+
+    usage, token = request_accounting.start_usage()
+    try:
+        def work():
+            with track_cpu():
+                _spin(0.1)
+                record_stage('inference', 0.1)
+                block = np.ones(20 * 2**20, dtype=np.uint8)  # 20 MB resident while it lives
+                usage.sample_rss()
+                del block
+
+        worker = threading.Thread(target=contextvars.copy_context().run, args=(work,))
+        worker.start()
+        worker.join()
+        record_stage('upload', 0.02)
+        usage.frames.update({'decoded': 10, 'inferred': 8})
+    finally:
+        request_accounting.end_usage(token)
+    noisy_neighbour.join()
+
+    summary = usage.to_dict()
+    assert 0.05 < summary['cpu_seconds'] < 0.25
+    assert summary['stage_seconds'] == {'inference': 0.1, 'upload': 0.02}
+    assert summary['frames'] == {'decoded': 10, 'inferred': 8}
+    assert summary['peak_rss_delta_bytes'] >= 10 * 2**20
+    # Outside a request the helpers are no-ops
+    record_stage('upload', 1.0)
+    with track_cpu():
+        pass
+    assert request_accounting.current_usage() is None
@@ -0,0 +1,89 @@
+import multiprocessing
+import os
+
+import numpy as np
+
+from ai.services.metrics import ExerciseStats, PipelineMetrics
+from ai.services.shared_metrics import WorkerMetricsFile, read_fleet, exercise_slot
+
+
+def _worker(directory, videos, processing_time):
+    stats = {'squat': ExerciseStats()}
+    pipeline = PipelineMetrics()
+    metrics_file = WorkerMetricsFile(directory)
+    for _ in range(videos):
+        stats['squat'].record_video(processing_time, frames=10)
+        pipeline.observe('inference', 0.02)
+        pipeline.count_frames({'decoded': 10, 'inferred': 10})
+        metrics_file.publish(stats, pipeline, {'size': 1, 'busy': 0, 'queue_depth': 0})
+
+
+def test_fleet_sums_every_worker_process(tmp_path):
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_worker, args=(str(tmp_path), n, float(n))) for n in (3, 5)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+        assert worker.exitcode == 0
+
+    fleet = read_fleet(str(tmp_path))
+    assert (fleet.workers, fleet.retired_workers) == (0, 2)
+    squat = fleet.exercise_stats['squat']
+    assert squat.total_videos == 8
+    assert squat.total_frames == 80
+    assert np.isclose(squat.processing_time.mean, (3 * 3.0 + 5 * 5.0) / 8)
+    assert squat.processing_time_quantiles.count == 8
+    assert fleet.pipeline.frames['decoded'] == 80
+    assert fleet.pipeline.stages['inference'].count == 8
+    # Exited workers still count toward totals but not toward live gauges
+    assert fleet.pool['size'] == 0
+    assert set(fleet.exercise_stats) == {'squat'}
+    # Their files were folded into the retired totals, which later reads keep
+    assert sorted(os.listdir(tmp_path)) == ['velox-metrics.lock', 'velox-retired.metrics']
+    assert read_fleet(str(tmp_path)).exercise_stats['squat'].total_videos == 8
+
+
+def _publish_videos(metrics_file, videos):
+    stats = {'squat': ExerciseStats()}
+    for _ in range(videos):
+        stats['squat'].record_video(1.0, frames=10)
+    metrics_file.publish(stats, PipelineMetrics())
+
+
+def test_workers_forked_after_construction_publish_to_their_own_files(tmp_path):
+    metrics_file = WorkerMetricsFile(str(tmp_path))  # As main.py does at import, before a preload fork
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_publish_videos, args=(metrics_file, n)) for n in (2, 3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+        assert worker.exitcode == 0
+    _publish_videos(metrics_file, 4)
+
+    fleet = read_fleet(str(tmp_path))
+    assert (fleet.workers, fleet.retired_workers) == (1, 2)
+    assert fleet.exercise_stats['squat'].total_videos == 9
+
+
+def test_reused_pid_keeps_the_exited_workers_counters(tmp_path):
+    _publish_videos(WorkerMetricsFile(str(tmp_path)), 5)
+    # A new worker under the same PID starts from zero without wiping the old file's counts
+    _publish_videos(WorkerMetricsFile(str(tmp_path)), 1)
+
+    fleet = read_fleet(str(tmp_path))
+    assert (fleet.workers, fleet.retired_workers) == (1, 1)
+    assert fleet.exercise_stats['squat'].total_videos == 6
+
+
+def test_reader_sees_own_live_worker_and_slots_unknown_exercises(tmp_path):
+    stats = {exercise_slot('squat'): ExerciseStats(), exercise_slot('snatch'): ExerciseStats()}
+    stats['other'].record_failure()
+    metrics_file = WorkerMetricsFile(str(tmp_path))
+    metrics_file.publish(stats, PipelineMetrics(), {'size': 2, 'busy': 1, 'queue_depth': 4})
+
+    fleet = read_fleet(str(tmp_path))
+    assert fleet.pool == {'size': 2, 'busy': 1, 'queue_depth': 4, 'rejected': 0}
+    assert fleet.exercise_stats['other'].failures == 1
+    assert exercise_slot(None) == 'unspecified'
@@ -0,0 +1,57 @@
+import io
+import json
+import logging
+import logging.handlers
+import queue
+
+from ai.services.structured_logging import EventRateLimiter, JsonFormatter, SampledQueueHandler
+
+
+def _pipeline(limiter=None, maxsize=0):
+    log_queue = queue.Queue(maxsize=maxsize)
+    handler = SampledQueueHandler(log_queue, limiter)
+    logger = logging.getLogger(f"velox-test-{id(handler)}")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
+    return logger, handler, log_queue
+
+
+def _lines(handler, log_queue):
+    out = io.StringIO()
+    writer = logging.StreamHandler(out)
+    writer.setFormatter(JsonFormatter())
+    listener = logging.handlers.QueueListener(log_queue, writer)
+    listener.start()
+    listener.stop()
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_identical_frame_errors_collapse_into_a_summary():
+    logger, handler, log_queue = _pipeline(EventRateLimiter(window=60, burst=3))
+    for frame in range(100):
+        logger.error("Error processing frame %d: %s", frame, "bad input")
+    logger.info("request_completed", extra={'status': 200})
+    handler.flush_suppressed()
+
+    lines = _lines(handler, log_queue)
+    assert [line['message'] for line in lines[:3]] == [f"Error processing frame {n}: bad input" for n in range(3)]
+    assert lines[3]['message'] == "request_completed" and lines[3]['status'] == 200
+    assert lines[4]['suppressed'] == 97
+    assert lines[4]['message'].startswith("97 similar events suppressed")
+    assert len(lines) == 5
+
+
+def test_context_is_masked_on_the_writer_and_full_queue_drops():
+    logger, handler, log_queue = _pipeline(maxsize=2)
+    logger.info("signup", extra={'userEmail': 'athlete@example.com', 'exerciseType': 'squat'})
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("analyze_pose_error")
+    logger.info("dropped")
+
+    assert handler.dropped == 1
+    first, second = _lines(handler, log_queue)
+    assert first['userEmail'] == 'at***om' and first['exerciseType'] == 'squat'
+    assert second['level'] == 'error' and 'ValueError: boom' in second['exception']
@@ -0,0 +1,60 @@
+import contextvars
+import threading
+
+from ai.services import tracing
+from ai.services.tracing import span, traced, add_timing, start_trace, finish_trace, get_trace
+
+
+@traced()
+def _squat_metrics(n):
+    with span('inner', frames=n):
+        return n * 2
+
+
+def test_spans_are_free_outside_a_trace():
+    assert span('anything') is span('other')  # shared no-op object
+    assert _squat_metrics(2) == 4
+    assert tracing.current_trace() is None
+
+
+def test_sampled_trace_records_nested_spans_and_server_timing():
+    trace, token = start_trace('req-1', sampled=True)
+    _squat_metrics(3)
+    _squat_metrics(4)
+    add_timing('decode', 0.25)
+    finish_trace(trace, token)
+
+    exported = get_trace('req-1')
+    spans = exported['spans']
+    assert [s['name'] for s in spans] == ['inner', '_squat_metrics', 'inner', '_squat_metrics']
+    outer = spans[1]
+    assert spans[0]['parent'] == outer['id'] and outer['parent'] == 0
+    assert spans[0]['attributes'] == {'frames': 3}
+    assert exported['totals_ms']['decode'] == 250.0
+
+    header = trace.server_timing()
+    assert 'decode;dur=250.00' in header
+    assert '_squat_metrics;dur=' in header
+
+
+def test_unsampled_trace_keeps_totals_only_and_crosses_threads():
+    trace, token = start_trace('req-2', sampled=False)
+    worker = threading.Thread(target=contextvars.copy_context().run, args=(_squat_metrics, 1))
+    worker.start()
+    worker.join()
+    finish_trace(trace, token)
+
+    assert trace.spans == []
+    assert set(trace.totals) == {'inner', '_squat_metrics'}
+    assert get_trace('req-2') is None
+
+
+def test_export_file_names_never_use_unsafe_trace_ids(tmp_path, monkeypatch):
+    monkeypatch.setitem(tracing.TRACING_CONFIG, 'export_dir', str(tmp_path))
+    for trace_id in ('req-3', '../../escape', 'x' * 200):
+        trace, token = start_trace(trace_id, sampled=True)
+        finish_trace(trace, token)
+    names = sorted(p.name for p in tmp_path.iterdir())
+    assert 'trace-req-3.json' in names and len(names) == 3
+    assert all('/' not in name and '..' not in name and len(name) < 80 for name in names)
+    assert not (tmp_path.parent.parent / 'escape.json').exists()
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+from ai.services.video_io import iter_sampled_frames
+from ai.services.movement_analyzer import MovementAnalyzer as LegacyMovementAnalyzer
+from ai.services.exercises.movement_analyzer import MovementAnalyzer
+from ai.services.pose_utils import NormalizedPose, PoseConfidence
+
+
+def _write_video(path, fps, frame_count):
+    out = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'mp4v'), fps, (64, 48))
+    for i in range(frame_count):
+        out.write(np.full((48, 64, 3), i % 255, dtype=np.uint8))
+    out.release()
+
+
+def _knee_frames(fps, duration=4.0, freq=0.5):
+    # Knee angle oscillates 70..170 degrees => peak angular velocity ~157 deg/s
+    times = np.arange(0.0, duration, 1.0 / fps)
+    frames = []
+    for t in times:
+        angle = np.radians(120 + 50 * np.cos(2 * np.pi * freq * t))
+        knee = np.array([0.0, 1.0])
+        landmarks = {
+            'left_hip': np.array([0.0, 0.0]),
+            'left_knee': knee,
+            'left_ankle': knee - np.array([np.sin(angle), -np.cos(angle)]),
+        }
+        frames.append(NormalizedPose(landmarks, PoseConfidence(1.0, {}, {}), 1.0, np.eye(3)))
+    return frames, times.tolist()
+
+
+def test_sampling_follows_timestamps_for_non_integer_ratio(tmp_path):
+    path = tmp_path / "clip.mp4"
+    _write_video(path, fps=25, frame_count=50)  # 2 seconds
+
+    samples = list(iter_sampled_frames(str(path), target_fps=10))
+    timestamps = np.array([s.timestamp for s in samples])
+
+    # 25 -> 10 fps cannot be done by integer skipping; the time grid must hold
+    assert len(samples) == 20
+    assert np.all(np.diff(timestamps) > 0)
+    assert np.allclose(np.diff(timestamps).mean(), 0.1, atol=0.01)
+
+
+def test_sampling_without_target_keeps_every_frame(tmp_path):
+    path = tmp_path / "clip.mp4"
+    _write_video(path, fps=30, frame_count=15)
+
+    samples = list(iter_sampled_frames(str(path)))
+    assert [s.frame_number for s in samples] == list(range(15))
+    assert np.isclose(samples[-1].timestamp, 14 / 30, atol=1e-3)
+
+
+def test_phase_velocity_is_independent_of_sampling_rate():
+    analyzer = MovementAnalyzer()
+    triplets = [('left_hip', 'left_knee', 'left_ankle')]
+    peaks = []
+    for fps in (30, 15):
+        frames, times = _knee_frames(fps)
+        result = analyzer.analyze_movement(frames, triplets, timestamps=times)
+        assert result.phases
+        peaks.append(max(p.peak_velocity for p in result.phases))
+        assert np.isclose(result.phases[0].start_time, 0.5, atol=0.05)
+
+    assert np.isclose(peaks[0], 157, rtol=0.05)
+    assert np.isclose(peaks[0], peaks[1], rtol=0.05)
+
+
+def test_legacy_tempo_is_reported_in_seconds():
+    analyzer = LegacyMovementAnalyzer()
+    full = [i / 30 for i in range(120)]
+    decimated = full[::3]
+
+    assert np.isclose(analyzer._calculate_tempo(full, len(full), 2), 2.0)
+    assert np.isclose(analyzer._calculate_tempo(decimated, len(decimated), 2), 2.0)
+    # Without timestamps a constant 30fps is assumed
+    assert np.isclose(analyzer._calculate_tempo(None, 120, 2), 2.0)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+
+from ai.benchmarks.synthetic_video import VideoSpec, cached_video
+from ai.services.multi_view import iter_synchronized_frames
+from ai.services.deadline import Deadline
+from ai.services.view_alignment import align_views, cross_correlation_lag, estimate_offset, motion_energy
+
+
+def _session_signal(samples, seed=0):
+    """Rep-like bursts of motion separated by rests, with sensor noise."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(samples) / 30.0
+    bursts = np.clip(np.sin(2 * np.pi * t / 4.0), 0, None) * (rng.random(samples // 300 + 1).repeat(300)[:samples] > 0.3)
+    return bursts + 0.05 * rng.standard_normal(samples)
+
+
+@pytest.mark.parametrize('lag', [37, -120, 0])
+def test_lag_is_recovered_in_both_directions(lag):
+    session = _session_signal(6000)
+    reference = session[200:5200]
+    view = session[200 - lag:5200 - lag] + 0.05 * np.random.default_rng(1).standard_normal(5000)
+    found, confidence = cross_correlation_lag(reference, view)
+    assert found == pytest.approx(lag, abs=0.5)
+    assert confidence > 0.8
+
+
+def test_unrelated_views_are_not_shifted():
+    offset = estimate_offset(_session_signal(3000, seed=1), np.random.default_rng(2).standard_normal(3000))
+    assert not offset.applied and offset.offset == 0.0 and offset.confidence < 0.3
+
+
+def test_thirty_minute_recordings_align():
+    session = _session_signal(30 * 60 * 30 + 900)
+    offset = estimate_offset(session[:54000], session[450:54450])
+    assert offset.applied and offset.offset == pytest.approx(-15.0, abs=1 / 30)
+
+
+def test_offsets_shift_views_onto_the_reference_clock(tmp_path):
+    path = cached_video(str(tmp_path), VideoSpec(160, 120, 30, 2))
+    energy = motion_energy(path, fps=15)
+    assert len(energy) == 30 and energy[0] == 0 and energy[1:].max() > 0
+    # Only the alignment window is decoded, and nothing once the deadline has passed
+    assert len(motion_energy(path, fps=15, max_seconds=1.0)) == 15
+    cancelled = Deadline()
+    cancelled.cancel()
+    assert len(motion_energy(path, fps=15, deadline=cancelled)) == 0
+    assert align_views([path, path], deadline=cancelled) is None
+
+    # The second camera started 0.5 s earlier: its first 0.5 s is skipped
+    tuples = list(iter_synchronized_frames([path, path], target_fps=15, offsets=[0.0, 0.5]))
+    assert tuples[0].timestamp == pytest.approx(0.0, abs=1e-3)
+    assert [t.frames[1] is not None for t in tuples] == [True] * 23 + [False] * 7
+    assert all(t.frames[0] is not None for t in tuples)
@@ -90,4 +90,31 @@ def test_configurable_smoothing():
     heavy_std = np.std(heavy_velocities)
     
     # Assert more aggressive smoothing (lower alpha) reduces noise more
-    assert heavy_std < light_std < raw_std, "Smoothing strength not working as expected" 
\ No newline at end of file
+    assert heavy_std < light_std < raw_std, "Smoothing strength not working as expected" 
+
+def test_matches_velocity_ts_reference_cases():
+    """Same cases as __tests__/velocity.test.ts."""
+    fps = 60
+    one_cycle = 0.5 * np.sin(2 * np.pi * np.arange(240) / 240)
+    metrics = calcVelocity(one_cycle.tolist(), fps)
+    assert len(metrics) == 2
+    assert metrics[0].peak > 0.6 and metrics[0].mean > 0.3
+    assert metrics[0].displacement == pytest.approx(0.5, abs=0.05)
+
+    constant = calcVelocity([i * 0.5 / fps for i in range(60)], fps)
+    assert len(constant) == 1 and constant[0].peak == pytest.approx(0.5) and constant[0].mean == pytest.approx(0.5)
+    assert calcVelocity([0.0] * 60, fps)[0].peak == pytest.approx(0.0)
+    assert calcVelocity([1.0], fps) == []
+
+def test_long_series_are_segmented_into_reps():
+    """Ten-thousand-frame sessions segment into their reps; speed is timed by the analyzer benchmark."""
+    fps = 60
+    t = np.arange(12000) / fps
+    y_series = 0.3 * np.sin(2 * np.pi * t / 3) + np.random.default_rng(0).normal(0, 0.003, len(t))
+    metrics = calcVelocity(y_series, fps)
+    assert len(metrics) == pytest.approx(len(t) / fps / 3, abs=1)
+    assert np.median([m.peak for m in metrics]) == pytest.approx(2 * np.pi * 0.3 / 3, rel=0.05)
+
+def test_invalid_alpha_is_rejected():
+    with pytest.raises(ValueError):
+        calcVelocity([0.0, 1.0, 2.0], 60, {"alpha": 0})
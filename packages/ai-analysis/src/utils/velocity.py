@@ -0,0 +1,186 @@
+"""
+Bar velocity metrics from a vertical position series.
+
+Python counterpart of velocity.ts `calcVelocity` for server-side
+velocity-based training: finite differences, optional EMA smoothing of
+the velocities, rep segmentation at upward zero crossings, and per-rep
+peak/mean velocity and displacement. Every step is a NumPy array
+operation, so 10k+ frame series take a few milliseconds.
+
+Whole recordings are analyzed after upload, so unlike velocity.ts the EMA
+runs forward and backward: it smooths as much as the one-sided filter but
+without its lag, keeping peak velocities and rep boundaries in place.
+Reps are cut on a zero-phase Savitzky-Golay velocity with a hysteresis
+deadband, so boundaries do not depend on the smoothing settings and
+jitter around zero velocity does not split a rep into fragments.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Union
+import numpy as np
+
+# Velocity configuration
+VELOCITY_CONFIG = {
+    'smoothing': True,  # EMA-smooth the reported velocities
+    'alpha': 0.2,  # EMA weight of the newest sample, lower = more smoothing
+    'segment_window': 0.2,  # Savitzky-Golay window for rep segmentation (seconds, at least 5 frames)
+    'segment_order': 2,  # Savitzky-Golay polynomial order
+    'rep_deadband': 0.2,  # Velocity must pass this fraction of the 95th-percentile speed to flip direction
+    'min_rep_duration': 0.25,  # Seconds; closer boundaries are jitter, not reps
+    'ema_block': 256  # Samples per block of the vectorized EMA
+}
+
+
+@dataclass
+class VelocityMetric:
+    repIdx: int
+    peak: float  # Max |velocity| in the rep
+    mean: float  # Mean |velocity| in the rep
+    displacement: float  # |position change| over the rep
+    v_raw: List[float] = field(default_factory=list)  # Finite differences of the positions
+    v_smooth: List[float] = field(default_factory=list)  # Velocities the metrics are computed from
+
+
+def savitzky_golay_smooth(values: np.ndarray, window: int, order: int) -> np.ndarray:
+    """
+    Local polynomial fit evaluated at each sample, as savitzkyGolaySmooth
+    in velocity.ts: a symmetric window in the interior, the window truncated
+    at the series ends.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    half = window // 2
+    if n == 0:
+        return values.copy()
+
+    def center_weights(offsets: np.ndarray) -> np.ndarray:
+        degree = min(order, window - 1, len(offsets) - 1)
+        vandermonde = offsets[:, None].astype(np.float64) ** np.arange(degree + 1)
+        return np.linalg.pinv(vandermonde)[0]  # Row giving the fitted value at offset 0
+
+    out = np.empty(n)
+    if n > 2 * half:
+        out[half:n - half] = np.correlate(values, center_weights(np.arange(-half, half + 1)), mode='valid')
+        edges = list(range(half)) + list(range(n - half, n))
+    else:
+        edges = list(range(n))
+    for i in edges:
+        left, right = max(0, i - half), min(n - 1, i + half)
+        out[i] = center_weights(np.arange(left - i, right - i + 1)) @ values[left:right + 1]
+    return out
+
+
+def exponential_moving_average(
+    values: np.ndarray,
+    alpha: float,
+    initial: Optional[float] = None,
+    block: Optional[int] = None
+) -> np.ndarray:
+    """
+    applyEMA of velocity.ts (y[i] = a*x[i] + (1-a)*y[i-1], y[-1] = x[0]
+    unless `initial` is given) computed block-wise: one matrix product per
+    block of samples, with only the carry between blocks done sequentially.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n == 0:
+        return values.copy()
+    block = min(block or VELOCITY_CONFIG['ema_block'], n)
+    decay = 1.0 - alpha
+    lags = np.arange(block)
+    # weights[k, j] = a * (1-a)^(k-j) for j <= k
+    weights = np.tril(alpha * decay ** np.clip(lags[:, None] - lags[None, :], 0, None))
+    carry_weights = decay ** (lags + 1)
+
+    padded = np.zeros(-(-n // block) * block)
+    padded[:n] = values
+    local = padded.reshape(-1, block) @ weights.T
+    carry = values[0] if initial is None else initial
+    for row in local:
+        row += carry_weights * carry
+        carry = row[-1]
+    return local.reshape(-1)[:n]
+
+
+def rep_boundaries(velocities: np.ndarray, deadband: float = 0.0, min_frames: int = 1) -> np.ndarray:
+    """
+    Frame 0, the upward zero crossings of the velocity, and the last frame.
+
+    With a deadband, a crossing only counts once the velocity has dropped
+    below -deadband since the previous boundary and then risen above
+    +deadband; the boundary is placed at the last upward zero crossing
+    before that rise. Crossings fewer than `min_frames` after the previous
+    boundary or before the end are dropped.
+    """
+    crossings = np.flatnonzero((velocities[:-1] < 0) & (velocities[1:] >= 0)) + 1
+    if deadband > 0 and len(crossings):
+        # Direction with hysteresis: +1 above the band, -1 below, held inside it
+        direction = np.where(velocities > deadband, 1, np.where(velocities < -deadband, -1, 0))
+        held = np.maximum.accumulate(np.where(direction != 0, np.arange(len(direction)), 0))
+        direction = np.where(direction[held] != 0, direction[held], 0)
+        rises = np.flatnonzero((direction[:-1] == -1) & (direction[1:] == 1)) + 1
+        crossings = crossings[np.searchsorted(crossings, rises, side='right') - 1]
+        crossings = np.unique(crossings[crossings > 0])
+    if min_frames > 1:
+        kept = [0]
+        for crossing in crossings[crossings <= len(velocities) - 1 - min_frames].tolist():
+            if crossing - kept[-1] >= min_frames:
+                kept.append(crossing)
+        crossings = np.array(kept[1:], dtype=int)
+    boundaries = np.concatenate(([0], crossings)).astype(int)
+    if boundaries[-1] != len(velocities) - 1:
+        boundaries = np.append(boundaries, len(velocities) - 1)
+    return boundaries
+
+
+def calcVelocity(
+    y_series: Union[Sequence[float], np.ndarray],
+    fps: float,
+    config: Optional[Dict] = None
+) -> List[VelocityMetric]:
+    """
+    Calculate velocity metrics for a series of vertical positions.
+
+    Args:
+        y_series: Vertical position per frame, in meters
+        fps: Frames per second
+        config: Optional overrides of VELOCITY_CONFIG ('smoothing', 'alpha', ...)
+
+    Returns:
+        One VelocityMetric per rep
+    """
+    config = {**VELOCITY_CONFIG, **(config or {})}
+    if not 0 < config['alpha'] <= 1:
+        raise ValueError(f"alpha must be in (0, 1], got {config['alpha']}")
+    y = np.asarray(y_series, dtype=np.float64)
+    if len(y) < 2:
+        return []
+
+    window = max(int(round(config['segment_window'] * fps)) // 2 * 2 + 1, 5)
+    smoothed_y = savitzky_golay_smooth(y, window, config['segment_order'])
+    segment_velocities = np.diff(smoothed_y) * fps
+
+    raw = np.diff(y) * fps
+    velocities = raw
+    if config['smoothing']:
+        # Both passes start from the fitted end velocities; a noisy first
+        # difference would otherwise linger for about 1/alpha frames
+        velocities = exponential_moving_average(raw, config['alpha'], initial=segment_velocities[0])
+        velocities = exponential_moving_average(velocities[::-1], config['alpha'],
+                                                initial=segment_velocities[-1])[::-1]
+
+    deadband = config['rep_deadband'] * float(np.percentile(np.abs(segment_velocities), 95))
+    boundaries = rep_boundaries(segment_velocities, deadband, max(int(config['min_rep_duration'] * fps), 1))
+    starts, ends = boundaries[:-1], boundaries[1:]
+    if not len(starts):
+        return []
+    speed = np.abs(velocities[:ends[-1]])
+    peaks = np.maximum.reduceat(speed, starts)
+    means = np.add.reduceat(speed, starts) / (ends - starts)
+    displacements = np.abs(smoothed_y[ends] - smoothed_y[starts])
+
+    return [
+        VelocityMetric(repIdx=i, peak=float(peaks[i]), mean=float(means[i]),
+                       displacement=float(displacements[i]),
+                       v_raw=raw[start:end].tolist(), v_smooth=velocities[start:end].tolist())
+        for i, (start, end) in enumerate(zip(starts.tolist(), ends.tolist()))
+    ]